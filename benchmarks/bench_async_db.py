@@ -0,0 +1,158 @@
+"""
+DBClient (supabase, 同期) vs AsyncDBClient (httpx, 並行) のスループット比較
+
+ローカルの PostgREST もどき (fake_postgrest.py) に合成の求人を入れ、同じ操作を両方で実行して
+所要時間・リクエスト数を比べ、結果（返ってくる行と順番・UpsertResult・削除件数）が一致することを確認する。
+p は fetch_all_jobs で並行に読み進める id の範囲の数（iter_jobs の partitions）。
+最後に、もどきに一定間隔で 503 を返させて、AsyncDBClient が再試行で同じ結果を返すことも確認する。
+
+    python benchmarks/bench_async_db.py [行数] [1リクエストの往復秒数] [同時リクエスト数]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import db_client_template  # noqa: E402
+from db_client_template import AsyncDBClient, DBClient  # noqa: E402
+from fake_postgrest import FakePostgREST  # noqa: E402
+
+DAYS = 30
+EXPIRED_RATIO = 0.1
+SEED = 3
+FAIL_EVERY = 7
+
+
+def make_rows(n, seed=SEED):
+    """created_at は秒単位で重複させる（キーセットの id での並べ替えも確かめるため）"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    rows = []
+    for i in range(n):
+        created = now - timedelta(seconds=rng.randrange(n // 4 + 1))
+        updated = now - timedelta(days=DAYS + 1 if rng.random() < EXPIRED_RATIO else rng.randrange(DAYS - 1))
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "site_name": ["Infra", "ZeroOne", "Indeed", "Kyujinbox"][i % 4],
+            "title": f"未経験OK インターン #{i}",
+            "company": f"株式会社サンプル{i % 97}",
+            "location": "五反田駅徒歩5分",
+            "url": f"https://example.com/jobs/{i}?a=1,2",
+            "summary": "未経験から始められるインターンです。" * 5,
+            "created_at": created.isoformat(),
+            "updated_at": updated.isoformat(),
+        })
+    return rows
+
+
+def make_jobs(n, offset):
+    return [
+        {
+            "site_name": "Infra",
+            "title": f"データ分析インターン #{i}",
+            "company": f"株式会社サンプル{i % 97}",
+            "location": "渋谷駅徒歩3分",
+            "url": f"https://example.com/jobs/{i}?a=1,2",
+            "summary": "分析基盤の運用を担当します。" * 5,
+        }
+        for i in range(offset, offset + n)
+    ]
+
+
+def statuses(results):
+    return [r.status for r in results]
+
+
+def operations(rows):
+    n = len(rows)
+    known = [row["url"] for row in rows[::2]] + [f"https://example.com/missing/{i}" for i in range(n // 2)]
+    # 半分は既存の行（内容が変わるので更新）、半分は新規。同じURLの2回目（後の内容が残るはず）も混ぜる
+    jobs = make_jobs(n // 5, n - n // 10)
+    jobs.append(dict(jobs[0], title="データ分析インターン（再掲）"))
+    return [
+        ("fetch_all_jobs", lambda db: db.fetch_all_jobs(), lambda jobs: [job["id"] for job in jobs]),
+        ("iter_jobs(since, sources)", lambda db: db.iter_jobs(
+            columns=["url"], page_size=500, since=(datetime.now(timezone.utc) - timedelta(days=7)).isoformat(),
+            sources=["Infra", "Indeed"]), lambda jobs: [job["id"] for job in jobs]),
+        (f"existing_urls x{len(known)}", lambda db: db.existing_urls(known), sorted),
+        (f"upsert_jobs x{len(jobs)}", lambda db: db.upsert_jobs(jobs), statuses),
+        (f"touch_urls x{len(known)}", lambda db: db.touch_urls(known), None),
+        ("prune_old_jobs", lambda db: db.prune_old_jobs(DAYS), lambda r: (r.deleted, sorted(r.urls))),
+    ]
+
+
+async def _collect(result):
+    if hasattr(result, "__aiter__"):
+        return [item async for item in result]
+    return await result
+
+
+def run_sync(rows, latency):
+    results = []
+    with FakePostgREST(latency=latency) as server:
+        server.seed("jobs", rows)
+        db = DBClient(url=server.url, key=server.key)
+        for label, op, _ in operations(rows):
+            before = server.request_count
+            t0 = time.perf_counter()
+            result = op(db)
+            if not isinstance(result, (list, set, int, tuple)):
+                result = list(result)
+            results.append((time.perf_counter() - t0, server.request_count - before, result))
+    return results
+
+
+async def run_async(rows, latency, concurrency, partitions, fail_every=0):
+    results = []
+    with FakePostgREST(latency=latency, fail_every=fail_every) as server:
+        server.seed("jobs", rows)
+        async with AsyncDBClient(url=server.url, key=server.key, concurrency=concurrency) as db:
+            for label, op, _ in operations(rows):
+                before = server.request_count
+                t0 = time.perf_counter()
+                if label == "fetch_all_jobs":
+                    result = [job async for job in db.iter_jobs(partitions=partitions)]
+                else:
+                    result = await _collect(op(db))
+                results.append((time.perf_counter() - t0, server.request_count - before, result))
+            return results, db.stats
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else db_client_template.ASYNC_CONCURRENCY
+    rows = make_rows(n)
+    print(f"rows: {n}  simulated latency: {latency * 1000:.0f} ms/request  concurrency: {concurrency}")
+
+    labels = [(label, key) for label, _, key in operations(rows)]
+    expected = run_sync(rows, latency)
+    variants = [("async p=1", 1), (f"async p={db_client_template.FETCH_PARTITIONS}", db_client_template.FETCH_PARTITIONS)]
+    runs = {name: asyncio.run(run_async(rows, latency, concurrency, partitions)) for name, partitions in variants}
+
+    for i, (label, key) in enumerate(labels):
+        sec, requests, result = expected[i]
+        line = f"{label:28s} sync {sec:7.2f} s ({requests:4d} req)"
+        for name, _ in variants:
+            got_sec, got_requests, got = runs[name][0][i]
+            same = key is None or key(got) == key(result)
+            line += f"  {name} {got_sec:6.2f} s ({got_requests:4d} req, x{sec / got_sec:4.1f}) {'ok' if same else 'MISMATCH'}"
+        print(line)
+
+    results, stats = asyncio.run(run_async(rows, latency, concurrency, db_client_template.FETCH_PARTITIONS,
+                                           fail_every=FAIL_EVERY))
+    same = all(key is None or key(got) == key(expected[i][2])
+               for i, ((_, key), (_, _, got)) in enumerate(zip(labels, results)))
+    print(f"503 every {FAIL_EVERY} requests: {stats['retries']} retries, {stats['failed']} failed  "
+          f"{'ok' if same else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
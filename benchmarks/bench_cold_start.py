@@ -0,0 +1,149 @@
+"""
+起動時間: reboot の各サブコマンドが「やることが無い」時に何秒で終わるか
+
+一時ディレクトリにツリーを書き出し（--ref を指定すると git のそのコミットの中身、既定は作業ツリー）、
+スクレーパーの出力と PostgREST もどき (fake_postgrest.py) の jobs を用意して、各ステージを一度実行して状態を作る。
+その後、入力を変えないまま各サブコマンドを新しいプロセスで repeat 回実行し、壁時計時間の中央値を出す。
+
+    import   モジュールの import だけ（python -c "import sync_jobs"）
+    no-op    python -m reboot <サブコマンド>（reboot.py の無いコミットでは python <スクリプト>.py）
+
+no-op の実行で読み込まれた重い依存（supabase / openai / playwright / httpx / numpy）と、
+駅データを読み込んだかどうかも出す（-X importtime と出力から。時間はこれとは別の実行で測る）。
+OPENAI_API_KEY は渡さない（おすすめ文の生成は動かない）。
+
+    python benchmarks/bench_cold_start.py [--ref HEAD] [--repeat 5] [--jobs 2000]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_async_db import make_rows  # noqa: E402
+from bench_near_dup import make_jobs  # noqa: E402
+from fake_postgrest import FakePostgREST  # noqa: E402
+
+STATION_CSV = "station20251211free.csv"
+SCRAPER_DIRS = {"Infra": "infra-scraping", "ZeroOne": "zeroone-scraping",
+                "Indeed": "indeed-scraping", "Kyujinbox": "kyujin-scraping"}
+HEAVY = ["supabase", "openai", "playwright", "httpx", "numpy"]
+# サブコマンド -> (モジュール, reboot.py が無い場合のコマンド)。None はそのコミットでは測れない
+COMMANDS = {
+    "merge": ("merge_jobs", ["merge_jobs.py"]),
+    "sync": ("sync_jobs", ["sync_jobs.py"]),
+    "prune": ("sync_jobs", None),
+    "details": ("update_job_details", ["update_job_details.py"]),
+}
+
+
+def export_tree(ref, app_dir):
+    """ref のコミット（None なら作業ツリー）の Python ファイルと駅CSVを app_dir に置く"""
+    os.makedirs(app_dir)
+    if ref is None:
+        for name in os.listdir(ROOT):
+            if name.endswith(".py"):
+                shutil.copy2(os.path.join(ROOT, name), app_dir)
+    else:
+        archive = os.path.join(os.path.dirname(app_dir), "tree.tar")
+        with open(archive, "wb") as f:
+            subprocess.run(["git", "archive", ref, "--", "*.py"], cwd=ROOT, stdout=f, check=True)
+        with tarfile.open(archive) as tar:
+            tar.extractall(app_dir, members=[m for m in tar.getmembers() if "/" not in m.name])
+    os.symlink(os.path.join(ROOT, STATION_CSV), os.path.join(app_dir, STATION_CSV))
+
+
+def write_scraper_outputs(workdir, n):
+    """merge_jobs の PROJECT_PATHS (../<スクレーパー>/output/*.json) にあたる出力"""
+    jobs, _ = make_jobs(n)
+    for i, (source, directory) in enumerate(SCRAPER_DIRS.items()):
+        out = os.path.join(workdir, directory, "output")
+        os.makedirs(out)
+        with open(os.path.join(out, "jobs_0001.json"), "w", encoding="utf-8") as f:
+            json.dump([dict(job, source=source) for job in jobs[i::len(SCRAPER_DIRS)]], f, ensure_ascii=False, indent=2)
+
+
+def command_for(app_dir, name):
+    if os.path.exists(os.path.join(app_dir, "reboot.py")):
+        return ["-m", "reboot", name]
+    return COMMANDS[name][1]
+
+
+def run(app_dir, args, env, check=True):
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, *args], cwd=app_dir, env=env, capture_output=True, text=True)
+    seconds = time.perf_counter() - t0
+    if check and proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stdout[-1500:]}\n{proc.stderr[-1500:]}")
+    return seconds, proc
+
+
+def median_run(app_dir, args, env, repeat):
+    return statistics.median(run(app_dir, args, env)[0] for _ in range(repeat))
+
+
+def loaded_heavy(app_dir, args, env):
+    """-X importtime の出力から、読み込まれた重い依存と、最後の数行の出力"""
+    _, proc = run(app_dir, ["-X", "importtime", *args], env)
+    imported = {line.rsplit("|", 1)[-1].strip() for line in proc.stderr.splitlines() if line.startswith("import time:")}
+    heavy = [name for name in HEAVY if name in imported]
+    stations = "stations from CSV" in proc.stdout or "Station CSV" in proc.stdout
+    last = [line for line in proc.stdout.splitlines() if line.strip() and not line.startswith(("📊", "   ->"))]
+    return heavy, stations, (last[-1] if last else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ref", help="measure this git commit instead of the working tree")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=2000, help="scraper output rows / DB rows")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary directory")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_cold_start_")
+    app_dir = os.path.join(workdir, "app")
+    try:
+        export_tree(args.ref, app_dir)
+        write_scraper_outputs(workdir, args.jobs)
+        os.makedirs(os.path.join(app_dir, "src", "data"))
+        with FakePostgREST() as server:
+            server.seed("jobs", make_rows(args.jobs))
+            env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "PYTHONPATH")}
+            env.update(SUPABASE_URL=server.url, SUPABASE_KEY=server.key, METRICS_DIR="off")
+
+            base = median_run(app_dir, ["-c", "pass"], env, args.repeat)
+            print(f"tree: {args.ref or 'working tree'}  jobs: {args.jobs}  repeat: {args.repeat}  "
+                  f"python startup {base * 1000:.0f} ms")
+            # 状態を作る実行（merge → sync → details の順。sync は merge の jobs.json を置き換える）
+            for name in COMMANDS:
+                module, _ = COMMANDS[name]
+                command = command_for(app_dir, name)
+                if command is None:
+                    print(f"{name:8s} (not available in this tree)")
+                    continue
+                prime, _ = run(app_dir, command, env)
+                imported = median_run(app_dir, ["-c", f"import {module}"], env, args.repeat)
+                noop = median_run(app_dir, command, env, args.repeat)
+                heavy, stations, last = loaded_heavy(app_dir, command, env)
+                print(f"{name:8s} first run {prime:6.2f} s  import {imported * 1000:6.0f} ms  "
+                      f"no-op {noop * 1000:6.0f} ms  loads: {', '.join(heavy) or '-'}"
+                      f"{', station CSV' if stations else ''}")
+                print(f"{'':8s} -> {last}")
+    finally:
+        if args.keep:
+            print(f"kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+update_job_details の詳細ページ取得のスループットと礼儀正しさの確認
+
+ローカルの固定ページサーバー (fixture_job_pages.py) に対して run_detail_pool を回し、
+ブラウザのみ (従来の動作) / HTTP 高速パス + ブラウザ (既定の動作) の所要時間と、
+HTTP・304・ブラウザの内訳、ホストごとの最大同時接続数・最小リクエスト間隔を表示する。
+2周目は同じ HTTP キャッシュで回すので、ETag による 304 が効くことも確認できる。
+ブラウザを使う計測には Playwright (chromium) が必要。OpenAI は呼ばない。
+
+    python benchmarks/bench_detail_pool.py [件数] [並列数] [ホスト間隔秒] [JS描画ページの間隔]
+"""
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.pop("OPENAI_API_KEY", None)
+
+import update_job_details as ujd  # noqa: E402
+from fixture_job_pages import FixtureJobServer  # noqa: E402
+
+
+async def run(server, n_jobs, concurrency, interval, use_http, use_browser, http_cache):
+    # 2ホストに振り分けて、ホストごとの制限が独立していることも見る
+    jobs = [
+        {"title": f"job {i}", "link": server.job_url(i, "127.0.0.1" if i % 2 else "localhost")}
+        for i in range(n_jobs)
+    ]
+    http_client = ujd.new_http_client() if use_http else None
+    browser = ujd.LazyBrowser(concurrency) if use_browser else None
+    limiter = ujd.HostRateLimiter(min_interval=interval, jitter=0.0)
+    fetcher = ujd.DetailFetcher(limiter, http_client, browser, http_cache)
+    t0 = time.perf_counter()
+    try:
+        updated = await ujd.run_detail_pool(jobs, fetcher, concurrency)
+    finally:
+        elapsed = time.perf_counter() - t0
+        if http_client:
+            await http_client.aclose()
+        if browser:
+            await browser.close()
+    return elapsed, updated, fetcher.stats
+
+
+def main():
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    interval = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+    client_rendered_every = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+    ujd.RETRY_BACKOFF = 0.2
+
+    modes = [
+        ("browser only", False, True),
+        ("http + browser", True, True),
+        ("http + browser (warm)", True, True),
+    ]
+    http_cache = ujd.DetailHttpCache(":memory:")
+    print(f"jobs: {n_jobs}  concurrency: {concurrency}  host interval: {interval}s  "
+          f"host max concurrency: {ujd.HOST_MAX_CONCURRENCY}  client-rendered: 1/{client_rendered_every}")
+    # URL (ポート) が変わると HTTP キャッシュが効かないので、全モードで同じサーバーを使う
+    with FixtureJobServer(latency=0.3, fail_every=7, client_rendered_every=client_rendered_every) as server:
+        for label, use_http, use_browser in modes:
+            server.stats.clear()
+            elapsed, updated, stats = asyncio.run(
+                run(server, n_jobs, concurrency, interval, use_http, use_browser, http_cache)
+            )
+            print(f"{label:22s}: {elapsed:6.2f} s  {n_jobs / elapsed:6.2f} jobs/s  updated={updated}  {stats}")
+            for host, st in server.summary().items():
+                print(f"    {host}: {st}")
+        print(f"304 responses: {server.not_modified}")
+
+
+if __name__ == "__main__":
+    main()
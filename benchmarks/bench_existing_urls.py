@@ -0,0 +1,62 @@
+"""
+URLの存在確認: check_url_exists (1件ずつ) vs existing_urls (in.(...) 一括) vs ローカルキャッシュ
+
+    python benchmarks/bench_existing_urls.py [DBの件数] [確認するURL数] [1リクエストの往復秒数]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db_client_template import DBClient  # noqa: E402
+from fake_postgrest import FakePostgREST  # noqa: E402
+from known_url_cache import KnownUrlCache  # noqa: E402
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_check = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.02
+
+    urls = [f"https://example.com/jobs/{i}" for i in range(n_rows)]
+    # 確認対象の半分は既存、半分は新着
+    targets = urls[:n_check // 2] + [f"https://example.com/new/{i}" for i in range(n_check - n_check // 2)]
+
+    with FakePostgREST(latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        server.seed("jobs", ({"site_name": "Infra", "title": "t", "url": u} for u in urls))
+
+        db = DBClient(url=server.url, key=server.key)
+        t0 = time.perf_counter()
+        single = {u for u in targets if db.check_url_exists(u)}
+        single_sec = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        bulk = db.existing_urls(targets)
+        bulk_sec = time.perf_counter() - t0
+
+        cache = KnownUrlCache(os.path.join(tmp, "known_urls.sqlite"))
+        cached_db = DBClient(url=server.url, key=server.key, known_url_cache=cache)
+        t0 = time.perf_counter()
+        cache.sync_from_db(cached_db)
+        sync_sec = time.perf_counter() - t0
+
+        before = server.request_count
+        t0 = time.perf_counter()
+        cached = cached_db.existing_urls(targets)
+        cached_sec = time.perf_counter() - t0
+        cached_requests = server.request_count - before
+
+    assert single == bulk == cached
+    print(f"db rows: {n_rows}  checked: {n_check}  simulated latency: {latency * 1000:.0f} ms/request")
+    print(f"check_url_exists x{n_check}: {single_sec:7.3f} s")
+    print(f"existing_urls           : {bulk_sec:7.3f} s")
+    print(f"existing_urls + cache   : {cached_sec:7.3f} s  ({cached_requests} requests, "
+          f"hit rate {cache.hit_rate():.0%}, initial sync {sync_sec:.3f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+キーワードフィルタの比較: 従来の is_valid_job (置換2回 + キーワードごとの in) と job_filter
+
+ランダムに組み立てた求人で判定結果が一致することを確かめ、1件あたりの時間を表示する。
+
+    python benchmarks/bench_keyword_filter.py [件数]
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_filter import (  # noqa: E402
+    FILTER_TARGET_SOURCES, NG_KEYWORDS, REQUIRED_KEYWORDS, filter_jobs, format_counts, is_valid_job,
+)
+
+
+def legacy_is_valid_job(job):
+    if job.get('source') not in FILTER_TARGET_SOURCES:
+        return True
+    title = str(job.get('title', ''))
+    summary = str(job.get('summary', ''))
+    full_text = (title + summary).replace("\n", "").replace(" ", "")
+    if not any(req in full_text for req in REQUIRED_KEYWORDS):
+        return False
+    if any(ng in full_text for ng in NG_KEYWORDS):
+        return False
+    return True
+
+
+FILLER = ["仕事内容", "SNS運用や広告の分析をお任せします。", "リモート可", "\n", " ", "週2日〜OK", "エンジニア"]
+
+
+def make_jobs(n, seed=0):
+    rng = random.Random(seed)
+    words = REQUIRED_KEYWORDS + NG_KEYWORDS
+    jobs = []
+    for _ in range(n):
+        body = [rng.choice(FILLER) for _ in range(rng.randint(20, 80))]
+        for _ in range(rng.randint(0, 3)):
+            word = rng.choice(words)
+            # キーワードの途中に改行・空白が入るケースも混ぜる
+            if rng.random() < 0.2:
+                k = rng.randrange(1, len(word))
+                word = word[:k] + rng.choice(" \n") + word[k:]
+            body.insert(rng.randrange(len(body) + 1), word)
+        jobs.append({
+            "source": rng.choice(["Indeed", "Kyujinbox", "Infra"]),
+            "title": rng.choice(["未経験OK！Webマーケ", "データ入力", "倉庫内 軽作業", "初心者歓迎 エンジニア"]),
+            "summary": "".join(body),
+        })
+    return jobs
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    jobs = make_jobs(n)
+
+    mismatches = sum(legacy_is_valid_job(j) != is_valid_job(j) for j in jobs)
+    print(f"jobs: {n}  mismatches: {mismatches}")
+
+    for label, fn in (("legacy", legacy_is_valid_job), ("job_filter", is_valid_job)):
+        t0 = time.perf_counter()
+        kept = sum(1 for j in jobs if fn(j))
+        elapsed = time.perf_counter() - t0
+        print(f"{label:12s}: {elapsed:6.3f} s  {elapsed / n * 1e6:6.2f} µs/job  kept={kept}")
+
+    counts = Counter()
+    t0 = time.perf_counter()
+    kept = sum(1 for _ in filter_jobs(jobs, counts))
+    elapsed = time.perf_counter() - t0
+    print(f"{'filter_jobs':12s}: {elapsed:6.3f} s  {elapsed / n * 1e6:6.2f} µs/job  kept={kept}  (with audit counts)")
+    print(f"  {format_counts(counts)}")
+
+
+if __name__ == "__main__":
+    main()
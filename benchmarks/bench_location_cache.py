@@ -0,0 +1,74 @@
+"""
+勤務地→都道府県 判定キャッシュ (location_cache) の効果
+
+駅名から作った勤務地文字列をZipf分布で引き、次の4通りの時間とヒット率を比べる。
+    - キャッシュ無し（毎回判定する）
+    - cold: 空のディスクキャッシュから
+    - warm: 前回の結果が入ったディスクキャッシュ + 空のLRU（翌晩の実行に相当）
+    - warm (small LRU): LRU を小さくしてディスク層を多く使う場合
+結果がキャッシュ無しと一致すること、バージョンが変わると中身が捨てられることも確認する。
+
+    python benchmarks/bench_location_cache.py [異なる勤務地の数] [参照回数]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import merge_jobs  # noqa: E402
+from location_cache import LocationCache, format_stats  # noqa: E402
+
+SUFFIXES = ["駅徒歩5分", "駅 徒歩10分", "駅から徒歩3分", " (リモート可)", "駅直結", "周辺"]
+
+
+def make_locations(n_distinct, n_lookups, seed=0):
+    rng = random.Random(seed)
+    names = list(merge_jobs.STATION_PREF_MAP)
+    prefs = list(merge_jobs.PREF_CODE_MAP.values())
+    distinct = []
+    for i in range(n_distinct):
+        if i % 5 == 0:
+            distinct.append(f"{rng.choice(prefs)}{rng.choice(['中央区', '港区', '北区', '南区'])}")
+        else:
+            distinct.append(rng.choice(names) + rng.choice(SUFFIXES))
+    # よく出る勤務地ほど何度も出てくる (Zipf)
+    weights = [1 / (rank + 1) for rank in range(n_distinct)]
+    return rng.choices(distinct, weights=weights, k=n_lookups)
+
+
+def timed(label, fn, locations):
+    t0 = time.perf_counter()
+    result = [fn(loc) for loc in locations]
+    elapsed = time.perf_counter() - t0
+    print(f"{label:18s}: {elapsed:6.3f} s  {elapsed / len(locations) * 1e6:6.2f} µs/lookup", end="")
+    return result
+
+
+def main():
+    n_distinct = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    merge_jobs.load_station_data(use_cache=False)
+    locations = make_locations(n_distinct, n_lookups)
+    version = "bench"
+    path = os.path.join(tempfile.mkdtemp(), "locations.sqlite")
+
+    expected = timed("no cache", merge_jobs._encoded_locate, locations)
+    print()
+
+    for label, lru_size in (("cold", 8192), ("warm", 8192), ("warm (small LRU)", 256)):
+        cache = LocationCache(version, path, lru_size=lru_size)
+        got = timed(label, lambda loc: cache.get(loc, merge_jobs._encoded_locate), locations)
+        cache.close()
+        print(f"  {format_stats(cache.stats)}  {'ok' if got == expected else 'MISMATCH'}")
+
+    cache = LocationCache("other-station-data", path)
+    print(f"version change: invalidated={cache.invalidated} rows={len(cache)}")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+ソースをまたいだ「ほぼ重複」の検出: 全組み合わせの比較 (O(n²)) vs MinHash + LSH (job_dedup)
+
+合成の求人を作り、一定の割合を別ソース・別リンクの「同じ求人」（タイトルに【】を足す・会社名の
+書き方を変える・本文を少し削る/足す）として混ぜる。見分けにくい別求人として、同じ会社の
+職種違い・勤務地違いの定型文の求人も入れる。
+    - 全組み合わせ: 文字3-gram の Jaccard 係数を全部の組で計算（小さい件数だけ。大きい件数は推定）
+    - LSH: collapse_near_duplicates（NumPy あり / なし）
+時間と、正解の組に対する適合率・再現率を出す。
+
+    python benchmarks/bench_near_dup.py [件数,...] [全組み合わせを測る件数]
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+from itertools import combinations
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import job_dedup  # noqa: E402
+from job_dedup import (  # noqa: E402
+    collapse_near_duplicates, dedup_text, find_clusters, normalize_company, title_grams,
+)
+
+SEED = 7
+DUPLICATE_RATIO = 0.05
+TEMPLATE_RATIO = 0.2
+SOURCES = ["Infra", "ZeroOne", "Indeed", "Kyujinbox"]
+PREFECTURES = ["東京都", "大阪府", "神奈川県", "京都府", "愛知県", "福岡県"]
+ROLES = ["Webエンジニア", "データ分析", "マーケティング", "営業", "デザイナー", "編集ライター", "企画", "人事"]
+WORDS = [
+    "未経験", "歓迎", "学生", "成長", "チーム", "開発", "提案", "顧客", "分析", "改善", "サービス", "運用",
+    "企画", "資料", "作成", "調査", "広告", "記事", "執筆", "採用", "面接", "設計", "実装", "テスト", "保守",
+    "リモート", "週2日", "土日", "時給", "交通費", "支給", "研修", "メンター", "裁量", "スタートアップ",
+    "新規事業", "営業", "電話", "メール", "SNS", "動画", "編集", "撮影", "データ", "Python", "React",
+]
+TEMPLATE = "{company}では{role}のインターンを募集しています。未経験でも研修があるので安心です。週2日から、リモート勤務も可能です。"
+
+
+def make_sentence(rng):
+    return "、".join(rng.choice(WORDS) for _ in range(rng.randint(4, 9))) + "。"
+
+
+def make_base(rng, i, n_companies):
+    company_no = rng.randrange(n_companies)
+    company = f"株式会社サンプル{company_no}"
+    role = rng.choice(ROLES)
+    if rng.random() < TEMPLATE_RATIO:
+        # 同じ会社の職種違い・勤務地違いは本文がほとんど同じ
+        summary = TEMPLATE.format(company=company, role=role)
+    else:
+        summary = "".join(make_sentence(rng) for _ in range(rng.randint(3, 8)))
+    return {
+        "id": f"{i:08x}",
+        "title": f"{role}インターン",
+        "company": company,
+        "summary": summary,
+        # 同じ会社の求人は同じソースから（別ソースの同じ求人は mutate で作るものだけにする）
+        "source": SOURCES[company_no % 2],
+        "prefecture": rng.choice(PREFECTURES),
+        "link": f"https://example.com/jobs/{i}",
+    }
+
+
+def mutate(rng, job, i):
+    """別ソースに載っている同じ求人"""
+    summary = job["summary"]
+    cut = rng.randrange(len(summary))
+    summary = summary[:cut] + summary[cut + rng.randint(0, len(summary) // 10):]
+    if rng.random() < 0.5:
+        summary += make_sentence(rng)
+    company = job["company"]
+    if rng.random() < 0.5:
+        company = company.replace("株式会社", "") + "株式会社"
+    return dict(
+        job,
+        id=f"dup{i:08x}",
+        title=rng.choice(["【未経験OK】", "", "《急募》"]) + job["title"],
+        company=company,
+        summary=summary,
+        source=rng.choice(SOURCES[2:]),
+        link=f"https://other.example.com/{i}",
+        image_url=f"https://example.com/img/{i}.png" if rng.random() < 0.5 else None,
+    )
+
+
+def make_jobs(n, seed=SEED):
+    """n 件の求人と、正解（同じ求人どうし）の id の組の集合"""
+    rng = random.Random(seed)
+    n_dup = int(n * DUPLICATE_RATIO)
+    jobs = [make_base(rng, i, max(10, n // 10)) for i in range(n - n_dup)]
+    groups = {}
+    for i in range(n_dup):
+        original = rng.choice(jobs[:n - n_dup])
+        dup = mutate(rng, original, i)
+        jobs.append(dup)
+        groups.setdefault(original["id"], [original["id"]]).append(dup["id"])
+    truth = {frozenset(pair) for ids in groups.values() for pair in combinations(ids, 2)}
+    rng.shuffle(jobs)
+    return jobs, truth
+
+
+def cluster_pairs(jobs, clusters):
+    pairs = set()
+    for members in clusters:
+        for a, b in combinations(members, 2):
+            pairs.add(frozenset((jobs[a]["id"], jobs[b]["id"])))
+    return pairs
+
+
+def close_pairs(pairs):
+    """組を推移的にまとめ直す（LSH 側と同じく、A≈B・B≈C なら A≈C）"""
+    parent = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            x = parent[x]
+        return x
+
+    for a, b in map(tuple, pairs):
+        parent[find(a)] = find(b)
+    groups = {}
+    for x in list(parent):
+        groups.setdefault(find(x), []).append(x)
+    return {frozenset(pair) for ids in groups.values() for pair in combinations(ids, 2)}
+
+
+def score(found, truth):
+    hits = len(found & truth)
+    precision = hits / len(found) if found else 1.0
+    recall = hits / len(truth) if truth else 1.0
+    return precision, recall
+
+
+def shingles(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def brute_force(jobs, threshold=job_dedup.SIMILARITY_THRESHOLD):
+    """
+    全ての組の Jaccard 係数を計算する（LSH と同じ条件: 会社名が同じ・別ソース・都道府県が同じ・タイトルが近い）
+    """
+    companies = [normalize_company(job.get("company")) for job in jobs]
+    sets = [shingles(dedup_text(job, company)) for job, company in zip(jobs, companies)]
+    titles = [title_grams(job["title"]) for job in jobs]
+    pairs = set()
+    for a, b in combinations(range(len(jobs)), 2):
+        if companies[a] != companies[b] or not job_dedup._same_job(jobs[a], jobs[b]):
+            continue
+        if job_dedup._jaccard(sets[a], sets[b]) >= threshold and \
+                job_dedup._jaccard(titles[a], titles[b]) >= job_dedup.TITLE_THRESHOLD:
+            pairs.add(frozenset((jobs[a]["id"], jobs[b]["id"])))
+    return pairs
+
+
+def main():
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10000, 50000, 100000]
+    brute_n = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    numpy = job_dedup.np
+    print(f"near-duplicates: {DUPLICATE_RATIO:.0%} of jobs  template (hard negative) jobs: {TEMPLATE_RATIO:.0%}  "
+          f"threshold {job_dedup.SIMILARITY_THRESHOLD}  bins {job_dedup.NUM_BINS}  "
+          f"bands {job_dedup.BANDS}x{job_dedup.ROWS}")
+
+    jobs, truth = make_jobs(brute_n)
+    t0 = time.perf_counter()
+    found = close_pairs(brute_force(jobs))
+    brute_sec = time.perf_counter() - t0
+    precision, recall = score(found, truth)
+    print(f"{'all pairs':22s} {brute_n:7d} jobs  {brute_sec:7.2f} s  precision {precision:.3f}  recall {recall:.3f}  "
+          f"({brute_n * (brute_n - 1) // 2:,} pairs)")
+
+    for n in sizes:
+        jobs, truth = make_jobs(n)
+        estimate = brute_sec * (n / brute_n) ** 2
+        print(f"-- {n:,} jobs  ({len(truth)} duplicate pairs, all pairs would take ~{estimate:,.0f} s)")
+        for label, np_module in (("lsh + numpy", numpy), ("lsh (pure python)", None)):
+            if label == "lsh + numpy" and numpy is None:
+                print(f"{label:22s} numpy is not installed")
+                continue
+            job_dedup.np = np_module
+            counts = Counter()
+            t0 = time.perf_counter()
+            clusters = find_clusters(jobs, counts)
+            elapsed = time.perf_counter() - t0
+            precision, recall = score(cluster_pairs(jobs, clusters), truth)
+            print(f"{label:22s} {n:7d} jobs  {elapsed:7.2f} s  precision {precision:.3f}  recall {recall:.3f}  "
+                  f"candidates {counts['candidates']:,}  compared {counts['compared']:,}  "
+                  f"clusters {counts['clusters']:,}")
+        job_dedup.np = numpy
+        t0 = time.perf_counter()
+        kept = collapse_near_duplicates([dict(job) for job in jobs])
+        print(f"{'collapse (numpy)' if numpy is not None else 'collapse':22s} {n:7d} jobs  "
+              f"{time.perf_counter() - t0:7.2f} s  kept {len(kept):,}  dropped {n - len(kept):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,534 @@
+"""
+求人パイプライン全体のベンチマーク（合成データ）
+
+station20251211free.csv の駅名・住所から勤務地を作った合成求人を 1k / 10k / 100k 件用意し、
+次の処理の所要時間・ピークRSS・スループットを測って JSON に書き出す（コミット間で比べられるように）。
+
+    load_station_data   cold（インデックスを作る）/ warm（mmap で開く）
+    detect_prefecture   キャッシュ無しで全件の勤務地を判定
+    is_valid_job        全件のキーワード判定
+    merge_jobs.main     cold（キャッシュ・前回の出力なし）/ warm（同じ入力で2回目）
+    sync_jobs.main      DBClient を in-memory のもどきに差し替え。full / incremental（1%を更新して2回目）
+
+計測は1つずつ別プロセスで行う（ピークRSS をその処理だけのものにするため）。
+駅インデックス・勤務地キャッシュ・出力はすべて一時ディレクトリに置くので、リポジトリの .cache は触らない。
+
+    python benchmarks/bench_pipeline.py [--sizes 1000,10000,100000] [--stages merge_jobs,sync_jobs] [--repeat 3]
+    python benchmarks/bench_pipeline.py --compare 前回.json 今回.json
+"""
+import argparse
+import contextlib
+import csv
+import functools
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STATION_CSV = os.path.join(ROOT, "station20251211free.csv")
+RESULTS_DIR = os.path.join(ROOT, ".cache", "bench")
+DEFAULT_SIZES = [1000, 10000, 100000]
+SEED = 0
+# sync_jobs の EXPIRE_DAYS より古い行の割合（prune で消える）
+EXPIRED_RATIO = 0.05
+# incremental の2回目で更新する行の割合
+TOUCHED_RATIO = 0.01
+# --compare でこれ以上遅くなったら印を付ける
+REGRESSION_RATIO = 1.2
+
+MERGE_SOURCES = ["Infra", "ZeroOne", "Indeed", "Kyujinbox"]
+SYNC_SOURCES = ["Infra", "ZeroOne", "Indeed"]
+
+ROLES = ["エンジニア", "Webデザイナー", "マーケティング", "SNS運用", "編集・ライター", "営業", "事業企画", "データ分析"]
+TITLE_TAGS = ["【未経験OK】", "【初心者歓迎】", "【週2日〜】", "【リモート可】", "", ""]
+NG_PHRASES = ["経験者のみ", "実務経験3年以上", "要経験"]
+WALK = ["駅徒歩5分", "駅 徒歩10分", "駅から徒歩3分", "駅直結", "駅周辺"]
+REMOTE = ["フルリモート", "リモート（全国）", "在宅勤務可", "N/A", ""]
+
+
+# --- 合成データ ---
+
+def load_places(csv_path=STATION_CSV):
+    """駅CSVから (駅名, 住所) を読む（営業中の駅だけ）"""
+    stations, addresses = [], []
+    with open(csv_path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("e_status") not in (None, "", "0"):
+                continue
+            stations.append(row["station_name"])
+            if row.get("address"):
+                addresses.append(row["address"])
+    return stations, addresses
+
+
+def make_location(rng, stations, addresses):
+    r = rng.random()
+    if r < 0.45:
+        return rng.choice(stations) + rng.choice(WALK)
+    if r < 0.70:
+        return rng.choice(addresses)
+    if r < 0.80:
+        return f"{rng.choice(stations)}駅・{rng.choice(stations)}駅"
+    if r < 0.90:
+        return rng.choice(addresses).split("市")[0] + rng.choice(["市内", "周辺", " (一部リモート)"])
+    return rng.choice(REMOTE)
+
+
+def make_text(rng):
+    """タイトルと本文。必須キーワード（未経験・初心者）や NG キーワードが一定の割合で入る"""
+    role = rng.choice(ROLES)
+    title = f"{rng.choice(TITLE_TAGS)}{role}インターン"
+    summary = f"{role}として、チームの一員として働いていただきます。" * rng.randint(1, 4)
+    if rng.random() < 0.35:
+        summary += "未経験 から 始められます。\n"
+    if rng.random() < 0.15:
+        summary += rng.choice(NG_PHRASES)
+    return title, summary
+
+
+def make_jobs(n, seed=SEED):
+    """スクレーパーの出力と同じ形の求人（link 付き）"""
+    rng = random.Random(seed)
+    stations, addresses = load_places()
+    jobs = []
+    for i in range(n):
+        title, summary = make_text(rng)
+        jobs.append({
+            "title": title,
+            "company": f"株式会社サンプル{rng.randint(1, max(10, n // 20))}",
+            "location": make_location(rng, stations, addresses),
+            "salary": f"時給{rng.choice([1100, 1200, 1500, 2000])}円",
+            "link": f"https://example.com/jobs/{i}",
+            "summary": summary,
+            "tags": rng.sample(["未経験OK", "リモート", "週2日", "土日可", "学生歓迎"], 2),
+        })
+    # ソースをまたいだ重複（同じリンク）を数%混ぜる
+    for i in range(0, n, 37):
+        jobs[i]["link"] = jobs[(i * 7) % n]["link"]
+    return jobs
+
+
+def make_db_rows(jobs, now, seed=SEED):
+    """jobs を sync_jobs が読む DB の行 (supabase_schema.sql の jobs) にする"""
+    rng = random.Random(seed + 1)
+    rows = []
+    for i, job in enumerate(jobs):
+        expired = rng.random() < EXPIRED_RATIO
+        age = timedelta(days=rng.randint(31, 60)) if expired else timedelta(minutes=rng.randint(60, 60 * 24 * 25))
+        ts = (now - age).isoformat()
+        rows.append({
+            "id": f"{i:08x}-0000-4000-8000-{i:012x}",
+            "site_name": SYNC_SOURCES[i % len(SYNC_SOURCES)],
+            "title": job["title"],
+            "company": job["company"],
+            "location": job["location"],
+            "salary": job["salary"],
+            "url": f"https://example.com/db/{i}",
+            "image_url": None,
+            "tags": job["tags"],
+            "summary": job["summary"],
+            "created_at": ts,
+            "updated_at": ts,
+        })
+    return rows
+
+
+def write_dataset(workdir, n):
+    """workdir に merge_jobs の入力（ソースごとの JSON）と sync_jobs の DB の中身を書く"""
+    jobs = make_jobs(n)
+    os.makedirs(os.path.join(workdir, "input"), exist_ok=True)
+    for k, source in enumerate(MERGE_SOURCES):
+        with open(os.path.join(workdir, "input", f"{source}.json"), "w", encoding="utf-8") as f:
+            json.dump(jobs[k::len(MERGE_SOURCES)], f, ensure_ascii=False)
+    rows = make_db_rows(jobs, datetime.now(timezone.utc))
+    with open(os.path.join(workdir, "db_rows.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False)
+
+
+def load_dataset(workdir):
+    jobs = []
+    for source in MERGE_SOURCES:
+        with open(os.path.join(workdir, "input", f"{source}.json"), encoding="utf-8") as f:
+            jobs += [dict(job, source=source) for job in json.load(f)]
+    return jobs
+
+
+# --- DBClient のもどき (sync_jobs 用) ---
+
+class FakeDBClient:
+    """sync_jobs.main が使う prune_old_jobs / count_jobs / iter_jobs だけを持つ、メモリ上の jobs テーブル"""
+
+    def __init__(self, rows):
+        self.rows = {row["id"]: row for row in rows}
+
+    def prune_old_jobs(self, days=30, archive=None, dry_run=False, **kwargs):
+        from db_client_template import PruneResult
+        threshold = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        expired = [row for row in self.rows.values() if row["updated_at"] < threshold]
+        if dry_run:
+            return PruneResult(len(expired), 0, 0, 0, [])
+        if archive is not None:
+            archive.write(expired)
+        for row in expired:
+            del self.rows[row["id"]]
+        return PruneResult(len(expired), len(expired), len(expired) if archive else 0, 1, [r["url"] for r in expired])
+
+    def count_jobs(self, since=None, after=None, before=None, sources=None):
+        return sum(
+            1 for row in self.rows.values()
+            if (not sources or row["site_name"] in sources) and (not since or row["updated_at"] >= since)
+            and (not after or row["updated_at"] > after) and (not before or row["updated_at"] < before)
+        )
+
+    def iter_jobs(self, columns=None, since=None, sources=None, **kwargs):
+        rows = [
+            row for row in self.rows.values()
+            if (not sources or row["site_name"] in sources) and (not since or row["updated_at"] >= since)
+        ]
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        for row in rows:
+            yield {c: row.get(c) for c in columns} if columns else dict(row)
+
+
+class FakeAsyncDBClient:
+    """sync_jobs.precheck が AsyncDBClient として使う count_jobs を、FakeDBClient に渡す"""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def count_jobs(self, **kwargs):
+        return self.db.count_jobs(**kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+# --- 計測（子プロセス側） ---
+
+def _max_rss_mb(who):
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux は KB、macOS はバイト
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+
+
+class _Timed:
+    """計測区間の所要時間と、区間に入る直前までのピークRSS（データの準備に使った分）"""
+
+    def __enter__(self):
+        self.baseline = _max_rss_mb(resource.RUSAGE_SELF)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.t0
+        return False
+
+
+def _isolate(workdir, index_dir):
+    """キャッシュと出力の置き場を workdir に向ける（merge_jobs のワーカーにも引き継ぐため fork で起動させる）"""
+    import enrichment_store
+    import location_cache
+    import merge_jobs
+    import raw_store
+    import station_index
+    import static_export
+
+    os.chdir(workdir)
+    station_index.INDEX_DIR = index_dir
+    enrichment_store.open_existing = functools.partial(
+        enrichment_store.open_existing, os.path.join(workdir, ".cache", "enrichment.sqlite")
+    )
+    merge_jobs.LocationCache = functools.partial(
+        location_cache.LocationCache, path=os.path.join(workdir, ".cache", "locations.sqlite")
+    )
+    merge_jobs.write_exports = functools.partial(
+        static_export.write_exports, out_dir=os.path.join(workdir, "public", "data", "jobs")
+    )
+    merge_jobs.RawStore = functools.partial(raw_store.RawStore, root=os.path.join(workdir, ".cache", "raw"))
+    merge_jobs.PROJECT_PATHS = {s: os.path.join(workdir, "input", f"{s}.json") for s in MERGE_SOURCES}
+    if sys.platform != "win32":
+        multiprocessing.set_start_method("fork", force=True)
+
+
+def _stage_load_station_data(workdir, args):
+    import merge_jobs
+    with _Timed() as timed:
+        merge_jobs.load_station_data(STATION_CSV, verbose=False, use_cache=False)
+    return timed, len(merge_jobs.STATION_PREF_MAP)
+
+
+def _stage_detect_prefecture(workdir, args):
+    import merge_jobs
+    merge_jobs.load_station_data(STATION_CSV, verbose=False, use_cache=False)
+    locations = [job["location"] for job in load_dataset(workdir)]
+    detect = merge_jobs.detect_prefecture
+    with _Timed() as timed:
+        for location in locations:
+            detect(location)
+    return timed, len(locations)
+
+
+def _stage_is_valid_job(workdir, args):
+    from job_filter import is_valid_job
+    jobs = load_dataset(workdir)
+    with _Timed() as timed:
+        for job in jobs:
+            is_valid_job(job, job["source"])
+    return timed, len(jobs)
+
+
+def _stage_merge_jobs(workdir, args):
+    import merge_jobs
+    # 駅CSVは cwd からの相対パスで探すので置いておく
+    if not os.path.exists("station20251211free.csv"):
+        os.symlink(STATION_CSV, "station20251211free.csv")
+    os.makedirs(os.path.join("src", "data"), exist_ok=True)
+    # warm は同じ入力での2回目なので、何もせずに終わらないように --force で必ずマージさせる
+    argv = ["--force"] + (["--workers", str(args.merge_workers)] if args.merge_workers else [])
+    with _Timed() as timed:
+        merge_jobs.main(argv)
+    return timed, args.size
+
+
+def _stage_sync_jobs(workdir, args):
+    import sync_jobs
+    with open(os.path.join(workdir, "db_rows.json"), encoding="utf-8") as f:
+        rows = json.load(f)
+    if args.warm:
+        # 前回の同期の後に一部の求人が更新された状態にする
+        now = datetime.now(timezone.utc).isoformat()
+        for row in rows[::int(1 / TOUCHED_RATIO)]:
+            row["title"] += "（更新）"
+            row["updated_at"] = now
+    db = FakeDBClient(rows)
+    sync_jobs.DBClient = lambda: db
+    sync_jobs.AsyncDBClient = lambda: FakeAsyncDBClient(db)
+    sync_jobs.LocationCache = functools.partial(
+        sync_jobs.LocationCache, path=os.path.join(workdir, ".cache", "locations.sqlite")
+    )
+    sync_jobs.write_exports = functools.partial(
+        sync_jobs.write_exports, out_dir=os.path.join(workdir, "public", "data", "jobs")
+    )
+    sync_jobs.STATION_CSV_FILE = STATION_CSV
+    os.makedirs(os.path.join("src", "data"), exist_ok=True)
+    with _Timed() as timed:
+        sync_jobs.main([])
+    return timed, len(rows)
+
+
+STAGES = {
+    "load_station_data": _stage_load_station_data,
+    "detect_prefecture": _stage_detect_prefecture,
+    "is_valid_job": _stage_is_valid_job,
+    "merge_jobs": _stage_merge_jobs,
+    "sync_jobs": _stage_sync_jobs,
+}
+def run_stage(args):
+    """子プロセス: 1つの処理を測り、最後の行に結果の JSON を出す"""
+    _isolate(args.workdir, args.index_dir)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        timed, items = STAGES[args.stage](args.workdir, args)
+    print(json.dumps({
+        "seconds": timed.seconds,
+        "items": items,
+        "peak_rss_mb": round(_max_rss_mb(resource.RUSAGE_SELF), 1),
+        "baseline_rss_mb": round(timed.baseline, 1),
+        "children_peak_rss_mb": round(_max_rss_mb(resource.RUSAGE_CHILDREN), 1),
+    }))
+
+
+# --- 親プロセス側 ---
+
+def measure(stage, size, workdir, index_dir, args, warm=False):
+    command = [sys.executable, os.path.abspath(__file__), "--run-stage", stage,
+               "--workdir", workdir, "--index-dir", index_dir, "--size", str(size or 0)]
+    if warm:
+        command.append("--warm")
+    if args.merge_workers:
+        command += ["--merge-workers", str(args.merge_workers)]
+    proc = subprocess.run(command, capture_output=True, text=True, cwd=workdir)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{stage} ({size}) failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize(stage, variant, size, runs):
+    seconds = statistics.median(r["seconds"] for r in runs)
+    items = runs[0]["items"]
+    return {
+        "stage": stage,
+        "variant": variant,
+        "size": size,
+        "items": items,
+        "wall_sec": round(seconds, 4),
+        "wall_sec_runs": [round(r["seconds"], 4) for r in runs],
+        "items_per_sec": round(items / seconds, 1) if seconds else None,
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+        "baseline_rss_mb": max(r["baseline_rss_mb"] for r in runs),
+        "children_peak_rss_mb": max(r["children_peak_rss_mb"] for r in runs),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_row(row):
+    size = "-" if row["size"] is None else f"{row['size']:,}"
+    label = f"{row['stage']} ({row['variant']})" if row["variant"] else row["stage"]
+    print(
+        f"{label:32s} {size:>8s}  {row['wall_sec']:8.3f} s  {row['items_per_sec'] or 0:12,.0f} /s  "
+        f"peak RSS {row['peak_rss_mb']:7.1f} MB (before {row['baseline_rss_mb']:.1f})"
+    )
+
+
+def run_suite(args):
+    stages = args.stages.split(",") if args.stages else list(STAGES)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    tmp = tempfile.mkdtemp(prefix="bench-pipeline-")
+    index_dir = os.path.join(tmp, "station-index")
+    results = []
+
+    def record(stage, variant, size, workdir, warm=False):
+        runs = [measure(stage, size, workdir, index_dir, args, warm) for _ in range(args.repeat)]
+        row = summarize(stage, variant, size, runs)
+        print_row(row)
+        results.append(row)
+
+    try:
+        print(f"sizes: {sizes}  repeat: {args.repeat}  workdir: {tmp}")
+        if "load_station_data" in stages:
+            workdir = os.path.join(tmp, "station")
+            os.makedirs(workdir)
+            # cold はインデックスを CSV から作る、warm は作ったものを mmap で開くだけ
+            runs = []
+            for _ in range(args.repeat):
+                shutil.rmtree(index_dir, ignore_errors=True)
+                runs.append(measure("load_station_data", None, workdir, index_dir, args))
+            cold = summarize("load_station_data", "cold", None, runs)
+            print_row(cold)
+            results.append(cold)
+            record("load_station_data", "warm", None, workdir)
+
+        for size in sizes:
+            workdir = os.path.join(tmp, str(size))
+            t0 = time.perf_counter()
+            # 親プロセスを小さく保つ（fork した子の ru_maxrss は親の RSS から始まるため）
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--generate", str(size), "--workdir", workdir],
+                           check=True)
+            print(f"-- {size:,} jobs (generated in {time.perf_counter() - t0:.1f} s)")
+            for stage in ("detect_prefecture", "is_valid_job"):
+                if stage in stages:
+                    record(stage, None, size, workdir)
+            for stage, cold, warm in (("merge_jobs", "cold", "warm"), ("sync_jobs", "full", "incremental")):
+                if stage not in stages:
+                    continue
+                # cold は毎回まっさらな状態から（キャッシュ・前回の出力・同期の状態を消す）
+                runs = []
+                for _ in range(args.repeat):
+                    for name in (".cache", "src", "public"):
+                        shutil.rmtree(os.path.join(workdir, name), ignore_errors=True)
+                    runs.append(measure(stage, size, workdir, index_dir, args))
+                row = summarize(stage, cold, size, runs)
+                print_row(row)
+                results.append(row)
+                record(stage, warm, size, workdir, warm=True)
+    finally:
+        if not args.keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"pipeline-{report['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📝 {out}")
+
+
+def compare(old_path, new_path):
+    """2つの結果を並べ、wall time が REGRESSION_RATIO 倍以上になった処理に印を付ける"""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    before = {(r["stage"], r["variant"], r["size"]): r for r in old["results"]}
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    regressions = 0
+    for row in new["results"]:
+        prev = before.get((row["stage"], row["variant"], row["size"]))
+        if prev is None or not prev["wall_sec"]:
+            continue
+        ratio = row["wall_sec"] / prev["wall_sec"]
+        mark = "⚠️" if ratio >= REGRESSION_RATIO else "  "
+        regressions += ratio >= REGRESSION_RATIO
+        size = "-" if row["size"] is None else f"{row['size']:,}"
+        label = f"{row['stage']} ({row['variant']})" if row["variant"] else row["stage"]
+        print(
+            f"{mark} {label:32s} {size:>8s}  {prev['wall_sec']:8.3f} -> {row['wall_sec']:8.3f} s  x{ratio:5.2f}  "
+            f"RSS {prev['peak_rss_mb']:.0f} -> {row['peak_rss_mb']:.0f} MB"
+        )
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the jobs pipeline on synthetic data")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--stages", help=f"comma separated subset of: {', '.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per measurement (the median is reported)")
+    parser.add_argument("--merge-workers", type=int, help="merge_jobs --workers (default: MERGE_WORKERS)")
+    parser.add_argument("--out", help=f"result JSON (default: {os.path.relpath(RESULTS_DIR, ROOT)}/pipeline-<commit>-<time>.json)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated datasets and outputs")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    # 子プロセス用
+    parser.add_argument("--generate", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--run-stage", dest="stage", choices=list(STAGES), help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--index-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--warm", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(compare(*args.compare))
+    if args.generate:
+        write_dataset(args.workdir, args.generate)
+        return
+    if args.stage:
+        run_stage(args)
+        return
+    run_suite(args)
+
+
+if __name__ == "__main__":
+    main()
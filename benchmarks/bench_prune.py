@@ -0,0 +1,111 @@
+"""
+期限切れ求人の削除: 従来の一括 DELETE vs prune_old_jobs (id で区切ったバッチ削除)
+
+ローカルの PostgREST もどき (fake_postgrest.py) に大きな合成テーブルを入れ、それぞれ
+所要時間・リクエスト数・レスポンスの合計サイズ・1リクエストがロックを握っていた最長時間を比べる。
+アーカイブ (gzip JSONL) 付き・dry run も測り、アーカイブが削除件数と一致することを確認する。
+もどきにはインデックスが無いので、ロック時間にはどちらも全行の走査が含まれる
+（実DBでは (updated_at, id) インデックスにより、バッチ削除は batch_size 行分の仕事で済む）。
+
+    python benchmarks/bench_prune.py [行数] [期限切れの割合] [1リクエストの往復秒数]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db_client_template import DBClient  # noqa: E402
+from fake_postgrest import FakePostgREST  # noqa: E402
+from job_archive import GzipJsonlArchive, iter_archive  # noqa: E402
+
+DAYS = 30
+
+
+def make_rows(n, expired_ratio):
+    now = datetime.now(timezone.utc)
+    n_expired = int(n * expired_ratio)
+    rows = []
+    for i in range(n):
+        age = timedelta(days=DAYS + 5 + i % 20) if i < n_expired else timedelta(days=i % DAYS - 1)
+        ts = (now - age).isoformat()
+        rows.append({
+            "id": f"{i:08x}-0000-4000-8000-{i:012x}",
+            "site_name": "Infra" if i % 2 else "ZeroOne",
+            "title": f"未経験OK インターン #{i}",
+            "company": f"株式会社サンプル{i % 97}",
+            "location": "五反田駅徒歩5分",
+            "url": f"https://example.com/jobs/{i}",
+            "summary": "未経験から始められるインターンです。" * 10,
+            "created_at": ts,
+            "updated_at": ts,
+        })
+    return rows, n_expired
+
+
+def legacy_delete(db, days):
+    """従来の delete_old_jobs: 1回の DELETE で、削除した全行が返ってくる"""
+    threshold = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    response = db.supabase.table(db.table_name).delete().lt("updated_at", threshold).execute()
+    return len(response.data or [])
+
+
+def measure(label, rows, latency, fn):
+    with FakePostgREST(latency=latency) as server:
+        server.seed("jobs", rows)
+        db = DBClient(url=server.url, key=server.key)
+        t0 = time.perf_counter()
+        result, detail = fn(db)
+        elapsed = time.perf_counter() - t0
+        remaining = len(server.tables["jobs"].rows)
+        print(
+            f"{label:22s}: {elapsed:6.2f} s  {server.request_count:5d} requests  "
+            f"responses {server.bytes_sent / 1024:8,.0f} KB  max lock {server.max_lock_sec * 1000:6.1f} ms  "
+            f"remaining {remaining}  {detail}"
+        )
+        return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    expired_ratio = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+    rows, n_expired = make_rows(n, expired_ratio)
+    print(f"rows: {n}  expired: {n_expired}  simulated latency: {latency * 1000:.0f} ms/request")
+
+    def legacy(db):
+        deleted = legacy_delete(db, DAYS)
+        return deleted, f"deleted {deleted}"
+
+    def dry_run(db):
+        result = db.prune_old_jobs(DAYS, dry_run=True)
+        return result, f"matched {result.matched}"
+
+    def batched(db):
+        result = db.prune_old_jobs(DAYS)
+        return result, f"deleted {result.deleted} in {result.batches} batches"
+
+    archive_path = os.path.join(tempfile.mkdtemp(), "jobs.jsonl.gz")
+
+    def archived(db):
+        with GzipJsonlArchive(archive_path) as archive:
+            result = db.prune_old_jobs(DAYS, archive=archive)
+        size = os.path.getsize(archive_path)
+        return result, f"deleted {result.deleted}, archived {result.archived} ({size / 1024:,.0f} KB gz)"
+
+    measure("legacy single DELETE", rows, latency, legacy)
+    measure("prune dry run", rows, latency, dry_run)
+    measure("prune batched", rows, latency, batched)
+    result = measure("prune + gzip archive", rows, latency, archived)
+
+    archived_ids = {row["id"] for row in iter_archive(archive_path)}
+    ok = len(archived_ids) == result.deleted == n_expired
+    print(f"archive check: {len(archived_ids)} rows in archive  {'ok' if ok else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
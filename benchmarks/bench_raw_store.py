@@ -0,0 +1,122 @@
+"""
+生出力の読み込み: output/*.json を glob + getctime vs raw_store（圧縮 JSONL セグメント + マニフェスト）
+
+4ソース × 実行回数分の整形済み JSON（スクレーパーの出力と同じ indent=2）を一時ディレクトリに作り、次を比べる。
+    - 最新ファイルの特定: 従来の get_latest_file（全ファイルを stat）vs マニフェストの参照（新しいファイルの確認込み）
+    - ディスク使用量: 元ファイル vs セグメント（全部取り込んだ場合と、保持ポリシー適用後）
+    - 最新の実行分の読み出し: iter_json_items vs RawStore.iter_rows（中身が一致することも確認する）
+
+    python benchmarks/bench_raw_store.py [実行回数] [1回の件数]
+"""
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import raw_store  # noqa: E402
+from bench_near_dup import make_jobs  # noqa: E402
+from json_stream import iter_json_items  # noqa: E402
+from raw_store import RawStore  # noqa: E402
+
+SOURCES = ["Infra", "ZeroOne", "Indeed", "Kyujinbox"]
+REPEAT = 20
+
+
+def get_latest_file(pattern):
+    """merge_jobs にあった従来の探し方"""
+    files = glob.glob(pattern) + glob.glob(os.path.splitext(pattern)[0] + ".jsonl")
+    if not files:
+        return None
+    return max(files, key=os.path.getctime)
+
+
+def make_outputs(workdir, runs, rows):
+    patterns = {}
+    for s, source in enumerate(SOURCES):
+        directory = os.path.join(workdir, source, "output")
+        os.makedirs(directory)
+        for run in range(runs):
+            jobs, _ = make_jobs(rows, seed=s * 1000 + run)
+            path = os.path.join(directory, f"jobs_{run:04d}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(jobs, f, ensure_ascii=False, indent=2)
+            # 作成日時の順に並ぶように（ctime は変えられないので、ファイルの作成を少しずつずらす）
+            time.sleep(0.001)
+        patterns[source] = os.path.join(directory, "*.json")
+    return patterns
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def timed(fn, repeat=REPEAT):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    workdir = tempfile.mkdtemp(prefix="bench_raw_store_")
+    try:
+        patterns = make_outputs(workdir, runs, rows)
+        originals = sum(dir_size(os.path.join(workdir, s)) for s in SOURCES)
+        print(f"sources: {len(SOURCES)}  runs: {runs}  rows/run: {rows}  codec: {raw_store.default_codec()}  "
+              f"originals {originals / (1 << 20):,.1f} MB")
+
+        # 全部取り込む（圧縮率を見るため）と、保持ポリシーどおりに取り込む
+        all_root = os.path.join(workdir, "raw_all")
+        t0 = time.perf_counter()
+        RawStore(all_root, keep=runs, days=36500).ingest_all(patterns)
+        print(f"ingest all runs       : {time.perf_counter() - t0:7.2f} s  "
+              f"segments {dir_size(all_root) / (1 << 20):7.2f} MB ({dir_size(all_root) / originals:.1%})")
+        root = os.path.join(workdir, "raw")
+        t0 = time.perf_counter()
+        RawStore(root, keep=raw_store.KEEP_RUNS, days=0).ingest_all(patterns)
+        print(f"ingest with retention : {time.perf_counter() - t0:7.2f} s  "
+              f"segments {dir_size(root) / (1 << 20):7.2f} MB (keep {raw_store.KEEP_RUNS} runs per source)")
+
+        latest, old_sec = timed(lambda: {s: get_latest_file(p) for s, p in patterns.items()})
+        print(f"find latest (glob+ctime)  : {old_sec * 1000:8.3f} ms")
+
+        def lookup():
+            store = RawStore(root, keep=raw_store.KEEP_RUNS, days=0)
+            store.ingest_all(patterns)
+            return {s: store.latest(s) for s in SOURCES}
+
+        entries, new_sec = timed(lookup)
+        same_file = all(entries[s]["origin"] == latest[s] for s in SOURCES)
+        print(f"find latest (manifest)    : {new_sec * 1000:8.3f} ms  (incl. checking for new files)  "
+              f"{'ok' if same_file else 'MISMATCH'}")
+
+        def manifest_only():
+            store = RawStore(root)
+            return {s: store.latest(s) for s in SOURCES}
+
+        _, only_sec = timed(manifest_only)
+        print(f"find latest (manifest only): {only_sec * 1000:7.3f} ms  (no new files to look for)")
+
+        store = RawStore(root)
+        for s in SOURCES[:1]:
+            expected, old_sec = timed(lambda: list(iter_json_items(latest[s])), repeat=3)
+            got, new_sec = timed(lambda: list(store.iter_rows(entries[s])), repeat=3)
+            print(f"read latest {s:10s}: json {old_sec * 1000:7.1f} ms  segment {new_sec * 1000:7.1f} ms  "
+                  f"{'ok' if got == expected else 'MISMATCH'}")
+        problems = [e["path"] for e in store.segments if store.verify(e)]
+        print(f"verify: {len(store.segments) - len(problems)} of {len(store.segments)} segments ok")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+おすすめ文生成ステージのベンチマーク (モッククライアント使用・ネットワーク不要)
+
+1. 逐次 (同時実行数1, キャッシュ無し) ... 変更前の update_job_details 相当
+2. 並列 + キャッシュ (コールド)
+3. 並列 + キャッシュ (ウォーム) ... 同じ入力なら API を呼ばない
+
+    python benchmarks/bench_recommendations.py [件数] [同時実行数] [応答秒数]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_openai import MockAsyncOpenAI  # noqa: E402
+from recommendation import RecommendationCache, RecommendationGenerator  # noqa: E402
+
+
+def make_jobs(n):
+    # 1割は同じ求人が別URLで載っているケース (同一入力)
+    return [
+        {"title": f"未経験OK Webエンジニア #{i % max(1, n - n // 10)}",
+         "summary": f"求人 {i % max(1, n - n // 10)} の概要です。" * 20}
+        for i in range(n)
+    ]
+
+
+async def run(generator, jobs):
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(generator.generate(j["title"], j["summary"]) for j in jobs))
+    return time.perf_counter() - t0, sum(1 for r in results if r)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    jobs = make_jobs(n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = []
+        client = MockAsyncOpenAI(latency=latency, rate_limit_every=25)
+        gen = RecommendationGenerator(client, None, concurrency=1, backoff=0.05)
+        rows.append(("sequential, no cache", asyncio.run(run(gen, jobs)), client, gen))
+
+        cache_path = os.path.join(tmp, "recommendations.sqlite")
+        for label in ("concurrent + cache (cold)", "concurrent + cache (warm)"):
+            client = MockAsyncOpenAI(latency=latency, rate_limit_every=25)
+            gen = RecommendationGenerator(client, RecommendationCache(cache_path), concurrency=concurrency, backoff=0.05)
+            rows.append((label, asyncio.run(run(gen, jobs)), client, gen))
+
+    print(f"jobs: {n}  mock latency: {latency}s  concurrency: {concurrency}")
+    for label, (elapsed, ok), client, gen in rows:
+        print(
+            f"{label:28s}: {elapsed:6.2f} s  ok={ok:4d}  api_calls={client.calls:4d}  "
+            f"429s={client.rate_limited:3d}  max_in_flight={client.max_in_flight:2d}  stats={gen.stats}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+全文検索: 全件の部分文字列検索（フロントエンドが今やっていること） vs search.bin（search_index）
+
+合成の求人を SearchIndexBuilder に入れて書き出し、次を測る。
+    - 作成時間・ファイルサイズ（gzip 後も）
+    - 検索語・カテゴリ・都道府県の組み合わせごとの検索時間（NumPy あり / なし）
+結果が全件検索の答えをすべて含むこと（取りこぼしが無いこと）、絞り込みだけの検索は完全に一致することも確認する。
+2-gram の AND で余分に拾った件数は false positives として出す。
+
+    python benchmarks/bench_search_index.py [件数,...]
+"""
+import gzip
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import search_index  # noqa: E402
+from bench_near_dup import make_jobs  # noqa: E402
+from search_index import SUMMARY_CHARS, TEXT_FIELDS, SearchIndex, SearchIndexBuilder, normalize  # noqa: E402
+from static_export import export_id, job_category  # noqa: E402
+
+REPEAT = 20
+QUERIES = [
+    ("データ分析", None, None),
+    ("python", None, None),
+    ("リモート 未経験", None, None),
+    ("スタートアップ", "営業", "東京都"),
+    ("", "エンジニア", "大阪府"),
+    ("", "マーケティング", None),
+    ("サンプル12", None, None),
+    ("存在しない語句", None, None),
+]
+
+
+def scan(jobs, categories, query, category, prefecture):
+    """フロントエンドと同じく全件をなめる（空白区切りの語をすべて含むもの）"""
+    words = normalize(query).split()
+    docs = []
+    for doc, job in enumerate(jobs):
+        if category and categories[doc] != category:
+            continue
+        if prefecture and job.get("prefecture") != prefecture:
+            continue
+        text = normalize(" ".join(job.get(field) or "" for field in TEXT_FIELDS)
+                         + " " + (job.get("summary") or "")[:SUMMARY_CHARS])
+        if all(word in text for word in words):
+            docs.append(doc)
+    return docs
+
+
+def timed(fn, repeat=REPEAT):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10000, 50000, 100000]
+    numpy = search_index.np
+    for n in sizes:
+        jobs, _ = make_jobs(n)
+        categories = [job_category(job.get("title")) for job in jobs]
+
+        t0 = time.perf_counter()
+        builder = SearchIndexBuilder()
+        for job, category in zip(jobs, categories):
+            builder.add(job, export_id(job), category)
+        data = builder.to_bytes()
+        built = time.perf_counter() - t0
+        index = SearchIndex(data)
+        print(f"-- {n:,} jobs  build {built:6.2f} s  {len(index.terms):,} terms  "
+              f"{len(data) / (1 << 20):6.2f} MB (gzip {len(gzip.compress(data)) / (1 << 20):.2f} MB)")
+
+        for query, category, prefecture in QUERIES:
+            expected, scan_sec = timed(lambda: scan(jobs, categories, query, category, prefecture), repeat=1)
+            label = " / ".join(x for x in (query, category, prefecture) if x)
+            line = f"   {label:24s} {len(expected):6d} hits  scan {scan_sec * 1000:8.2f} ms"
+            checks = []
+            for name, np_module in (("numpy", numpy), ("python", None)):
+                if name == "numpy" and numpy is None:
+                    continue
+                search_index.np = np_module
+                got, sec = timed(lambda: index.search(query, category=category, prefecture=prefecture))
+                line += f"  {name} {sec * 1000:7.3f} ms"
+                missing = set(expected) - set(got)
+                exact = not query or len(query.replace(" ", "")) <= 2
+                checks.append(not missing and (got == expected or not exact))
+            search_index.np = numpy
+            extra = len(got) - len(expected)
+            print(f"{line}  {'ok' if all(checks) else 'MISMATCH'}" + (f"  (+{extra} false positives)" if extra else ""))
+
+
+if __name__ == "__main__":
+    main()
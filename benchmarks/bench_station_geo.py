@@ -0,0 +1,87 @@
+"""
+半径検索（"渋谷から3km以内の求人"）: 全件の距離計算 vs GeoGrid（NumPy あり / なし）
+
+駅の座標に少しずらしを加えた合成の求人を作り、主要駅を中心にした半径検索の時間を比べる。
+結果（求人と距離）が全件計算と一致することも確認する。
+
+    python benchmarks/bench_station_geo.py [求人数] [半径km]
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import station_geo  # noqa: E402
+from merge_jobs import PREF_CODE_MAP  # noqa: E402
+from station_geo import JobGeoIndex, haversine_km  # noqa: E402
+from station_index import load_station_index  # noqa: E402
+
+CENTERS = ["渋谷", "新宿", "東京", "梅田", "名古屋", "博多", "札幌", "横浜", "京都", "仙台"]
+
+
+def make_jobs(geo, n, seed=0):
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(n):
+        sid = rng.randrange(len(geo))
+        jobs.append({
+            "id": str(i),
+            "lat": geo.lat[sid] + rng.uniform(-0.005, 0.005),
+            "lon": geo.lon[sid] + rng.uniform(-0.005, 0.005),
+        })
+    return jobs
+
+
+def brute_force(jobs, lat, lon, km):
+    hits = [(job, haversine_km(lat, lon, job["lat"], job["lon"])) for job in jobs]
+    hits = [hit for hit in hits if hit[1] <= km]
+    hits.sort(key=lambda hit: hit[1])
+    return hits
+
+
+def timed(label, fn, queries):
+    t0 = time.perf_counter()
+    results = [fn(lat, lon) for lat, lon in queries]
+    elapsed = time.perf_counter() - t0
+    hits = sum(len(r) for r in results)
+    print(f"{label:20s}: {elapsed / len(queries) * 1000:8.3f} ms/query  ({hits} hits)", end="")
+    return results
+
+
+def same(a, b):
+    return len(a) == len(b) and all(
+        x[0]["id"] == y[0]["id"] and abs(x[1] - y[1]) < 1e-9 for ra, rb in zip(a, b) for x, y in zip(ra, rb)
+    )
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    km = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    geo = load_station_index(os.path.join(ROOT, "station20251211free.csv"), PREF_CODE_MAP).geo
+    jobs = make_jobs(geo, n)
+    centers = [geo.find_station(name) for name in CENTERS]
+    queries = [(geo.lat[sid], geo.lon[sid]) for sid in centers if sid is not None]
+    print(f"jobs: {n}  radius: {km:g} km  queries: {len(queries)}")
+
+    expected = timed("brute force", lambda lat, lon: brute_force(jobs, lat, lon, km), queries)
+    print()
+
+    numpy = station_geo.np
+    for label, np_module in (("grid + numpy", numpy), ("grid (pure python)", None)):
+        if label == "grid + numpy" and numpy is None:
+            print(f"{label:20s}: numpy is not installed")
+            continue
+        station_geo.np = np_module
+        t0 = time.perf_counter()
+        index = JobGeoIndex(jobs)
+        built = time.perf_counter() - t0
+        got = timed(label, lambda lat, lon: index.within(lat, lon, km), queries)
+        print(f"  build {built * 1000:6.1f} ms  {'ok' if same(got, expected) else 'MISMATCH'}")
+    station_geo.np = numpy
+
+
+if __name__ == "__main__":
+    main()
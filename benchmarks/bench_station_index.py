@@ -0,0 +1,61 @@
+"""
+駅データのコールドスタート比較: CSV パース + オートマトン構築 vs コンパイル済みインデックスの mmap
+
+各方式を別プロセスで起動し、(import を除いた) 読み込み時間と RSS の増分を測る。
+    python benchmarks/bench_station_index.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(ROOT, "station20251211free.csv")
+
+CHILD = r"""
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+from merge_jobs import PREF_CODE_MAP
+from station_index import _read_csv, load_station_index
+from station_matcher import StationMatcher
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+
+mode = {mode!r}
+rss0 = rss_mb()
+t0 = time.perf_counter()
+if mode == "csv":
+    pref_map, _ = _read_csv({csv!r}, PREF_CODE_MAP)
+    matcher = StationMatcher.build(pref_map, PREF_CODE_MAP)
+else:
+    matcher = load_station_index({csv!r}, PREF_CODE_MAP).matcher
+# 1件引いておく (遅延ロード分も計測に含める)
+matcher.match_mask("五反田駅徒歩5分")
+load_sec = time.perf_counter() - t0
+print(json.dumps({{"load_ms": load_sec * 1000, "rss_delta_mb": rss_mb() - rss0}}))
+"""
+
+
+def run(mode):
+    code = CHILD.format(root=ROOT, mode=mode, csv=CSV_PATH)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(repeat=5):
+    sys.path.insert(0, ROOT)
+    from merge_jobs import PREF_CODE_MAP
+    from station_index import build_index
+
+    build_index(CSV_PATH, PREF_CODE_MAP)
+    for mode in ("csv", "index"):
+        runs = [run(mode) for _ in range(repeat)]
+        best = min(r["load_ms"] for r in runs)
+        rss = min(r["rss_delta_mb"] for r in runs)
+        print(f"{mode:6s}: load {best:8.2f} ms   RSS +{rss:6.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
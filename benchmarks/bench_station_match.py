@@ -0,0 +1,100 @@
+"""
+detect_prefecture の駅名逆引き: 旧来の全駅ループ vs Aho-Corasick オートマトン
+
+使い方 (R-website 直下で実行):
+    python benchmarks/bench_station_match.py [件数]
+"""
+import csv
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import merge_jobs  # noqa: E402
+from station_matcher import StationMatcher, pick_prefecture  # noqa: E402
+
+SUFFIXES = ["駅徒歩5分", "駅 徒歩10分", "駅直結", "エリア", " / リモート可", ""]
+
+
+def legacy_detect(location, station_pref_map):
+    """変更前の detect_prefecture (駅名部分) をそのまま再現したもの"""
+    possible_prefs = set()
+    for station, prefs in station_pref_map.items():
+        if len(station) < 2:
+            continue
+        if station in location:
+            possible_prefs.update(prefs)
+    if not possible_prefs:
+        return None
+    for p in merge_jobs.PREF_PRIORITY:
+        if p in possible_prefs:
+            return p
+    # 元は list(possible_prefs)[0] (集合の順序次第で不定) なので、比較用に JIS コード順に揃える
+    code_of = {name: code for code, name in merge_jobs.PREF_CODE_MAP.items()}
+    return min(possible_prefs, key=code_of.get)
+
+
+def sample_locations(csv_path, n, seed=0):
+    """CSVの駅名・住所から求人の勤務地っぽい文字列を作る（都道府県名は含めない）"""
+    rng = random.Random(seed)
+    names, addresses = [], []
+    with open(csv_path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            names.append(row["station_name"])
+            addr = row["address"]
+            if not any(p in addr for p in merge_jobs.PREF_CODE_MAP.values()):
+                addresses.append(addr)
+    locations = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.6:
+            locations.append(rng.choice(names) + rng.choice(SUFFIXES))
+        elif r < 0.9:
+            locations.append(rng.choice(addresses))
+        else:
+            locations.append("フルリモート")
+    return locations
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    csv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "station20251211free.csv")
+
+    merge_jobs.load_station_data(csv_path)
+    # 旧ループ用に素の dict に展開しておく
+    station_map = dict(merge_jobs.STATION_PREF_MAP.items())
+
+    t0 = time.perf_counter()
+    matcher = StationMatcher.build(station_map, merge_jobs.PREF_CODE_MAP)
+    build_sec = time.perf_counter() - t0
+
+    locations = sample_locations(csv_path, n)
+
+    t0 = time.perf_counter()
+    legacy = [legacy_detect(loc, station_map) for loc in locations]
+    legacy_sec = time.perf_counter() - t0
+
+    results = {}
+    for longest_only in (False, True):
+        t0 = time.perf_counter()
+        out = [
+            pick_prefecture(matcher.match_mask(loc, longest_only), merge_jobs.PREF_CODE_MAP, merge_jobs.PREF_PRIORITY)
+            for loc in locations
+        ]
+        results[longest_only] = (time.perf_counter() - t0, out)
+
+    print(f"stations: {len(matcher)}  locations: {n}  automaton build: {build_sec * 1000:.1f} ms")
+    print(f"legacy loop      : {legacy_sec:8.3f} s  ({legacy_sec / n * 1e6:9.1f} us/loc)")
+    for longest_only, (sec, out) in results.items():
+        same = sum(a == b for a, b in zip(legacy, out))
+        label = "automaton longest" if longest_only else "automaton all    "
+        print(
+            f"{label}: {sec:8.3f} s  ({sec / n * 1e6:9.1f} us/loc)  "
+            f"x{legacy_sec / sec:6.1f}  same as legacy: {same}/{n}"
+        )
+
+
+if __name__ == "__main__":
+    main()
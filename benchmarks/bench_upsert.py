@@ -0,0 +1,78 @@
+"""
+DBClient.upsert_job (1件ずつ) vs DBClient.upsert_jobs (バッチ) のスループット比較
+
+ローカルの PostgREST もどき (fake_postgrest.py) に対して実行するのでネットワーク不要。
+    python benchmarks/bench_upsert.py [件数] [1リクエストの往復秒数]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db_client_template import DBClient  # noqa: E402
+from fake_postgrest import FakePostgREST  # noqa: E402
+
+
+def make_jobs(n, prefix):
+    return [
+        {
+            "site_name": "Infra",
+            "title": f"未経験OK エンジニアインターン #{i}",
+            "company": f"株式会社サンプル{i % 97}",
+            "location": "五反田駅徒歩5分",
+            "salary": "時給1,200円",
+            "url": f"https://example.com/{prefix}/jobs/{i}",
+            "summary": "未経験から始められるインターンです。" * 5,
+        }
+        for i in range(n)
+    ]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+    with FakePostgREST(latency=latency) as server:
+        db = DBClient(url=server.url, key=server.key, skip_unchanged=True)
+
+        jobs = make_jobs(n, "single")
+        start_requests = server.request_count
+        t0 = time.perf_counter()
+        for job in jobs:
+            db.upsert_job(job)
+        single_sec = time.perf_counter() - t0
+        single_requests = server.request_count - start_requests
+
+        # 半分は既存行の更新、1行は not null 違反で失敗させる
+        jobs = make_jobs(n // 2, "single") + make_jobs(n - n // 2, "batch")
+        jobs[len(jobs) // 3]["title"] = None
+        start_requests = server.request_count
+        t0 = time.perf_counter()
+        results = db.upsert_jobs(jobs)
+        batch_sec = time.perf_counter() - t0
+        batch_requests = server.request_count - start_requests
+
+        # 翌日の実行に相当: 同じ内容をもう一度送る（content_hash が同じ行は書き込まれない）
+        start_requests = server.request_count
+        t0 = time.perf_counter()
+        repeat = db.upsert_jobs(jobs)
+        repeat_sec = time.perf_counter() - t0
+        repeat_requests = server.request_count - start_requests
+
+    counts, repeat_counts = {}, {}
+    for r in results:
+        counts[r.status] = counts.get(r.status, 0) + 1
+    for r in repeat:
+        repeat_counts[r.status] = repeat_counts.get(r.status, 0) + 1
+
+    print(f"rows: {n}  simulated latency: {latency * 1000:.0f} ms/request")
+    print(f"upsert_job  : {single_sec:7.2f} s  {n / single_sec:9.0f} rows/s  ({single_requests} requests)")
+    print(f"upsert_jobs : {batch_sec:7.2f} s  {n / batch_sec:9.0f} rows/s  ({batch_requests} requests)  {counts}")
+    print(f"repeat run  : {repeat_sec:7.2f} s  {n / repeat_sec:9.0f} rows/s  ({repeat_requests} requests)  {repeat_counts}")
+
+
+if __name__ == "__main__":
+    main()
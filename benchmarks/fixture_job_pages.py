@@ -0,0 +1,198 @@
+"""
+オフライン検証用の求人詳細ページサーバー
+
+/jobs/<n> に JSON-LD (JobPosting) と og:image を含む固定のHTMLを返す。
+ETag を付けて返し、If-None-Match が一致すれば 304 を返す。
+ホスト (Hostヘッダ) ごとに同時接続数の最大値とリクエスト開始間隔の最小値を記録するので、
+update_job_details の並列プールが礼儀正しく振る舞っているか確認できる。
+
+    python benchmarks/fixture_job_pages.py --port 8765 --latency 0.2 --fail-every 5
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def job_page(n, with_json_ld=True, client_rendered=False):
+    posting = {
+        "@context": "https://schema.org",
+        "@type": "JobPosting",
+        "title": f"未経験歓迎 Webエンジニアインターン #{n}",
+        "description": (
+            f"<p>求人 {n} の仕事内容です。<br>未経験からReact/TypeScriptを学べます。</p>"
+            "<ul><li>時給1,500円</li><li>フルリモート可</li></ul>"
+        ),
+        "hiringOrganization": {"@type": "Organization", "name": f"株式会社フィクスチャ{n % 13}"},
+    }
+    json_ld = (
+        f'<script type="application/ld+json">{json.dumps(posting, ensure_ascii=False)}</script>'
+        if with_json_ld else ""
+    )
+    # client_rendered: 本文をJSで差し込むページ（生のHTMLには summary が無い）
+    description = f'<div class="job-description">求人 {n} の説明（フォールバック用）</div>'
+    if client_rendered:
+        description = (
+            '<div id="app"></div>'
+            f"<script>document.getElementById('app').innerHTML = {json.dumps(description, ensure_ascii=False)};</script>"
+        )
+    return f"""<!DOCTYPE html>
+<html lang="ja"><head>
+<meta charset="utf-8">
+<title>求人 {n}</title>
+<meta property="og:image" content="https://img.example.com/jobs/{n}.png">
+{json_ld}
+</head><body>
+<header>{"<nav>menu</nav>" * 20}</header>
+<main>{description}</main>
+</body></html>"""
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.last_start = None
+        self.min_gap = None
+
+
+class FixtureJobServer:
+    """
+    with FixtureJobServer(latency=0.2, fail_every=5) as server:
+        urls = [server.job_url(i) for i in range(100)]
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_every=0, no_json_ld_every=0,
+                 client_rendered_every=0):
+        self.latency = latency
+        # fail_every 件ごとに最初の1回だけ 503 を返す（再試行の確認用）
+        self.fail_every = fail_every
+        # no_json_ld_every 件ごとに JSON-LD を含めない（フォールバックの確認用）
+        self.no_json_ld_every = no_json_ld_every
+        # client_rendered_every 件ごとに JSON-LD 無し + 本文をJSで描画するページにする（ブラウザ必須）
+        self.client_rendered_every = client_rendered_every
+        self.stats = {}
+        self.lock = threading.Lock()
+        self._failed_once = set()
+        self.not_modified = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+
+    def job_url(self, n, host="127.0.0.1"):
+        return f"http://{host}:{self.port}/jobs/{n}"
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def summary(self):
+        return {
+            host: {
+                "requests": st.requests,
+                "max_in_flight": st.max_in_flight,
+                "min_gap_sec": round(st.min_gap, 3) if st.min_gap is not None else None,
+            }
+            for host, st in self.stats.items()
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                host = self.headers.get("Host", "")
+                now = time.monotonic()
+                with server.lock:
+                    st = server.stats.setdefault(host, HostStats())
+                    st.requests += 1
+                    st.in_flight += 1
+                    st.max_in_flight = max(st.max_in_flight, st.in_flight)
+                    if st.last_start is not None:
+                        gap = now - st.last_start
+                        st.min_gap = gap if st.min_gap is None else min(st.min_gap, gap)
+                    st.last_start = now
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    self._respond()
+                finally:
+                    with server.lock:
+                        st.in_flight -= 1
+
+            def _respond(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if len(parts) != 2 or parts[0] != "jobs" or not parts[1].isdigit():
+                    return self._send(404, b"not found")
+                n = int(parts[1])
+                with server.lock:
+                    should_fail = server.fail_every and n % server.fail_every == 0 and self.path not in server._failed_once
+                    if should_fail:
+                        server._failed_once.add(self.path)
+                if should_fail:
+                    return self._send(503, b"busy")
+                client_rendered = bool(server.client_rendered_every and n % server.client_rendered_every == 0)
+                with_json_ld = not client_rendered and not (server.no_json_ld_every and n % server.no_json_ld_every == 0)
+                body = job_page(n, with_json_ld, client_rendered).encode("utf-8")
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with server.lock:
+                        server.not_modified += 1
+                    return self._send(304, b"", etag)
+                self._send(200, body, etag)
+
+            def _send(self, status, body, etag=None):
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canned job detail pages for offline scraping tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--no-json-ld-every", type=int, default=0)
+    parser.add_argument("--client-rendered-every", type=int, default=0)
+    args = parser.parse_args()
+    server = FixtureJobServer(args.host, args.port, args.latency, args.fail_every, args.no_json_ld_every,
+                              args.client_rendered_every)
+    print(f"🧪 Fixture job pages on {server.job_url(1, args.host)}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.summary(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
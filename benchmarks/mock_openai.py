@@ -0,0 +1,51 @@
+"""
+OpenAI の AsyncOpenAI 互換モック (client.chat.completions.create だけ)
+
+一定の応答時間と、N回に1回のレート制限エラー (429 + Retry-After) を再現する。
+RecommendationGenerator に渡してネットワーク無しでベンチマーク・動作確認を行う。
+"""
+import asyncio
+from types import SimpleNamespace
+
+
+class RateLimitError(Exception):
+    """openai.RateLimitError と同じ名前・属性 (status_code, response.headers) を持つ"""
+
+    def __init__(self, retry_after):
+        super().__init__("Rate limit reached (mock)")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    async def create(self, model, messages, **kwargs):
+        owner = self._owner
+        owner.calls += 1
+        call_no = owner.calls
+        owner.in_flight += 1
+        owner.max_in_flight = max(owner.max_in_flight, owner.in_flight)
+        try:
+            await asyncio.sleep(owner.latency)
+            if owner.rate_limit_every and call_no % owner.rate_limit_every == 0:
+                owner.rate_limited += 1
+                raise RateLimitError(owner.retry_after)
+            title = messages[-1]["content"].splitlines()[0]
+            message = SimpleNamespace(content=f"【モック】{title} なら今すぐ応募！")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        finally:
+            owner.in_flight -= 1
+
+
+class MockAsyncOpenAI:
+    def __init__(self, latency=0.5, rate_limit_every=0, retry_after=0.2):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.calls = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=_Completions(self))
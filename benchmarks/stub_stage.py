@@ -0,0 +1,34 @@
+"""
+run_scrapers.py の動作確認用スタブ
+
+本物のスクレーパーの代わりに、ログを少し出して一定時間待ち、指定の終了コードで終わる。
+
+    python benchmarks/stub_stage.py --name indeed --sleep 2 --exit-code 0
+    python benchmarks/stub_stage.py --name zeroone --hang   # タイムアウトの確認用（終わらない）
+"""
+import argparse
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in for a scraper / sync stage")
+    parser.add_argument("--name", default="stub")
+    parser.add_argument("--sleep", type=float, default=1.0)
+    parser.add_argument("--exit-code", type=int, default=0)
+    parser.add_argument("--hang", action="store_true")
+    args = parser.parse_args()
+
+    print(f"[{args.name}] starting", flush=True)
+    steps = 4
+    for i in range(steps):
+        time.sleep(args.sleep / steps)
+        print(f"[{args.name}] page {i + 1}/{steps}", flush=True)
+    while args.hang:
+        time.sleep(60)
+    print(f"[{args.name}] done (exit {args.exit_code})", flush=True)
+    return args.exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
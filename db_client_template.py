@@ -1,27 +1,134 @@
+import asyncio
+import heapq
 import os
 from datetime import datetime, timedelta, timezone
-from supabase import create_client, Client
+from typing import NamedTuple
+import metrics
+from fingerprint import job_fingerprint
+
+# upsert_jobs の1リクエストあたりの行数
+UPSERT_BATCH_SIZE = 500
+# in.(...) フィルタ1回あたりのURL数（クエリ文字列が長くなりすぎないように）
+URL_QUERY_CHUNK = 100
+# iter_jobs の1ページあたりの行数（PostgRESTの max-rows 既定値 1000 以下にする）
+FETCH_PAGE_SIZE = 1000
+# 内容が変わっていない求人は書き込まないが、updated_at がこの日数より古くなったものだけは
+# touch して「掲載中」を保つ（delete_old_jobs の30日で消えないように）
+REFRESH_AFTER_DAYS = 7
+
+# 内容が前回と同じで書き込みを省いたことを表す UpsertResult.response
+UNCHANGED = "unchanged"
+# prune_old_jobs で1回に削除する行数（id の in.(...) がクエリ文字列に収まり、ロックも短く済む大きさ）
+PRUNE_BATCH_SIZE = 200
+
+# AsyncDBClient: 同時に送るリクエスト数（= コネクションプールの上限）
+ASYNC_CONCURRENCY = 8
+# 1リクエストのタイムアウト秒数と、失敗時の再試行回数・バックオフの基準秒数 (base * 2^attempt)
+REQUEST_TIMEOUT = 30.0
+REQUEST_RETRIES = 3
+RETRY_BACKOFF = 0.5
+# 再試行するステータス（それ以外の 4xx はリクエスト自体の誤りなのでそのまま失敗にする）
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+# iter_jobs で並行に読み進める id (uuid) の範囲の数
+FETCH_PARTITIONS = 4
+
+
+class PruneResult(NamedTuple):
+    """prune_old_jobs の結果"""
+    matched: int      # 期限切れだった行数（dry_run ではこれだけ数える）
+    deleted: int
+    archived: int
+    batches: int
+    urls: list        # 削除した求人のURL
+
+
+def _archive_batch(archive, rows) -> bool:
+    """削除する前にバッチを退避する。失敗したら False（そのバッチは消さずに prune を止める）"""
+    try:
+        archive.write(rows)
+    except Exception as e:
+        print(f"⚠️ Archive Error: {e} ({len(rows)} rows were not deleted)")
+        return False
+    return True
+
+
+class UpsertResult(NamedTuple):
+    """
+    upsert_jobs の1行分の結果。upsert_job と同じく (is_new, response) としてアンパックできる
+    """
+    is_new: bool
+    response: object
+
+    @property
+    def status(self) -> str:
+        """'new' / 'updated' / 'unchanged' / 'failed'"""
+        if self.response is UNCHANGED:
+            return "unchanged"
+        if self.response is None or isinstance(self.response, str):
+            return "failed"
+        return "new" if self.is_new else "updated"
+
 
 class DBClient:
-    def __init__(self):
-        # 環境変数からキーを取得
-        url: str = os.environ.get("SUPABASE_URL")
-        key: str = os.environ.get("SUPABASE_KEY")
+    def __init__(self, url: str = None, key: str = None, known_url_cache=None, skip_unchanged: bool = False):
+        """
+        :param known_url_cache: known_url_cache.KnownUrlCache を渡すと、URLの存在確認をまずローカルで行う
+        :param skip_unchanged: 行に content_hash（内容のフィンガープリント）を保存し、前回と同じなら書き込まない
+                               （jobs.content_hash カラムが必要。supabase_schema.sql 参照。カラムの無い既存の
+                               テーブルでは upsert が失敗するので、既定では無効。カラムを足してから True にする）
+        """
+        # 引数が無ければ環境変数からキーを取得
+        url = url or os.environ.get("SUPABASE_URL")
+        key = key or os.environ.get("SUPABASE_KEY")
         
         if not url or not key:
             raise ValueError("❌ Error: SUPABASE_URL and SUPABASE_KEY must be set in environment variables.")
-            
-        self.supabase: Client = create_client(url, key)
+
+        # supabase は import だけで 0.5 秒ほどかかるので、キーの確認が済んでから読み込む
+        from supabase import create_client
+        self.supabase = create_client(url, key)
         self.table_name = "jobs"
+        self.known_urls = known_url_cache
+        self.skip_unchanged = skip_unchanged
+
+    def _with_hash(self, job_data: dict) -> dict:
+        if not self.skip_unchanged:
+            return job_data
+        return dict(job_data, content_hash=job_fingerprint(job_data))
+
+    @staticmethod
+    def _is_unchanged(job_data: dict, stored) -> bool:
+        """stored: existing_fingerprints の値 (content_hash, updated_at)"""
+        return stored is not None and stored[0] is not None and stored[0] == job_data.get("content_hash")
 
+    @staticmethod
+    def _needs_refresh(stored) -> bool:
+        updated_at = stored[1]
+        if not updated_at:
+            return True
+        threshold = datetime.now(timezone.utc) - timedelta(days=REFRESH_AFTER_DAYS)
+        return datetime.fromisoformat(updated_at.replace("Z", "+00:00")) < threshold
+
+    @metrics.timed("db.upsert_job")
     def upsert_job(self, job_data: dict):
         """
         求人データをDBに保存または更新する
         :param job_data: 共通フォーマットの辞書
         :return: (is_new, original_response)
                  is_new: Trueなら新規作成、Falseなら更新またはスキップ
+                 内容が前回と同じで書き込みを省いた場合は (False, UNCHANGED)
         """
+        job_data = self._with_hash(job_data)
         try:
+            url = job_data.get("url")
+            # ローカルキャッシュに無いURLは新規とみなして問い合わせを省く
+            if self.skip_unchanged and (self.known_urls is None or self.known_urls.contains_many([url])):
+                stored = self.existing_fingerprints([url]).get(url)
+                if self._is_unchanged(job_data, stored):
+                    if self._needs_refresh(stored):
+                        self.touch_urls([url])
+                    return False, UNCHANGED
+
             # Upsert実行 (on_conflict='url')
             # ignore_duplicates=False にすると更新になる
             response = self.supabase.table(self.table_name).upsert(
@@ -34,6 +141,8 @@ class DBClient:
                 # insert/update成功
                 # created_at と updated_at が同じなら新規、違えば更新と判定できるが、
                 # 厳密にはDB側のトリガー次第。ここでは単に成功を返す。
+                if self.known_urls is not None:
+                    self.known_urls.add_many([job_data.get("url")])
                 return True, response.data
             else:
                 return False, None
@@ -42,35 +151,868 @@ class DBClient:
             print(f"⚠️ DB Error: {e}")
             return False, str(e)
 
+    @metrics.timed("db.upsert_jobs")
+    def upsert_jobs(self, jobs, batch_size: int = UPSERT_BATCH_SIZE):
+        """
+        複数の求人をまとめてUpsertする（on_conflict='url' の複数行リクエスト）
+        :param jobs: 共通フォーマットの辞書のイテラブル
+        :param batch_size: 1リクエストあたりの最大行数
+        :return: 入力順の UpsertResult のリスト（各要素は (is_new, response) としても使える）
+                 バッチが失敗した場合は半分に割って再送し、原因の行だけを failed にする
+                 skip_unchanged なら、content_hash が DB と同じ行は送らず unchanged にする
+        """
+        results = []
+        # PostgRESTの複数行リクエストは全行のキーが揃っている必要があるので、キーの組み合わせごとにまとめる
+        pending = {}
+        seen = set()
+
+        def flush(batch):
+            self._flush_upsert_batch(batch, results)
+            batch.clear()
+
+        for job in jobs:
+            index = len(results)
+            results.append(None)
+            url = job.get("url")
+            if not url:
+                results[index] = UpsertResult(False, "url is required")
+                continue
+
+            # 同じURLが1リクエストに2回入るとON CONFLICTでエラーになり、別のキーの組み合わせのバッチに入ると
+            # 後から送った方が勝ってしまうので、溜まっているバッチを全部送ってから続ける（後の行が後に書き込まれる）
+            if url in seen:
+                for batch in pending.values():
+                    if batch:
+                        flush(batch)
+                seen.clear()
+            seen.add(url)
+
+            job = self._with_hash(job)
+            batch = pending.setdefault(tuple(sorted(job)), [])
+            batch.append((index, job))
+            if len(batch) >= batch_size:
+                flush(batch)
+
+        for batch in pending.values():
+            if batch:
+                flush(batch)
+        for result in results:
+            metrics.incr(f"db.upsert.{result.status}")
+        return results
+
+    def _flush_upsert_batch(self, batch, results):
+        urls = [job["url"] for _, job in batch]
+        try:
+            if self.skip_unchanged:
+                stored = self.existing_fingerprints(urls)
+                existing = set(stored)
+            else:
+                existing = self.existing_urls(urls)
+        except Exception as e:
+            print(f"⚠️ DB Error: {e}")
+            for index, _ in batch:
+                results[index] = UpsertResult(False, str(e))
+            return
+
+        if self.skip_unchanged:
+            changed, stale = [], []
+            for index, job in batch:
+                if self._is_unchanged(job, stored.get(job["url"])):
+                    results[index] = UpsertResult(False, UNCHANGED)
+                    if self._needs_refresh(stored[job["url"]]):
+                        stale.append(job["url"])
+                else:
+                    changed.append((index, job))
+            if stale:
+                self.touch_urls(stale)
+            batch = changed
+        if batch:
+            self._send_upsert_batch(batch, existing, results)
+
+    def _send_upsert_batch(self, batch, existing, results):
+        try:
+            response = self.supabase.table(self.table_name).upsert(
+                [job for _, job in batch], on_conflict="url"
+            ).execute()
+        except Exception as e:
+            if len(batch) == 1:
+                print(f"⚠️ DB Error: {e}")
+                results[batch[0][0]] = UpsertResult(False, str(e))
+                return
+            # 失敗した行を特定するため二分して再送
+            mid = len(batch) // 2
+            self._send_upsert_batch(batch[:mid], existing, results)
+            self._send_upsert_batch(batch[mid:], existing, results)
+            return
+
+        rows_by_url = {row.get("url"): row for row in (response.data or [])}
+        if self.known_urls is not None:
+            self.known_urls.add_many(rows_by_url)
+        for index, job in batch:
+            row = rows_by_url.get(job["url"])
+            if row is None:
+                results[index] = UpsertResult(False, None)
+            else:
+                results[index] = UpsertResult(job["url"] not in existing, [row])
+
+    @metrics.timed("db.existing_urls")
+    def existing_urls(self, urls) -> set:
+        """
+        urls のうちDBに既にあるものを set で返す
+        ローカルキャッシュがあればそれを先に引き、残りだけを in.(...) でまとめて問い合わせる
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        found = set()
+        if self.known_urls is not None:
+            found = self.known_urls.contains_many(urls)
+            urls = [u for u in urls if u not in found]
+
+        fetched = set()
+        for i in range(0, len(urls), URL_QUERY_CHUNK):
+            chunk = urls[i:i + URL_QUERY_CHUNK]
+            response = self.supabase.table(self.table_name).select("url").in_("url", chunk).execute()
+            fetched.update(row["url"] for row in (response.data or []))
+
+        if fetched and self.known_urls is not None:
+            self.known_urls.add_many(fetched)
+        return found | fetched
+
+    @metrics.timed("db.existing_fingerprints")
+    def existing_fingerprints(self, urls) -> dict:
+        """
+        urls のうちDBに既にあるものについて {url: (content_hash, updated_at)} を返す
+        content_hash は行ごとに違うので、known_url_cache では代用できず常にDBへ問い合わせる
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        found = {}
+        for i in range(0, len(urls), URL_QUERY_CHUNK):
+            chunk = urls[i:i + URL_QUERY_CHUNK]
+            response = self.supabase.table(self.table_name).select(
+                "url,content_hash,updated_at"
+            ).in_("url", chunk).execute()
+            for row in response.data or []:
+                found[row["url"]] = (row.get("content_hash"), row.get("updated_at"))
+
+        if found and self.known_urls is not None:
+            self.known_urls.add_many(found)
+        return found
+
     def check_url_exists(self, url: str) -> bool:
         """URLが既に存在するかチェックする（早期終了判定用）"""
         try:
-            response = self.supabase.table(self.table_name).select("id").eq("url", url).execute()
-            return len(response.data) > 0
+            return url in self.existing_urls([url])
         except:
             return False
 
+    @metrics.timed("db.touch_urls")
+    def touch_urls(self, urls) -> int:
+        """
+        既知の求人の updated_at だけを現在時刻に更新する
+        詳細ページを取り直さずにスキップした求人も「まだ掲載中」として扱われ、delete_old_jobs で消えない
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        now = datetime.now(timezone.utc).isoformat()
+        touched = 0
+        try:
+            for i in range(0, len(urls), URL_QUERY_CHUNK):
+                chunk = urls[i:i + URL_QUERY_CHUNK]
+                response = self.supabase.table(self.table_name).update(
+                    {"updated_at": now}, count="exact", returning="minimal"
+                ).in_("url", chunk).execute()
+                touched += response.count or 0
+        except Exception as e:
+            print(f"⚠️ DB Update Error: {e}")
+        return touched
+
+    def iter_urls(self, page_size: int = 1000):
+        """jobs.url を全件、url 昇順で少しずつ取得する（キャッシュ同期用）"""
+        last = None
+        while True:
+            query = self.supabase.table(self.table_name).select("url").order("url")
+            if last is not None:
+                query = query.gt("url", last)
+            with metrics.span("db.fetch_page"):
+                rows = query.limit(page_size).execute().data or []
+            for row in rows:
+                yield row["url"]
+            if len(rows) < page_size:
+                return
+            last = rows[-1]["url"]
+
     def delete_old_jobs(self, days: int = 30):
         """
         最終更新から指定日数以上経過した求人を削除する
         """
+        return self.prune_old_jobs(days).deleted
+
+    def expire_old_jobs(self, days: int = 30):
+        """
+        delete_old_jobs と同じ削除を行い、削除した求人のURLリストを返す
+        （エクスポート側でトゥームストーンとして反映するため）
+        """
+        return self.prune_old_jobs(days).urls
+
+    @metrics.timed("db.prune_old_jobs")
+    def prune_old_jobs(self, days: int = 30, batch_size: int = PRUNE_BATCH_SIZE, archive=None,
+                       dry_run: bool = False) -> PruneResult:
+        """
+        updated_at が days 日より古い求人を、id で batch_size 件ずつ区切って削除する
+        1回で全件を消すと、テーブルが大きいほどロックが長くなり、削除した全行がレスポンスで返ってくるので、
+        対象の id を少しずつ取り出して in.(...) で消す。取り出した後に更新された行は消さないので、
+        削除のレスポンスで実際に消えた行の id と url を受け取り、それだけを結果に含める
+        :param archive: write(rows) を持つオブジェクト（job_archive.py）。バッチを消す前に、取り出した行の全カラムを渡す。
+                        書き込みが失敗したらそのバッチは消さずに止める
+        :param dry_run: 対象を数えるだけで、削除もアーカイブもしない（count=exact の1リクエスト）
+        エラーが起きた場合はそこまでの結果を返す
+        """
+        threshold = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        if dry_run:
+            # 件数だけなら1リクエストで済む (count=exact)
+            try:
+                response = self.supabase.table(self.table_name).select("id", count="exact").lt(
+                    "updated_at", threshold
+                ).limit(1).execute()
+                return PruneResult(response.count or 0, 0, 0, 0, [])
+            except Exception as e:
+                print(f"⚠️ DB Error: {e}")
+                return PruneResult(0, 0, 0, 0, [])
+
+        # アーカイブする場合は、消す前に書き込めるよう全カラムを取り出す
+        columns = "*" if archive is not None else "id"
+        matched = deleted = archived = batches = 0
+        urls = []
+        last_id = None
         try:
-            threshold = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-            response = self.supabase.table(self.table_name).delete().lt("updated_at", threshold).execute()
-            return len(response.data) if response.data else 0
+            while True:
+                query = self.supabase.table(self.table_name).select(columns).lt("updated_at", threshold)
+                if last_id is not None:
+                    query = query.gt("id", last_id)
+                rows = query.order("id").limit(batch_size).execute().data or []
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+                matched += len(rows)
+                batches += 1
+                if archive is not None:
+                    if not _archive_batch(archive, rows):
+                        break
+                    archived += len(rows)
+                # 取り出した後に更新された行は消さない（updated_at の条件を付け直す）
+                removed = self.supabase.table(self.table_name).delete().in_(
+                    "id", [row["id"] for row in rows]
+                ).lt("updated_at", threshold).select("id,url").execute().data or []
+                deleted += len(removed)
+                urls.extend(row["url"] for row in removed)
+                if len(rows) < batch_size:
+                    break
         except Exception as e:
             print(f"⚠️ DB Delete Error: {e}")
-            return 0
+
+        if urls and self.known_urls is not None:
+            self.known_urls.remove_many(urls)
+        metrics.incr("db.pruned", deleted)
+        metrics.incr("db.archived", archived)
+        return PruneResult(matched, deleted, archived, batches, urls)
+
+    def iter_jobs(self, columns=None, page_size: int = FETCH_PAGE_SIZE, since: str = None, sources=None):
+        """
+        求人を新着順（created_at降順, id降順）で1ページずつ取得して1件ずつ返すジェネレーター
+        (created_at, id) のキーセットページングなので件数が増えても遅くならず、メモリも1ページ分で済む
+        :param columns: 取得するカラムのリスト（None なら全カラム）。ページングのため created_at, id は必ず含める
+        :param page_size: 1リクエストあたりの行数
+        :param since: ISO8601文字列。指定すると updated_at がこれ以降（境界を含む）の行だけを返す
+        :param sources: site_name の候補リスト。サーバー側で in.(...) フィルタする
+        エラーは呼び出し側に投げる（途中までの結果で書き出してしまわないように）
+        """
+        if columns:
+            columns = list(dict.fromkeys(list(columns) + ["created_at", "id"]))
+            select = ",".join(columns)
+        else:
+            select = "*"
+
+        cursor = None
+        while True:
+            query = self.supabase.table(self.table_name).select(select)
+            if sources:
+                query = query.in_("site_name", list(sources))
+            if since:
+                query = query.gte("updated_at", since)
+            if cursor:
+                created_at, job_id = cursor
+                query = query.or_(
+                    f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{job_id})'
+                )
+            with metrics.span("db.fetch_page"):
+                response = query.order("created_at", desc=True).order("id", desc=True).limit(page_size).execute()
+            rows = response.data or []
+            metrics.incr("db.rows_fetched", len(rows))
+            yield from rows
+            if len(rows) < page_size:
+                return
+            cursor = (rows[-1]["created_at"], rows[-1]["id"])
+
+    def count_jobs(self, since: str = None, after: str = None, before: str = None, sources=None) -> int:
+        """
+        行数だけを数える（count=exact の1リクエスト。行は返さない）
+        :param since: updated_at がこれ以降（境界を含む）の行だけ
+        :param after: updated_at がこれより後（境界を含まない）の行だけ
+        :param before: updated_at がこれより前（境界を含まない）の行だけ
+        :param sources: site_name の候補リスト
+        エラーは呼び出し側に投げる
+        """
+        query = self.supabase.table(self.table_name).select("id", count="exact")
+        if sources:
+            query = query.in_("site_name", list(sources))
+        if since:
+            query = query.gte("updated_at", since)
+        if after:
+            query = query.gt("updated_at", after)
+        if before:
+            query = query.lt("updated_at", before)
+        with metrics.span("db.count"):
+            response = query.limit(1).execute()
+        return response.count or 0
 
     def fetch_all_jobs(self):
         """
         全求人を新着順（created_at降順）で取得する
+        件数が多い場合は iter_jobs を使って1件ずつ処理すること
+        """
+        try:
+            return list(self.iter_jobs())
+        except Exception as e:
+            print(f"⚠️ DB Fetch Error: {e}")
+            return []
+
+
+class DBRequestError(Exception):
+    """AsyncDBClient のリクエストの失敗（supabase の APIError と同じく PostgREST のエラー本文をメッセージにする）"""
+
+    def __init__(self, status: int, payload):
+        super().__init__(payload)
+        self.status = status
+        self.payload = payload
+
+
+def _quote(value) -> str:
+    """in.(...) / eq. の値をダブルクォートで囲む（カンマや括弧を含むURLでも壊れないように）"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _in(values) -> str:
+    return "in.(" + ",".join(_quote(v) for v in values) + ")"
+
+
+def _uuid_bounds(partitions: int):
+    """uuid の値域を partitions 個に区切った (下限 or None, 上限 or None) のリスト"""
+    cuts = [f"{i * (1 << 32) // partitions:08x}-0000-0000-0000-000000000000" for i in range(1, partitions)]
+    return list(zip([None] + cuts, cuts + [None]))
+
+
+def _has_h2():
+    """httpx の HTTP/2 に必要な h2 があるか（無ければ HTTP/1.1 の keep-alive）"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _Newest:
+    """heapq で (created_at, id) の降順に並べるためのキー"""
+    __slots__ = ("key",)
+
+    def __init__(self, row):
+        self.key = (row["created_at"], row["id"])
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+
+class AsyncDBClient:
+    """
+    DBClient と同じメソッドを async で提供する（supabase クライアントを使わず PostgREST を httpx で直接呼ぶ）
+    コネクションは1つの httpx.AsyncClient にプールして使い回し（h2 があれば HTTP/2）、
+    同時リクエスト数は concurrency で抑える。各リクエストはタイムアウト付きで、
+    接続エラー・タイムアウト・5xx / 429 は指数バックオフで再試行する
+
+        async with AsyncDBClient() as db:
+            results = await db.upsert_jobs(jobs)
+            async for job in db.iter_jobs(columns=["url", "title"]):
+                ...
+    """
+
+    def __init__(self, url: str = None, key: str = None, known_url_cache=None, skip_unchanged: bool = False,
+                 concurrency: int = ASYNC_CONCURRENCY, timeout: float = REQUEST_TIMEOUT,
+                 retries: int = REQUEST_RETRIES, http2: bool = True):
+        """
+        :param known_url_cache, skip_unchanged: DBClient と同じ
+        :param concurrency: 同時に送るリクエスト数
+        :param timeout: 1リクエストのタイムアウト秒数
+        :param retries: 失敗したリクエストの再試行回数
+        """
+        url = url or os.environ.get("SUPABASE_URL")
+        key = key or os.environ.get("SUPABASE_KEY")
+
+        if not url or not key:
+            raise ValueError("❌ Error: SUPABASE_URL and SUPABASE_KEY must be set in environment variables.")
+
+        self.table_name = "jobs"
+        self.known_urls = known_url_cache
+        self.skip_unchanged = skip_unchanged
+        self.retries = retries
+        self.stats = {"requests": 0, "retries": 0, "failed": 0}
+        self._slots = asyncio.Semaphore(concurrency)
+        # httpx は AsyncDBClient を使う時だけ読み込む（DBClient だけのスクリプトの起動を軽くする）
+        import httpx
+        self._transport_error = httpx.TransportError
+        self._client = httpx.AsyncClient(
+            base_url=f"{url.rstrip('/')}/rest/v1/",
+            headers={"apikey": key, "Authorization": f"Bearer {key}", "Content-Type": "application/json"},
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            http2=http2 and _has_h2(),
+        )
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    # 内容のフィンガープリントの扱いは DBClient と同じ
+    _with_hash = DBClient._with_hash
+    _is_unchanged = staticmethod(DBClient._is_unchanged)
+    _needs_refresh = staticmethod(DBClient._needs_refresh)
+
+    async def _request(self, method: str, params=None, json=None, prefer=None, table: str = None):
+        """
+        1リクエストを送り、(行のリスト or None, 件数 or None) を返す
+        件数は Prefer: count=exact の Content-Range から取る
+        """
+        headers = {"Prefer": ",".join(prefer)} if prefer else None
+        attempt = 0
+        while True:
+            async with self._slots:
+                self.stats["requests"] += 1
+                try:
+                    response = await self._client.request(
+                        method, table or self.table_name, params=params, json=json, headers=headers
+                    )
+                    error = None if response.status_code < 400 else DBRequestError(
+                        response.status_code, _error_payload(response)
+                    )
+                    retry = error is not None and response.status_code in RETRY_STATUSES
+                except self._transport_error as e:
+                    error, retry = e, True
+            if error is None:
+                break
+            if not retry or attempt >= self.retries:
+                self.stats["failed"] += 1
+                raise error
+            self.stats["retries"] += 1
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+            attempt += 1
+
+        count = None
+        content_range = response.headers.get("Content-Range")
+        if content_range and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            count = int(total) if total.isdigit() else None
+        return (response.json() if response.content else None), count
+
+    @metrics.timed("db.upsert_job")
+    async def upsert_job(self, job_data: dict):
+        """DBClient.upsert_job と同じ。:return: (is_new, response)"""
+        job_data = self._with_hash(job_data)
+        try:
+            url = job_data.get("url")
+            if self.skip_unchanged and (self.known_urls is None or self.known_urls.contains_many([url])):
+                stored = (await self.existing_fingerprints([url])).get(url)
+                if self._is_unchanged(job_data, stored):
+                    if self._needs_refresh(stored):
+                        await self.touch_urls([url])
+                    return False, UNCHANGED
+
+            rows, _ = await self._request(
+                "POST", {"on_conflict": "url"}, job_data,
+                prefer=["resolution=merge-duplicates", "return=representation"],
+            )
+            if rows:
+                if self.known_urls is not None:
+                    self.known_urls.add_many([url])
+                return True, rows
+            return False, None
+
+        except Exception as e:
+            print(f"⚠️ DB Error: {e}")
+            return False, str(e)
+
+    @metrics.timed("db.upsert_jobs")
+    async def upsert_jobs(self, jobs, batch_size: int = UPSERT_BATCH_SIZE):
+        """
+        DBClient.upsert_jobs と同じ（入力順の UpsertResult のリスト）
+        バッチは溜まった順に並行して送る。同じURLが2回出てきたら、それまでのバッチを全部送り終えてから続ける
+        （後の行が後に書き込まれるように）
+        """
+        results = []
+        pending = {}
+        sending = []
+        seen = set()
+
+        def flush(batch):
+            sending.append(asyncio.create_task(self._flush_upsert_batch(list(batch), results)))
+            batch.clear()
+
+        for job in jobs:
+            index = len(results)
+            results.append(None)
+            url = job.get("url")
+            if not url:
+                results[index] = UpsertResult(False, "url is required")
+                continue
+
+            if url in seen:
+                for batch in pending.values():
+                    if batch:
+                        flush(batch)
+                await asyncio.gather(*sending)
+                sending.clear()
+                seen.clear()
+            seen.add(url)
+
+            job = self._with_hash(job)
+            batch = pending.setdefault(tuple(sorted(job)), [])
+            batch.append((index, job))
+            if len(batch) >= batch_size:
+                flush(batch)
+
+        for batch in pending.values():
+            if batch:
+                flush(batch)
+        await asyncio.gather(*sending)
+        for result in results:
+            metrics.incr(f"db.upsert.{result.status}")
+        return results
+
+    async def _flush_upsert_batch(self, batch, results):
+        urls = [job["url"] for _, job in batch]
+        try:
+            if self.skip_unchanged:
+                stored = await self.existing_fingerprints(urls)
+                existing = set(stored)
+            else:
+                existing = await self.existing_urls(urls)
+        except Exception as e:
+            print(f"⚠️ DB Error: {e}")
+            for index, _ in batch:
+                results[index] = UpsertResult(False, str(e))
+            return
+
+        if self.skip_unchanged:
+            changed, stale = [], []
+            for index, job in batch:
+                if self._is_unchanged(job, stored.get(job["url"])):
+                    results[index] = UpsertResult(False, UNCHANGED)
+                    if self._needs_refresh(stored[job["url"]]):
+                        stale.append(job["url"])
+                else:
+                    changed.append((index, job))
+            if stale:
+                await self.touch_urls(stale)
+            batch = changed
+        if batch:
+            await self._send_upsert_batch(batch, existing, results)
+
+    async def _send_upsert_batch(self, batch, existing, results):
+        try:
+            rows, _ = await self._request(
+                "POST", {"on_conflict": "url"}, [job for _, job in batch],
+                prefer=["resolution=merge-duplicates", "return=representation"],
+            )
+        except Exception as e:
+            if len(batch) == 1:
+                print(f"⚠️ DB Error: {e}")
+                results[batch[0][0]] = UpsertResult(False, str(e))
+                return
+            # 失敗した行を特定するため二分して再送（両半分は並行に）
+            mid = len(batch) // 2
+            await asyncio.gather(
+                self._send_upsert_batch(batch[:mid], existing, results),
+                self._send_upsert_batch(batch[mid:], existing, results),
+            )
+            return
+
+        rows_by_url = {row.get("url"): row for row in (rows or [])}
+        if self.known_urls is not None:
+            self.known_urls.add_many(rows_by_url)
+        for index, job in batch:
+            row = rows_by_url.get(job["url"])
+            if row is None:
+                results[index] = UpsertResult(False, None)
+            else:
+                results[index] = UpsertResult(job["url"] not in existing, [row])
+
+    async def _select_by_urls(self, urls, select: str):
+        """urls を URL_QUERY_CHUNK 件ずつの in.(...) に分けて並行に問い合わせ、行をまとめて返す"""
+        chunks = [urls[i:i + URL_QUERY_CHUNK] for i in range(0, len(urls), URL_QUERY_CHUNK)]
+        pages = await asyncio.gather(*(
+            self._request("GET", {"select": select, "url": _in(chunk)}) for chunk in chunks
+        ))
+        return [row for rows, _ in pages for row in (rows or [])]
+
+    @metrics.timed("db.existing_urls")
+    async def existing_urls(self, urls) -> set:
+        """DBClient.existing_urls と同じ（in.(...) のチャンクは並行に送る）"""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        found = set()
+        if self.known_urls is not None:
+            found = self.known_urls.contains_many(urls)
+            urls = [u for u in urls if u not in found]
+
+        fetched = {row["url"] for row in await self._select_by_urls(urls, "url")}
+        if fetched and self.known_urls is not None:
+            self.known_urls.add_many(fetched)
+        return found | fetched
+
+    @metrics.timed("db.existing_fingerprints")
+    async def existing_fingerprints(self, urls) -> dict:
+        """DBClient.existing_fingerprints と同じ {url: (content_hash, updated_at)}"""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        found = {
+            row["url"]: (row.get("content_hash"), row.get("updated_at"))
+            for row in await self._select_by_urls(urls, "url,content_hash,updated_at")
+        }
+        if found and self.known_urls is not None:
+            self.known_urls.add_many(found)
+        return found
+
+    async def check_url_exists(self, url: str) -> bool:
+        """URLが既に存在するかチェックする（早期終了判定用）"""
+        try:
+            return url in await self.existing_urls([url])
+        except Exception:
+            return False
+
+    @metrics.timed("db.touch_urls")
+    async def touch_urls(self, urls) -> int:
+        """DBClient.touch_urls と同じ（チャンクは並行に送る）"""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            counts = await asyncio.gather(*(
+                self._request("PATCH", {"url": _in(urls[i:i + URL_QUERY_CHUNK])}, {"updated_at": now},
+                              prefer=["count=exact", "return=minimal"])
+                for i in range(0, len(urls), URL_QUERY_CHUNK)
+            ))
+        except Exception as e:
+            print(f"⚠️ DB Update Error: {e}")
+            return 0
+        return sum(count or 0 for _, count in counts)
+
+    async def iter_urls(self, page_size: int = 1000):
+        """jobs.url を全件、url 昇順で少しずつ取得する（キャッシュ同期用。async for で使う）"""
+        last = None
+        while True:
+            params = [("select", "url"), ("order", "url"), ("limit", str(page_size))]
+            if last is not None:
+                params.append(("url", f"gt.{last}"))
+            with metrics.span("db.fetch_page"):
+                rows, _ = await self._request("GET", params)
+            rows = rows or []
+            for row in rows:
+                yield row["url"]
+            if len(rows) < page_size:
+                return
+            last = rows[-1]["url"]
+
+    async def delete_old_jobs(self, days: int = 30):
+        """最終更新から指定日数以上経過した求人を削除する"""
+        return (await self.prune_old_jobs(days)).deleted
+
+    async def expire_old_jobs(self, days: int = 30):
+        """delete_old_jobs と同じ削除を行い、削除した求人のURLリストを返す"""
+        return (await self.prune_old_jobs(days)).urls
+
+    @metrics.timed("db.prune_old_jobs")
+    async def prune_old_jobs(self, days: int = 30, batch_size: int = PRUNE_BATCH_SIZE, archive=None,
+                             dry_run: bool = False) -> PruneResult:
+        """
+        DBClient.prune_old_jobs と同じ
+        次のバッチの id の取り出しは、今のバッチの削除と並行に行う
+        """
+        threshold = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        if dry_run:
+            try:
+                _, count = await self._request(
+                    "GET", [("select", "id"), ("updated_at", f"lt.{threshold}"), ("limit", "1")],
+                    prefer=["count=exact"],
+                )
+                return PruneResult(count or 0, 0, 0, 0, [])
+            except Exception as e:
+                print(f"⚠️ DB Error: {e}")
+                return PruneResult(0, 0, 0, 0, [])
+
+        columns = "*" if archive is not None else "id"
+
+        async def select(last_id):
+            params = [("select", columns), ("updated_at", f"lt.{threshold}"), ("order", "id"),
+                      ("limit", str(batch_size))]
+            if last_id is not None:
+                params.append(("id", f"gt.{last_id}"))
+            rows, _ = await self._request("GET", params)
+            return rows or []
+
+        async def delete(rows):
+            removed, _ = await self._request(
+                "DELETE", [("id", _in(row["id"] for row in rows)), ("updated_at", f"lt.{threshold}"),
+                           ("select", "id,url")],
+                prefer=["return=representation"],
+            )
+            return removed or []
+
+        matched = deleted = archived = batches = 0
+        urls = []
+        next_rows = None
+        try:
+            rows = await select(None)
+            while rows:
+                matched += len(rows)
+                batches += 1
+                if archive is not None:
+                    if not _archive_batch(archive, rows):
+                        break
+                    archived += len(rows)
+                more = len(rows) == batch_size
+                next_rows = asyncio.ensure_future(select(rows[-1]["id"])) if more else None
+                removed = await delete(rows)
+                deleted += len(removed)
+                urls.extend(row["url"] for row in removed)
+                if next_rows is None:
+                    break
+                rows = await next_rows
+                next_rows = None
+        except Exception as e:
+            print(f"⚠️ DB Delete Error: {e}")
+            if next_rows is not None:
+                next_rows.cancel()
+
+        if urls and self.known_urls is not None:
+            self.known_urls.remove_many(urls)
+        metrics.incr("db.pruned", deleted)
+        metrics.incr("db.archived", archived)
+        return PruneResult(matched, deleted, archived, batches, urls)
+
+    async def _iter_partition(self, select: str, page_size: int, since, sources, bounds):
+        """id が bounds の範囲にある行を、DBClient.iter_jobs と同じキーセットページングで返す（次のページを先読みする）"""
+        base = [("select", select), ("order", "created_at.desc,id.desc"), ("limit", str(page_size))]
+        if sources:
+            base.append(("site_name", _in(sources)))
+        if since:
+            base.append(("updated_at", f"gte.{since}"))
+        low, high = bounds
+        if low:
+            base.append(("id", f"gte.{low}"))
+        if high:
+            base.append(("id", f"lt.{high}"))
+
+        async def fetch(cursor):
+            params = list(base)
+            if cursor:
+                created_at, job_id = cursor
+                params.append(("or", f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{job_id}))'))
+            with metrics.span("db.fetch_page"):
+                rows, _ = await self._request("GET", params)
+            return rows or []
+
+        page = asyncio.ensure_future(fetch(None))
+        try:
+            while True:
+                rows = await page
+                metrics.incr("db.rows_fetched", len(rows))
+                if len(rows) < page_size:
+                    page = None
+                    yield rows
+                    return
+                page = asyncio.ensure_future(fetch((rows[-1]["created_at"], rows[-1]["id"])))
+                yield rows
+        finally:
+            if page is not None:
+                page.cancel()
+
+    async def iter_jobs(self, columns=None, page_size: int = FETCH_PAGE_SIZE, since: str = None, sources=None,
+                        partitions: int = FETCH_PARTITIONS):
+        """
+        DBClient.iter_jobs と同じく新着順（created_at降順, id降順）に1件ずつ返す（async for で使う）
+        id (uuid) の値域を partitions 個に分け、それぞれをキーセットページングで並行に読み進めて
+        新着順にマージする。各範囲は次のページを先読みするので、partitions 個の範囲 × 2 ページ分が同時に飛ぶ
+        :param partitions: 1 なら DBClient.iter_jobs と同じ1本の読み出し（先読みだけする）
         """
+        if columns:
+            columns = list(dict.fromkeys(list(columns) + ["created_at", "id"]))
+            select = ",".join(columns)
+        else:
+            select = "*"
+
+        streams = [
+            self._iter_partition(select, page_size, since, sources, bounds)
+            for bounds in _uuid_bounds(max(1, partitions))
+        ]
+        pages = [None] * len(streams)
+        heap = []
+
+        async def advance(i):
+            """範囲 i の次の行をヒープに積む（ページが尽きたら次のページを待つ）"""
+            page = pages[i]
+            while not page:
+                page = await anext(streams[i], None)
+                if page is None:
+                    return
+                page.reverse()
+            pages[i] = page
+            row = page.pop()
+            heapq.heappush(heap, (_Newest(row), i, row))
+
         try:
-            # limitを指定しないとデフォルトで最大1000件などの制限がある場合があるが、
-            # 一旦全件取得を試みる (件数が多い場合はpaginationが必要)
-            response = self.supabase.table(self.table_name).select("*").order("created_at", desc=True).limit(2000).execute()
-            return response.data if response.data else []
+            await asyncio.gather(*(advance(i) for i in range(len(streams))))
+            while heap:
+                _, i, row = heapq.heappop(heap)
+                yield row
+                await advance(i)
+        finally:
+            for stream in streams:
+                await stream.aclose()
+
+    async def count_jobs(self, since: str = None, after: str = None, before: str = None, sources=None) -> int:
+        """DBClient.count_jobs と同じ"""
+        params = [("select", "id"), ("limit", "1")]
+        if sources:
+            params.append(("site_name", _in(sources)))
+        if since:
+            params.append(("updated_at", f"gte.{since}"))
+        if after:
+            params.append(("updated_at", f"gt.{after}"))
+        if before:
+            params.append(("updated_at", f"lt.{before}"))
+        with metrics.span("db.count"):
+            _, count = await self._request("GET", params, prefer=["count=exact"])
+        return count or 0
+
+    async def fetch_all_jobs(self):
+        """全求人を新着順（created_at降順）で取得する"""
+        try:
+            return [job async for job in self.iter_jobs()]
         except Exception as e:
             print(f"⚠️ DB Fetch Error: {e}")
             return []
+
+
+def _error_payload(response):
+    try:
+        return response.json()
+    except ValueError:
+        return {"message": response.text, "code": str(response.status_code)}
@@ -0,0 +1,150 @@
+"""
+求人詳細ページから summary / image_url を取り出すストリーミング抽出器
+
+BeautifulSoup(..., "html.parser") で木を組み立てる代わりに、標準ライブラリの HTMLParser の
+イベントだけを見て必要な3つ (JSON-LD, og:image, フォールバック用の本文要素) を拾う。
+HTMLを少しずつ feed でき、必要なものが揃った時点で読むのをやめられる。
+
+抽出ルールは従来の parse_job_detail と同じ:
+    1. <script type="application/ld+json"> の最初の1つの description をテキスト化
+    2. <meta property="og:image"> の content
+    3. 1 が無ければ .job-description (無ければ .post-content) のテキスト先頭600文字
+"""
+import json
+from html.parser import HTMLParser
+
+FALLBACK_CLASSES = ("job-description", "post-content")
+FALLBACK_LIMIT = 600
+
+# 子要素を持たない（閉じタグが来ない）要素
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+class _TextCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+
+def html_to_text(fragment, separator="\n"):
+    """
+    HTML断片をテキスト化する（BeautifulSoup の get_text(separator, strip=True) 相当）
+    """
+    collector = _TextCollector()
+    collector.feed(fragment)
+    collector.close()
+    return separator.join(s for s in (p.strip() for p in collector.parts) if s)
+
+
+class DetailExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.json_ld = None
+        self.json_ld_data = None
+        self.og_image = None
+        # class名 -> そのクラスを持つ最初の要素のテキスト断片
+        self.fallback = {}
+        self._in_json_ld = False
+        self._json_ld_parts = []
+        # 収集中のフォールバック要素: class名 -> (タグ名, ネストの深さ)
+        # class ごとに独立して追う（.post-content の中にある .job-description も拾えるように）
+        self._capturing = {}
+
+    @property
+    def has_primary(self):
+        """description 付きの JSON-LD と og:image が両方揃ったか（これ以上読む必要が無いか）"""
+        return (
+            isinstance(self.json_ld_data, dict)
+            and bool(self.json_ld_data.get("description"))
+            and self.og_image is not None
+        )
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and self.json_ld is None and (attrs.get("type") or "").strip() == "application/ld+json":
+            self._in_json_ld = True
+            self._json_ld_parts = []
+        elif tag == "meta" and self.og_image is None and attrs.get("property") == "og:image":
+            self.og_image = attrs.get("content") or None
+
+        if tag in VOID_ELEMENTS:
+            return
+        for name, (capture_tag, depth) in self._capturing.items():
+            if tag == capture_tag:
+                self._capturing[name] = (capture_tag, depth + 1)
+        classes = (attrs.get("class") or "").split()
+        for name in FALLBACK_CLASSES:
+            if name in classes and name not in self.fallback:
+                self.fallback[name] = []
+                self._capturing[name] = (tag, 1)
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._in_json_ld:
+            self._in_json_ld = False
+            self.json_ld = "".join(self._json_ld_parts)
+            try:
+                data = json.loads(self.json_ld)
+                if isinstance(data, list):
+                    data = data[0] if data else {}
+                self.json_ld_data = data
+            except json.JSONDecodeError:
+                print("⚠️ Failed to parse JSON-LD")
+        for name, (capture_tag, depth) in list(self._capturing.items()):
+            if tag == capture_tag:
+                if depth == 1:
+                    del self._capturing[name]
+                else:
+                    self._capturing[name] = (capture_tag, depth - 1)
+
+    def handle_data(self, data):
+        if self._in_json_ld:
+            self._json_ld_parts.append(data)
+        for name in self._capturing:
+            self.fallback[name].append(data)
+
+    def details(self):
+        details = {}
+
+        data = self.json_ld_data
+        if isinstance(data, dict) and data.get("description"):
+            raw_desc = data["description"]
+            # 改行コードの統一
+            clean_desc = raw_desc.replace("<br>", "\n").replace("<br />", "\n").replace("<br/>", "\n")
+            details["summary"] = html_to_text(clean_desc)
+
+        if self.og_image:
+            details["image_url"] = self.og_image
+
+        # JSON-LDで取得できなかった場合のフォールバック
+        if not details.get("summary"):
+            for name in FALLBACK_CLASSES:
+                if name in self.fallback:
+                    text = "".join(s.strip() for s in self.fallback[name])
+                    if text:
+                        details["summary"] = text[:FALLBACK_LIMIT]
+                    break
+
+        return details
+
+
+def extract_job_detail(chunks):
+    """
+    HTML（文字列、または文字列チャンクのイテラブル）から summary / image_url を取り出す
+    JSON-LD と og:image が揃った時点で残りは読まない
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    parser = DetailExtractor()
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.has_primary:
+            break
+    else:
+        parser.close()
+    return parser.details()
@@ -0,0 +1,203 @@
+"""
+詳細取得・おすすめ文生成の結果を貯めておくローカルストア (SQLite / WAL)
+
+update_job_details.py は jobs.json 全体を読み込んで最大100件を処理し、全体を json.dump し直していたので、
+途中で落ちるとその回の成果がすべて消え、保存のたびに全件分のコストがかかっていた。
+ここでは求人URLごとに summary / image_url / recommendation と、試行回数・最後のエラーを持ち、
+1件終わるごとにコミットする（次の実行は続きから再開できる）。
+
+    store = EnrichmentStore()
+    store.register(jobs)                        # エクスポートに載っている求人を登録（載っている詳細は別に控える）
+    for job in store.pending():                 # 今も載っていて詳細が揃っていない求人を古い順に
+        ...
+        store.save(job)                         # 取れた分を1件ずつコミット
+        store.record_failure(job, "no details") # 失敗は試行回数と理由を残す（MAX_ATTEMPTS 回で諦める）
+    jobs = store.apply_many(jobs)               # エクスポートの空いている項目を詳細で埋める
+
+summary などの列には、ここで取得・生成して save した値だけを持つ。エクスポート（DB・スクレーパー由来）に
+載っていた値は listed_summary / listed_recommendation に毎回上書きで控え、処理待ちの判定にだけ使う
+（取り込んでしまうと最初に見た値で固まり、後から DB 側で更新されても反映されなくなる）。
+"""
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "enrichment.sqlite")
+ENRICHMENT_FIELDS = ["summary", "image_url", "recommendation"]
+# この回数失敗した求人はキューに出さない（ページが消えている等）
+MAX_ATTEMPTS = 3
+# SQLite のバインド変数上限を超えないように分割する
+SQL_CHUNK = 500
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def job_url(job):
+    return job.get("link") or job.get("url")
+
+
+def open_existing(path=DEFAULT_PATH):
+    """ストアがあれば開く（merge_jobs / sync_jobs がエクスポートに詳細を重ねるため）。無ければ None"""
+    return EnrichmentStore(path) if os.path.exists(path) else None
+
+
+class EnrichmentStore:
+    def __init__(self, path=DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "url TEXT PRIMARY KEY, source TEXT, title TEXT, first_seen TEXT NOT NULL, "
+            "summary TEXT, image_url TEXT, recommendation TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, last_attempt TEXT, updated_at TEXT, listed_at TEXT, "
+            "listed_summary TEXT, listed_recommendation TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_first_seen ON jobs (first_seen)")
+        self.conn.commit()
+        # register した時刻。pending はこの回のエクスポートに載っていた求人だけを返す
+        self.listed_at = None
+
+    def register(self, jobs):
+        """
+        エクスポートの求人を登録する。初めて見た求人は first_seen（created_at があればそれ）を記録し、
+        エクスポートに載っている summary / recommendation を listed_* に控える（毎回上書き。
+        save した値の列には触らない）
+        :return: 新しく登録した件数
+        """
+        before = len(self)
+        now = self.listed_at = _now()
+        rows = []
+        for job in jobs:
+            url = job_url(job)
+            if not url:
+                continue
+            rows.append((
+                url, job.get("source"), job.get("title"), job.get("created_at") or now,
+                job.get("summary") or None, job.get("recommendation") or None, now,
+            ))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO jobs (url, source, title, first_seen, listed_summary, listed_recommendation, listed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET "
+                "source = excluded.source, title = excluded.title, listed_at = excluded.listed_at, "
+                "listed_summary = excluded.listed_summary, "
+                "listed_recommendation = excluded.listed_recommendation",
+                rows,
+            )
+        return len(self) - before
+
+    def pending(self, need_summary=True, need_recommendation=True, sources=None, limit=None,
+                max_attempts=MAX_ATTEMPTS):
+        """
+        詳細が揃っていない求人を first_seen の古い順に返す（ソースをまたいで、件数の上限なし）
+        summary / recommendation はストアの値、無ければエクスポートに載っていた値
+        :return: [{"link", "url", "source", "title", "summary", "image_url", "recommendation", "attempts"}]
+        """
+        summary = "COALESCE(summary, listed_summary)"
+        recommendation = "COALESCE(recommendation, listed_recommendation)"
+        missing = []
+        if need_summary:
+            missing.append(f"{summary} IS NULL")
+        if need_recommendation:
+            missing.append(f"({summary} IS NOT NULL AND {recommendation} IS NULL)")
+        if not missing:
+            return []
+        sql = (f"SELECT url, source, title, first_seen, {summary} AS summary, image_url, "
+               f"{recommendation} AS recommendation, attempts FROM jobs "
+               f"WHERE ({' OR '.join(missing)}) AND attempts < ?")
+        params = [max_attempts]
+        if self.listed_at:
+            sql += " AND listed_at = ?"
+            params.append(self.listed_at)
+        if sources:
+            sql += f" AND source IN ({','.join('?' * len(sources))})"
+            params += list(sources)
+        sql += " ORDER BY first_seen, url"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        jobs = []
+        for row in self.conn.execute(sql, params):
+            job = dict(row)
+            job["link"] = job["url"]
+            jobs.append(job)
+        return jobs
+
+    def save(self, job):
+        """job の詳細（空でない項目だけ）を保存してコミットする"""
+        values = {field: job.get(field) for field in ENRICHMENT_FIELDS if job.get(field)}
+        if not values:
+            return
+        assignments = ", ".join(f"{field} = ?" for field in values)
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE jobs SET {assignments}, last_error = NULL, updated_at = ? WHERE url = ?",
+                list(values.values()) + [_now(), job_url(job)],
+            )
+
+    def record_failure(self, job, error):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1, last_error = ?, last_attempt = ? WHERE url = ?",
+                (str(error)[:500], _now(), job_url(job)),
+            )
+
+    def get_many(self, urls):
+        """{url: {summary, image_url, recommendation}}（save した値がある項目だけ）"""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        found = {}
+        for i in range(0, len(urls), SQL_CHUNK):
+            chunk = urls[i:i + SQL_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT url, {', '.join(ENRICHMENT_FIELDS)} FROM jobs WHERE url IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in rows:
+                values = {field: row[field] for field in ENRICHMENT_FIELDS if row[field]}
+                if values:
+                    found[row["url"]] = values
+        return found
+
+    def apply_many(self, jobs, chunk_size=SQL_CHUNK):
+        """
+        jobs（イテラブル）の空いている項目を、ストアにある詳細で埋めて1件ずつ返す（エクスポートの生成用）
+        DB・スクレーパー側に値があればそちらが優先。問い合わせは chunk_size 件ずつまとめて行う
+        """
+        batch = []
+        for job in jobs:
+            batch.append(job)
+            if len(batch) >= chunk_size:
+                yield from self._apply_batch(batch)
+                batch = []
+        if batch:
+            yield from self._apply_batch(batch)
+
+    def _apply_batch(self, jobs):
+        found = self.get_many(job_url(job) for job in jobs)
+        for job in jobs:
+            for field, value in found.get(job_url(job), {}).items():
+                if not job.get(field):
+                    job[field] = value
+            yield job
+
+    def stats(self):
+        row = self.conn.execute(
+            "SELECT COUNT(*) AS total, COUNT(COALESCE(summary, listed_summary)) AS summary, "
+            "COUNT(COALESCE(recommendation, listed_recommendation)) AS recommendation, "
+            "SUM(attempts >= ?) AS gave_up FROM jobs",
+            (MAX_ATTEMPTS,),
+        ).fetchone()
+        return {key: row[key] or 0 for key in ("total", "summary", "recommendation", "gave_up")}
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,108 @@
+"""
+求人の内容フィンガープリント（変更検出）
+
+正規化済みの項目から作ったハッシュを比べて、中身が変わっていない求人の DB 書き込みや
+jobs.json の書き直しを省く。updated_at のように毎回変わるだけの項目は含めない。
+
+    fp = job_fingerprint(job)
+
+    tracker = ChangeTracker(load_fingerprints("src/data/jobs.json"))
+    rows = tracker.track(rows)       # 書き出す行を流しながら比較
+    ...
+    tracker.counts                   # Counter: new / changed / unchanged / removed
+    tracker.modified                 # 1件でも増減・変更・並び替えがあれば True
+"""
+import hashlib
+import json
+from collections import Counter
+
+from json_stream import iter_json_items
+
+# フィンガープリントに含めない項目（実行のたびに変わる・ハッシュ自身）
+VOLATILE_FIELDS = frozenset({"updated_at", "content_hash"})
+DIGEST_SIZE = 16
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def job_fingerprint(job, exclude=VOLATILE_FIELDS):
+    """
+    job の内容ハッシュ（16進文字列）
+    空文字と None・キーが無いことは同じ扱い（スクレーパーによって欠け方が違うため）
+    """
+    fields = {}
+    for key, value in job.items():
+        if key in exclude:
+            continue
+        value = _normalize(value)
+        if value is None or value == "":
+            continue
+        fields[key] = value
+    data = json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def job_key(job):
+    return job.get("url") or job.get("link") or job.get("id")
+
+
+def load_fingerprints(path, key="jobs"):
+    """
+    既存のエクスポートから (キー, フィンガープリント) の並びを作る。ファイルが無い・壊れている場合は None
+    """
+    try:
+        return [(job_key(job), job_fingerprint(job)) for job in iter_json_items(path, key)]
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class ChangeTracker:
+    """
+    前回の (キー, フィンガープリント) の並びと、今回書き出す行を比べる
+    :param previous: load_fingerprints の結果（None なら前回なし = すべて new）
+    """
+
+    def __init__(self, previous=None):
+        self.previous = previous
+        self._previous = dict(previous or [])
+        self.current = []
+        self.counts = Counter()
+
+    def check(self, job):
+        """1件を比較して 'new' / 'changed' / 'unchanged' を返す"""
+        key = job_key(job)
+        fp = job_fingerprint(job)
+        self.current.append((key, fp))
+        old = self._previous.get(key)
+        status = "new" if old is None else ("unchanged" if old == fp else "changed")
+        self.counts[status] += 1
+        return status
+
+    def track(self, rows):
+        for row in rows:
+            self.check(row)
+            yield row
+
+    def finish(self):
+        """今回出てこなかったキーを removed として数える（track を流し終えてから呼ぶ）"""
+        seen = {key for key, _ in self.current}
+        self.counts["removed"] = sum(1 for key in self._previous if key not in seen)
+        return self.counts
+
+    @property
+    def modified(self):
+        if self.previous is None:
+            return True
+        return self.current != self.previous
+
+
+def format_changes(counts):
+    return ", ".join(f"{counts[k]} {k}" for k in ("new", "changed", "unchanged", "removed"))
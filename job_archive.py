@@ -0,0 +1,94 @@
+"""
+期限切れで削除する求人の退避先 (DBClient.prune_old_jobs の archive)
+
+    - GzipJsonlArchive: ローカルの .jsonl.gz に1行1件で追記する（既定: .cache/archive/jobs-YYYYMM.jsonl.gz）
+    - TableArchive: 同じDBの jobs_archive テーブルへ upsert する（supabase_schema.sql 参照）
+
+どちらもバッチを削除する前に、取り出した行の全カラムが書き込まれる。書き込みが失敗したら、そのバッチは削除されずに
+prune が止まる（退避できなかった行は消えない）。取り出した後に更新されて消えなかった行も書き込まれるので、
+退避先には jobs に残っている行が含まれることがある。途中で落ちても、書き込み済みのバッチは残る。
+
+    with GzipJsonlArchive() as archive:
+        db.prune_old_jobs(days=30, archive=archive)
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "archive")
+ARCHIVE_TABLE = "jobs_archive"
+
+
+def default_archive_path(directory=ARCHIVE_DIR):
+    return os.path.join(directory, f"jobs-{datetime.now():%Y%m}.jsonl.gz")
+
+
+class GzipJsonlArchive:
+    """
+    バッチごとに独立した gzip メンバーとして追記するので、途中で止まっても
+    それまでのバッチは gzip.open でそのまま読める
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_archive_path()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.count = 0
+
+    def write(self, rows):
+        archived_at = datetime.now(timezone.utc).isoformat()
+        lines = "".join(
+            json.dumps(dict(row, archived_at=archived_at), ensure_ascii=False) + "\n" for row in rows
+        )
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.count += len(rows)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class TableArchive:
+    """
+    DB内の退避テーブルへ upsert する（id が衝突したら上書き = 再実行しても重複しない）
+    書き込みに失敗したら例外を投げるので、prune_old_jobs はそのバッチを削除せずに止まる
+    """
+
+    def __init__(self, db, table=ARCHIVE_TABLE):
+        self.db = db
+        self.table = table
+        self.count = 0
+
+    def write(self, rows):
+        archived_at = datetime.now(timezone.utc).isoformat()
+        self.db.supabase.table(self.table).upsert(
+            [dict(row, archived_at=archived_at) for row in rows], on_conflict="id", returning="minimal"
+        ).execute()
+        self.count += len(rows)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def iter_archive(path):
+    """GzipJsonlArchive のファイルを1件ずつ読む"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,346 @@
+"""
+ソースをまたいだ求人の「ほぼ重複」の検出（MinHash + LSH）
+
+merge_jobs はリンク、DB は url の完全一致でしか重複を落とさないので、Indeed と求人ボックスに
+別の URL で載っている同じ求人は2件として出てしまう。全件どうしを比べると O(n²) になるため、
+
+    1. タイトル + 会社名 + 本文の先頭を正規化し、文字3-gram の MinHash 署名を作る
+       （1回のハッシュで NUM_BINS 個の区画の最小値を取る one permutation hashing）
+    2. 署名を BANDS 個の帯に分け、帯の値 + 会社名 が同じものだけを候補にする（LSH）
+    3. 候補の組だけ、署名の一致率（≒ Jaccard 係数）・タイトル・都道府県・ソースを確かめてまとめる
+
+とし、候補を作る手間をほぼ件数に比例させる。まとめた求人のうち画像・おすすめ文・本文などが
+一番そろっているものを残し、cluster_id（まとめた求人のリンクから作る）と cluster_size を付ける。
+同じソース内の似た求人（同じ会社の職種違いなど）は別の求人として扱い、まとめない。
+署名の計算は NumPy があればまとめて行い、無ければ同じ値を Python で計算する。
+
+    counts = Counter()
+    jobs = collapse_near_duplicates(jobs, counts)   # counts: clusters / dropped / candidates / compared
+"""
+import hashlib
+import re
+import unicodedata
+from array import array
+from collections import Counter
+
+import metrics
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 署名の区画数（2の累乗）。LSH には先頭の BANDS * ROWS 区画を使う
+NUM_BINS = 64
+BANDS = 20
+ROWS = 3
+# 署名の一致率がこれ以上なら同じ求人とみなす
+SIMILARITY_THRESHOLD = 0.6
+# タイトル（【】などの飾りを除く）の文字2-gram の Jaccard 係数もこれ以上であること
+# （同じ会社が同じ定型文で出している職種違いの求人をまとめないため）
+TITLE_THRESHOLD = 0.5
+# 本文はこの文字数まで使う（長い本文の後半は定型文が多い）
+SUMMARY_CHARS = 600
+# 1つのバケツの中で、各求人を直前の何件と比べるか（定型文で巨大になったバケツでも線形に保つ）
+MAX_BUCKET_COMPARE = 20
+# NumPy で一度に署名を計算する件数
+SIGNATURE_BATCH = 2048
+
+# 求人に付ける項目
+CLUSTER_FIELDS = ("cluster_id", "cluster_size")
+
+_MASK64 = (1 << 64) - 1
+_MIX_A = 0x9E3779B97F4A7C15
+_MIX_B = 0x632BE59BD9B4E019
+_BAND_MIX = (0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+_EMPTY = 0xFFFFFFFF
+_BIN_SHIFT = 64 - (NUM_BINS.bit_length() - 1)
+
+_NOISE_RE = re.compile(r"[\s\W_]+")
+_TITLE_TAG_RE = re.compile(r"【[^】]*】|《[^》]*》|\[[^\]]*\]|<[^>]*>")
+_COMPANY_RE = re.compile(r"株式会社|有限会社|合同会社|\(株\)|\(有\)|\binc\b\.?|\bco\b\.?,?\s*ltd\b\.?|\bcorporation\b")
+
+
+def normalize_text(text):
+    """全角/半角・大文字/小文字・空白・記号の違いを無くす"""
+    return _NOISE_RE.sub("", unicodedata.normalize("NFKC", text or "").lower())
+
+
+def normalize_company(company):
+    """"株式会社サンプル" と "サンプル株式会社"、"(株)サンプル" を同じにする"""
+    return normalize_text(_COMPANY_RE.sub("", unicodedata.normalize("NFKC", company or "").lower()))
+
+
+def title_grams(title):
+    text = normalize_text(_TITLE_TAG_RE.sub("", unicodedata.normalize("NFKC", title or "")))
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def dedup_text(job, company=None):
+    """署名を作る文字列（company: normalize_company 済みの会社名）"""
+    if company is None:
+        company = normalize_company(job.get("company"))
+    return company + normalize_text(f"{job.get('title') or ''}\n{(job.get('summary') or '')[:SUMMARY_CHARS]}")
+
+
+def signature(text):
+    """文字3-gram の MinHash 署名（NUM_BINS 個の 32bit 値。3-gram の無い区画は _EMPTY）"""
+    sig = array("I", [_EMPTY]) * NUM_BINS
+    codes = [ord(ch) for ch in text]
+    for i in range(len(codes) - 2):
+        v = ((((codes[i] << 42) | (codes[i + 1] << 21) | codes[i + 2]) * _MIX_A) + _MIX_B) & _MASK64
+        b = v >> _BIN_SHIFT
+        x = (v >> 16) & 0xFFFFFFFF
+        if x < sig[b]:
+            sig[b] = x
+    return sig
+
+
+def _signatures_np(texts):
+    """signature() と同じ値を、texts 全体まとめて NumPy で計算する"""
+    sigs = np.full((len(texts), NUM_BINS), _EMPTY, dtype=np.uint32)
+    for start in range(0, len(texts), SIGNATURE_BATCH):
+        batch = texts[start:start + SIGNATURE_BATCH]
+        arrays = [np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32) for text in batch]
+        lengths = np.fromiter((len(a) for a in arrays), dtype=np.int64, count=len(arrays))
+        if lengths.sum() < 3:
+            continue
+        codes = np.concatenate(arrays).astype(np.uint64)
+        doc = np.repeat(np.arange(len(batch), dtype=np.int64), lengths)
+        # 求人をまたぐ 3-gram は除く
+        same_doc = doc[:-2] == doc[2:]
+        grams = (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:]
+        v = grams[same_doc] * np.uint64(_MIX_A) + np.uint64(_MIX_B)
+        slots = doc[:-2][same_doc] * NUM_BINS + (v >> np.uint64(_BIN_SHIFT)).astype(np.int64)
+        flat = sigs[start:start + len(batch)].reshape(-1)
+        np.minimum.at(flat, slots, ((v >> np.uint64(16)) & np.uint64(0xFFFFFFFF)).astype(np.uint32))
+    return sigs
+
+
+def signatures(texts):
+    """texts の署名の一覧（NumPy があれば (件数, NUM_BINS) の配列）"""
+    if np is not None:
+        return _signatures_np(texts)
+    return [signature(text) for text in texts]
+
+
+def similarity(a, b):
+    """署名の一致率（両方とも空の区画は数えない）。Jaccard 係数の推定値"""
+    if np is not None and isinstance(a, np.ndarray):
+        used = (a != _EMPTY) | (b != _EMPTY)
+        n_used = np.count_nonzero(used)
+        return np.count_nonzero((a == b) & used) / n_used if n_used else 0.0
+    same = used = 0
+    for x, y in zip(a, b):
+        if x == _EMPTY and y == _EMPTY:
+            continue
+        used += 1
+        if x == y:
+            same += 1
+    return same / used if used else 0.0
+
+
+def similarities(sigs, i, others):
+    """similarity(sigs[i], sigs[j]) を others の全ての j について（NumPy なら1回で）計算する"""
+    if np is not None and isinstance(sigs, np.ndarray):
+        a = sigs[i]
+        block = sigs[others]
+        # 両方とも空の区画は一致に数えず、分母からも除く
+        both_empty = np.add.reduce((block == _EMPTY) & (a == _EMPTY), axis=1)
+        same = np.add.reduce(block == a, axis=1) - both_empty
+        used = NUM_BINS - both_empty
+        return (same / np.maximum(used, 1)).tolist()
+    return [similarity(sigs[i], sigs[j]) for j in others]
+
+
+def band_keys(sig, company_key):
+    """帯ごとのバケツのキー（会社名も混ぜる）。区画が全部空の帯は None"""
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        if all(x == _EMPTY for x in rows):
+            keys.append(None)
+            continue
+        key = company_key
+        for x, mix in zip(rows, _BAND_MIX):
+            key = ((key ^ x) * mix) & _MASK64
+        keys.append(key)
+    return keys
+
+
+def _buckets_np(sigs, company_keys, usable):
+    """
+    band_keys() と同じキーを全件まとめて計算し、帯ごとに2件以上入ったバケツだけを返す
+    :param usable: まとめる対象の求人（会社名のあるもの）の bool 配列
+    """
+    bands = sigs[:, :BANDS * ROWS].reshape(len(sigs), BANDS, ROWS).astype(np.uint64)
+    keys = np.asarray(company_keys, dtype=np.uint64)[:, None].repeat(BANDS, axis=1)
+    for row, mix in enumerate(_BAND_MIX):
+        keys = (keys ^ bands[:, :, row]) * np.uint64(mix)
+    valid = ~(bands == _EMPTY).all(axis=2) & usable[:, None]
+    for band in range(BANDS):
+        ids = np.flatnonzero(valid[:, band])
+        # 安定ソートなので、同じバケツの中は入力順のまま
+        ids = ids[np.argsort(keys[ids, band], kind="stable")]
+        sorted_keys = keys[ids, band]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        ends = np.append(starts[1:], len(ids))
+        for start, end in zip(starts[ends - starts > 1].tolist(), ends[ends - starts > 1].tolist()):
+            yield ids[start:end].tolist()
+
+
+def _buckets(sigs, company_keys, usable):
+    """_buckets_np() と同じバケツを Python で作る"""
+    buckets = [{} for _ in range(BANDS)]
+    for i, (sig, company_key) in enumerate(zip(sigs, company_keys)):
+        if not usable[i]:
+            continue
+        for band, key in enumerate(band_keys(sig, company_key)):
+            if key is not None:
+                buckets[band].setdefault(key, []).append(i)
+    for band in buckets:
+        for members in band.values():
+            if len(members) > 1:
+                yield members
+
+
+def _company_key(company):
+    return int.from_bytes(hashlib.blake2b(company.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def richness(job):
+    """まとめた求人のうちどれを残すか（大きいほど優先）"""
+    summary = job.get("summary") or ""
+    return (
+        bool(job.get("image_url")),
+        bool(job.get("recommendation")),
+        bool(summary and summary != "N/A"),
+        bool(job.get("salary")),
+        len(summary),
+        sum(1 for value in job.values() if value not in (None, "", [], "N/A")),
+    )
+
+
+def cluster_id(jobs):
+    """まとめた求人のリンクから作る ID（同じ組み合わせなら実行をまたいでも同じ）"""
+    links = sorted(job.get("link") or job.get("url") or "" for job in jobs)
+    return hashlib.blake2b("\n".join(links).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _same_job(a, b):
+    """署名が似ていても別の求人として扱う組（同じソース・都道府県違い）"""
+    if a.get("source") == b.get("source"):
+        return False
+    pa, pb = a.get("prefecture"), b.get("prefecture")
+    return not (pa and pb and pa != pb)
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def find_clusters(jobs, counts=None, threshold=SIMILARITY_THRESHOLD):
+    """
+    ほぼ重複している求人の組を探す
+    :return: 2件以上の組ごとの、jobs の添字のリスト（組の中は入力順）
+    """
+    counts = Counter() if counts is None else counts
+    normalized = {}
+    companies = []
+    for job in jobs:
+        raw = job.get("company") or ""
+        company = normalized.get(raw)
+        if company is None:
+            company = normalized[raw] = normalize_company(raw)
+        companies.append(company)
+    sigs = signatures([dedup_text(job, company) for job, company in zip(jobs, companies)])
+    company_keys = {company: _company_key(company) for company in set(companies)}
+    keys = [company_keys[company] for company in companies]
+    # 会社名の無い求人はまとめない
+    usable = [bool(company) for company in companies]
+    if np is not None:
+        buckets = _buckets_np(sigs, keys, np.array(usable, dtype=bool))
+    else:
+        buckets = _buckets(sigs, keys, usable)
+
+    parent = list(range(len(jobs)))
+    titles = {}
+
+    def title_of(i):
+        grams = titles.get(i)
+        if grams is None:
+            grams = titles[i] = title_grams(jobs[i].get("title"))
+        return grams
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # 署名がまったく同じ組（定型文の求人に多い）は一致率 1 として配列の比較を省く
+    digests = [hash(sig.tobytes()) for sig in sigs]
+    # 別の帯で比べ済みの組（似た求人は多くの帯で同じバケツに入る）
+    checked = set()
+
+    for members in buckets:
+        # 各求人を、同じバケツの直前の MAX_BUCKET_COMPARE 件と比べる
+        for pos in range(1, len(members)):
+            i = members[pos]
+            window = members[max(0, pos - MAX_BUCKET_COMPARE):pos]
+            counts["candidates"] += len(window)
+            ri = find(i)
+            others = [
+                j for j in window
+                if (j, i) not in checked and find(j) != ri
+                and companies[j] == companies[i] and _same_job(jobs[i], jobs[j])
+            ]
+            if not others:
+                continue
+            checked.update((j, i) for j in others)
+            counts["compared"] += len(others)
+            matched = [j for j in others if digests[j] == digests[i]]
+            rest = [j for j in others if digests[j] != digests[i]]
+            if rest:
+                matched += [j for j, sim in zip(rest, similarities(sigs, i, rest)) if sim >= threshold]
+            for j in matched:
+                if _jaccard(title_of(i), title_of(j)) >= TITLE_THRESHOLD:
+                    ri, rj = find(i), find(j)
+                    parent[max(ri, rj)] = min(ri, rj)
+
+    groups = {}
+    for i in range(len(jobs)):
+        groups.setdefault(find(i), []).append(i)
+    clusters = [members for members in groups.values() if len(members) > 1]
+    counts["clusters"] += len(clusters)
+    return clusters
+
+
+@metrics.timed("dedup.near")
+def collapse_near_duplicates(jobs, counts=None, threshold=SIMILARITY_THRESHOLD, keep_previous=False):
+    """
+    ほぼ重複している求人を1件にまとめる（一番情報の多い求人を残し、それ以外は捨てる）
+    残した求人は元の位置のまま返す。前回付けた cluster_id / cluster_size は付け直す
+    :param jobs: 求人のリスト（イテレーターなら全部読み込む）
+    :param keep_previous: 今回どの組にも入らなかった求人は前回の cluster_id / cluster_size を残す
+        （前回捨てた求人が jobs に無い差分同期用。無いと、まとめた相手がいないので付け直せない）
+    """
+    jobs = list(jobs)
+    counts = Counter() if counts is None else counts
+    previous = {}
+    for i, job in enumerate(jobs):
+        fields = {field: job.pop(field) for field in CLUSTER_FIELDS if field in job}
+        if keep_previous and fields:
+            previous[i] = fields
+    dropped = set()
+    clustered = find_clusters(jobs, counts, threshold)
+    for i in previous.keys() - {i for members in clustered for i in members}:
+        jobs[i].update(previous[i])
+    for members in clustered:
+        group = [jobs[i] for i in members]
+        keep = max(members, key=lambda i: (richness(jobs[i]), -i))
+        jobs[keep]["cluster_id"] = cluster_id(group)
+        jobs[keep]["cluster_size"] = len(members)
+        dropped.update(i for i in members if i != keep)
+    counts["dropped"] += len(dropped)
+    return [job for i, job in enumerate(jobs) if i not in dropped]
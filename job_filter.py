@@ -0,0 +1,200 @@
+"""
+求人のキーワードフィルタ (merge_jobs.py / sync_jobs.py 共通)
+
+必須キーワード（いずれかが含まれていればOK）と NGキーワード（いずれかが含まれていれば除外）を
+1本の正規表現にまとめ、タイトル+概要を1回走査するだけで判定する。
+従来の (title + summary).replace("\\n", "").replace(" ", "") と同じく、キーワードの途中に
+挟まった改行・半角スペースは無視する（正規表現側で読み飛ばすので正規化したコピーは作らない）。
+
+どのキーワードで落ちた/通ったかを返すので、フィルタの判断を後から集計・確認できる。
+
+    result = classify_job(job)
+    result.valid, result.reason, result.required, result.ng
+"""
+import re
+from collections import Counter
+from typing import NamedTuple, Tuple
+
+# フィルタリング対象のソース（それ以外は無条件に通す）
+FILTER_TARGET_SOURCES = ["Indeed", "Kyujinbox"]
+
+# 必須キーワード（いずれかが含まれていればOK）
+REQUIRED_KEYWORDS = ["未経験", "初心者"]
+
+# NGキーワード（いずれかが含まれていれば除外）
+NG_KEYWORDS = [
+    "軽作業", "倉庫", "仕分け", "ピッキング", "梱包",
+    "ホール", "キッチン", "調理", "清掃", "警備",
+    "コンビニ", "レジ", "ドライバー", "配送", "配達",
+    "工場", "製造", "ライン作業", "パチンコ", "カラオケ",
+    "引越", "施工管理", "看護師", "薬剤師", "介護"
+]
+
+# キーワードの途中にあっても無視する文字
+IGNORED_CHARS = "\n "
+
+REASON_OK = "ok"
+REASON_NOT_TARGET = "not_target"
+REASON_NO_REQUIRED = "no_required"
+REASON_NG = "ng"
+
+
+class FilterResult(NamedTuple):
+    valid: bool
+    reason: str
+    required: Tuple[str, ...] = ()
+    ng: Tuple[str, ...] = ()
+
+
+class KeywordFilter:
+    def __init__(self, required=REQUIRED_KEYWORDS, ng=NG_KEYWORDS,
+                 target_sources=FILTER_TARGET_SOURCES, ignored_chars=IGNORED_CHARS):
+        self.required = list(required)
+        self.ng = list(ng)
+        self.target_sources = frozenset(target_sources)
+        self.keywords = self.required + self.ng
+
+        gap = f"[{re.escape(ignored_chars)}]*" if ignored_chars else ""
+        # キャプチャグループを使うと re の先頭文字による高速スキップが効かなくなるので、
+        # グループ無しでマッチさせ、マッチした文字列から無視文字を除いてキーワードを引き直す
+        self._pattern = re.compile("|".join(gap.join(re.escape(ch) for ch in keyword) for keyword in self.keywords))
+        self._strip = str.maketrans("", "", ignored_chars)
+        self._kind = {keyword: keyword in self.required for keyword in self.keywords}
+        self._overlapping = _overlapping_keywords(self.keywords)
+
+    def scan(self, text):
+        """
+        text に含まれる (必須キーワード, NGキーワード) をそれぞれ出現順・重複無しのタプルで返す
+        """
+        found = self._pattern.findall(text)
+        if not found:
+            return (), ()
+        kind = self._kind
+        # 改行・空白を挟んだマッチだけ無視文字を取り除いてキーワードに戻す
+        keywords = dict.fromkeys(m if m in kind else m.translate(self._strip) for m in dict.fromkeys(found))
+        # findall は重なったマッチを返さないので、他のキーワードと重なり得るものが
+        # 見つかった時だけ1文字ずつずらして探し直す（"パチンコンビニ" の "コンビニ" など）
+        if not self._overlapping.isdisjoint(keywords):
+            keywords = self._scan_overlapping(text)
+        return (tuple(k for k in keywords if kind[k]), tuple(k for k in keywords if not kind[k]))
+
+    def _scan_overlapping(self, text):
+        keywords = {}
+        search = self._pattern.search
+        m = search(text)
+        while m:
+            keywords[m.group().translate(self._strip)] = None
+            m = search(text, m.start() + 1)
+        return keywords
+
+    def classify(self, job, source=None):
+        """
+        :param source: 判定に使うソース名（省略時は job["source"]）
+        """
+        if source is None:
+            source = job.get('source')
+        # 特定のソースのみフィルタリング対象
+        if source not in self.target_sources:
+            return FilterResult(True, REASON_NOT_TARGET)
+
+        text = str(job.get('title', '')) + str(job.get('summary', ''))
+        required, ng = self.scan(text)
+        # NGキーワードが1つでもあれば除外（理由としては必須キーワードの有無より優先する）
+        if ng:
+            return FilterResult(False, REASON_NG, required, ng)
+        # 必須キーワードが1つも無ければ除外
+        if not required:
+            return FilterResult(False, REASON_NO_REQUIRED, required, ng)
+        return FilterResult(True, REASON_OK, required, ng)
+
+    def is_valid(self, job, source=None, counts=None):
+        """
+        classify(...).valid と同じ結果を、キーワードを集めずに返す（NGが見つかった時点で打ち切り）
+        :param counts: Counter を渡すと判定理由 (ok / not_target / no_required / ng) と、
+                       除外の決め手になったNGキーワード ("ng:倉庫" など、最初に見つかった1つ) を数える
+        """
+        if source is None:
+            source = job.get('source')
+        if source not in self.target_sources:
+            if counts is not None:
+                counts[REASON_NOT_TARGET] += 1
+            return True
+
+        kind = self._kind
+        has_required = False
+        for m in self._pattern.finditer(str(job.get('title', '')) + str(job.get('summary', ''))):
+            keyword = m.group()
+            if keyword not in kind:
+                keyword = keyword.translate(self._strip)
+            if not kind[keyword]:
+                if counts is not None:
+                    counts[REASON_NG] += 1
+                    counts[f"ng:{keyword}"] += 1
+                return False
+            if keyword in self._overlapping:
+                # 必須キーワードのマッチに重なったNGキーワードを見落とさないよう、きちんと調べ直す
+                result = self.classify(job, source)
+                if counts is not None:
+                    count_result(counts, result)
+                return result.valid
+            has_required = True
+
+        if counts is not None:
+            counts[REASON_OK if has_required else REASON_NO_REQUIRED] += 1
+        return has_required
+
+    def filter_jobs(self, jobs, counts=None, source=None):
+        """
+        条件を満たす求人だけを返すジェネレーター
+        :param counts: is_valid と同じ
+        """
+        for job in jobs:
+            if self.is_valid(job, source, counts):
+                yield job
+
+
+def _overlapping_keywords(keywords):
+    """
+    他のキーワードと重なって出現し得るキーワード
+    (一方が他方を含む、または末尾と先頭が重なる: "パチンコ" と "コンビニ")
+    """
+    overlapping = set()
+    for a in keywords:
+        for b in keywords:
+            if a == b:
+                continue
+            if b in a or a in b or any(a.endswith(b[:k]) for k in range(1, min(len(a), len(b)))):
+                overlapping.add(a)
+    return frozenset(overlapping)
+
+
+def count_result(counts, result):
+    """classify の結果を is_valid(counts=...) と同じ形で数える"""
+    counts[result.reason] += 1
+    if result.reason == REASON_NG:
+        counts[f"ng:{result.ng[0]}"] += 1
+
+
+def format_counts(counts, top=5):
+    """フィルタ集計を1行にまとめる（ログ用）"""
+    parts = [f"{reason}={counts[reason]}" for reason in (REASON_OK, REASON_NOT_TARGET, REASON_NO_REQUIRED, REASON_NG)
+             if counts.get(reason)]
+    ng = Counter({k[3:]: v for k, v in counts.items() if k.startswith("ng:")})
+    if ng:
+        parts.append("top NG: " + ", ".join(f"{k}×{v}" for k, v in ng.most_common(top)))
+    return "  ".join(parts)
+
+
+DEFAULT_FILTER = KeywordFilter()
+
+
+def classify_job(job, source=None):
+    return DEFAULT_FILTER.classify(job, source)
+
+
+def is_valid_job(job, source=None, counts=None):
+    return DEFAULT_FILTER.is_valid(job, source, counts)
+
+
+def filter_jobs(jobs, counts=None, source=None):
+    return DEFAULT_FILTER.filter_jobs(jobs, counts, source)
@@ -0,0 +1,158 @@
+"""
+JSON の逐次読み書き
+
+スクレーパーの出力 ({"jobs": [...]} または [...]、あるいは1行1件の JSONL) を
+ファイル全体を json.load せずに1件ずつ取り出し、書き出しも1件ずつ行う。
+"""
+import json
+import os
+
+READ_CHUNK = 1 << 16
+# 書き出し時にまとめて encode する件数
+WRITE_BATCH = 500
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """raw_decode 用のバッファ付きリーダー"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.f.read(READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """空白を読み飛ばして次の1文字を返す（終端なら ""）"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """次の値を1つデコードする。バッファ末尾で切れていたら読み足して再挑戦"""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self.fill():
+                    raise
+                continue
+            # 数値などはバッファ末尾で途切れていてもデコードできてしまうので、続きがあるか確認する
+            if end == len(self.buf) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def _iter_array(reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        sep = reader.peek()
+        reader.pos += 1
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError(f"Expected ',' or ']' at offset {reader.pos - 1}")
+
+
+def iter_json_items(path, key="jobs"):
+    """
+    JSON ファイルの配列要素を1件ずつ返す
+    - トップレベルが配列ならその要素
+    - トップレベルがオブジェクトなら key の配列の要素（他のキーは読み飛ばす）
+    - 拡張子が .jsonl なら1行1件
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        reader = _Reader(f)
+        first = reader.peek()
+        if first == "[":
+            yield from _iter_array(reader)
+            return
+        if first != "{":
+            raise ValueError(f"{path}: expected a JSON array or object")
+
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            name = reader.value()
+            reader.expect(":")
+            if name == key and reader.peek() == "[":
+                yield from _iter_array(reader)
+            else:
+                reader.value()
+            sep = reader.peek()
+            reader.pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise ValueError(f"Expected ',' or '}}' at offset {reader.pos - 1}")
+
+
+def _encode_batch(batch):
+    # indent 付きの encode は1回ごとの準備が重いので、まとめて配列として encode し外側の [ ] を外す
+    return json.dumps(batch, indent=2, ensure_ascii=False)[2:-2]
+
+
+def write_json_array(path, rows, replace_if=None):
+    """
+    rows を少しずつ JSON 配列として書き出す（json.dump(..., indent=2) と同じレイアウト）
+    一時ファイル経由で置き換えるので、途中で失敗しても書きかけのファイルは残らない
+    :param replace_if: 書き終えた後に呼ばれる関数。False を返すと既存のファイルをそのまま残す
+    :return: 書き出した件数
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    count = 0
+    batch = []
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= WRITE_BATCH:
+                    f.write("[\n" if count == 0 else ",\n")
+                    f.write(_encode_batch(batch))
+                    count += len(batch)
+                    batch = []
+            if batch:
+                f.write("[\n" if count == 0 else ",\n")
+                f.write(_encode_batch(batch))
+                count += len(batch)
+            f.write("\n]" if count else "[]")
+        if replace_if is None or replace_if():
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
@@ -0,0 +1,97 @@
+"""
+既知URLのローカルキャッシュ (SQLite)
+
+DBの jobs.url をローカルに持っておき、スクレーパーの「既に取得済みか？」判定を
+ネットワーク無しで済ませる。DBClient(known_url_cache=KnownUrlCache()) として渡すと
+existing_urls / check_url_exists がまずここを引き、見つからなかった分だけDBに問い合わせる。
+
+DB側から消えたURL (delete_old_jobs) はDBClientがキャッシュからも消す。
+ズレが気になる場合は sync_from_db で丸ごと作り直す。
+"""
+import os
+import sqlite3
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "known_urls.sqlite")
+# SQLite のバインド変数上限 (古いビルドは 999) を超えないように分割する
+SQL_CHUNK = 500
+
+
+class KnownUrlCache:
+    def __init__(self, path: str = DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, seen_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, url):
+        return bool(self.contains_many([url]))
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def contains_many(self, urls):
+        """urls のうちキャッシュにあるものを set で返す"""
+        urls = list(dict.fromkeys(urls))
+        found = set()
+        for i in range(0, len(urls), SQL_CHUNK):
+            chunk = urls[i:i + SQL_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(f"SELECT url FROM urls WHERE url IN ({placeholders})", chunk)
+            found.update(url for (url,) in rows)
+        self.hits += len(found)
+        self.misses += len(urls) - len(found)
+        return found
+
+    def add_many(self, urls):
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO urls (url, seen_at) VALUES (?, ?) ON CONFLICT(url) DO UPDATE SET seen_at = excluded.seen_at",
+                ((url, now) for url in urls),
+            )
+
+    def remove_many(self, urls):
+        with self.conn:
+            self.conn.executemany("DELETE FROM urls WHERE url = ?", ((url,) for url in urls))
+
+    def sync_from_db(self, db):
+        """
+        DBの jobs.url 全件で作り直す
+        :param db: DBClient
+        :return: 同期後の件数
+        """
+        now = time.time()
+        with self.conn:
+            self.conn.execute("DELETE FROM urls")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, seen_at) VALUES (?, ?)",
+                ((url, now) for url in db.iter_urls()),
+            )
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('synced_at', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (str(now),),
+            )
+        return len(self)
+
+    @property
+    def synced_at(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'synced_at'").fetchone()
+        return float(row[0]) if row else None
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self):
+        self.conn.close()
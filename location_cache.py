@@ -0,0 +1,142 @@
+"""
+勤務地文字列 → 都道府県（と駅） の判定結果キャッシュ
+
+"東京都渋谷区" や "五反田駅徒歩5分" のような同じ文字列はソースをまたいでも、毎晩の実行をまたいでも
+繰り返し出てくるので、detect_prefecture の結果を覚えておく。
+
+    - プロセス内: LRU (OrderedDict)
+    - ディスク: .cache/locations.sqlite (WAL)。merge_jobs のワーカープロセス間でも共有される
+
+キャッシュは「駅データのバージョン」ごとに有効。バージョンは駅CSVの SHA-256
+(station_index が持っている) と判定ルールから作るので、CSV を差し替えたり
+PREF_PRIORITY を変えたりすると、次に開いた時に自動で全件破棄される。
+判定ロジック自体を変えたら NORMALIZE_VERSION を上げること。
+値は文字列1つ。駅まで決まった場合は station_geo.Resolution.encode の形（"東京都\t123\t45"）で入る。
+
+    cache = LocationCache(location_cache_version(index.csv_sha, PREF_PRIORITY))
+    pref = cache.get(location, detect)
+"""
+import hashlib
+import os
+import sqlite3
+from collections import Counter, OrderedDict
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "locations.sqlite")
+NORMALIZE_VERSION = "2"
+# プロセス内に保持する件数
+LRU_SIZE = 8192
+# 新しく判定した結果をこの件数たまるごとにディスクへ書く
+FLUSH_EVERY = 256
+
+_MISSING = object()
+
+
+def location_cache_version(csv_sha, priority=()):
+    """
+    :param csv_sha: 駅CSVの SHA-256 (StationIndex.csv_sha, bytes)。CSV が無い場合は None
+    """
+    h = hashlib.sha256()
+    h.update(NORMALIZE_VERSION.encode())
+    h.update(b"\0" + (csv_sha or b""))
+    h.update(b"\0" + ",".join(priority).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class LocationCache:
+    def __init__(self, version, path=DEFAULT_PATH, lru_size=LRU_SIZE):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.version = version
+        self.lru_size = lru_size
+        # merge_jobs のワーカーが同時に書くことがあるので、ロック待ちを長めに取る
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS locations (location TEXT PRIMARY KEY, prefecture TEXT) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+        self._check_version()
+        self._lru = OrderedDict()
+        self._pending = {}
+        self.stats = Counter()
+
+    def _check_version(self):
+        """駅データ（またはルール）が変わっていたら中身を捨てる"""
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != self.version:
+                self.conn.execute("DELETE FROM locations")
+                self.conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('version', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (self.version,),
+                )
+                self.invalidated = row is not None
+            else:
+                self.invalidated = False
+
+    def _remember(self, location, prefecture):
+        self._lru[location] = prefecture
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, location, compute):
+        """
+        location の判定結果を返す。キャッシュに無ければ compute(location) で求めて覚える
+        （None = 都道府県不明 も結果として覚える）
+        """
+        prefecture = self._lru.get(location, _MISSING)
+        if prefecture is not _MISSING:
+            self._lru.move_to_end(location)
+            self.stats["memory"] += 1
+            return prefecture
+
+        row = self.conn.execute("SELECT prefecture FROM locations WHERE location = ?", (location,)).fetchone()
+        if row is not None:
+            prefecture = row[0]
+            self.stats["disk"] += 1
+        else:
+            prefecture = compute(location)
+            self.stats["computed"] += 1
+            self._pending[location] = prefecture
+            if len(self._pending) >= FLUSH_EVERY:
+                self.flush()
+        self._remember(location, prefecture)
+        return prefecture
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO locations (location, prefecture) VALUES (?, ?)",
+                self._pending.items(),
+            )
+        self._pending = {}
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM locations").fetchone()[0]
+
+    def hit_rate(self):
+        total = sum(self.stats.values())
+        return (self.stats["memory"] + self.stats["disk"]) / total if total else 0.0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def format_stats(stats, version=None):
+    """ヒット率を1行にまとめる（ログ用）"""
+    total = sum(stats.values())
+    if not total:
+        return "no lookups"
+    parts = [f"{total} lookups"] + [
+        f"{key} {stats[key] / total:.1%}" for key in ("memory", "disk", "computed")
+    ]
+    if version:
+        parts.append(f"version {version}")
+    return ", ".join(parts)
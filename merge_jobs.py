@@ -1,10 +1,20 @@
-import json
-import glob
+import argparse
 import os
 import hashlib
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import enrichment_store
+import metrics
+from fingerprint import format_changes
+from job_dedup import collapse_near_duplicates
+from raw_store import RawStore
+from stage_state import file_stamp, load_state, save_state
+from static_export import print_report, write_exports
 
-# 各プロジェクトの出力ディレクトリパス
+# 各プロジェクトの出力ディレクトリパス（raw_store に取り込んでから、ソースごとに最新の実行分を読む）
 PROJECT_PATHS = {
     "Infra": "../infra-scraping/output/*.json",
     "ZeroOne": "../zeroone-scraping/output/*.json",
@@ -13,30 +23,20 @@ PROJECT_PATHS = {
 }
 
 OUTPUT_FILE = "src/data/jobs.json"
+STATION_CSV_FILE = "station20251211free.csv"
+# 前回マージした時の入力（各ソースの最新セグメント・出力・詳細ストア・駅CSV の stat とオプション）
+MERGE_STATE_FILE = ".cache/merge_state.json"
 
-def get_latest_file(pattern):
-    files = glob.glob(pattern)
-    if not files:
-        return None
-    # 作成日時（またはファイル名の日付）でソートして最新を取得
-    return max(files, key=os.path.getctime)
-
-# フィルタリング設定
-FILTER_TARGET_SOURCES = ["Indeed", "Kyujinbox"]
-
-# 必須キーワード（いずれかが含まれていればOK）
-REQUIRED_KEYWORDS = ["未経験", "初心者"]
-
-# NGキーワード（いずれかが含まれていれば除外）
-NG_KEYWORDS = [
-    "軽作業", "倉庫", "仕分け", "ピッキング", "梱包", 
-    "ホール", "キッチン", "調理", "清掃", "警備", 
-    "コンビニ", "レジ", "ドライバー", "配送", "配達", 
-    "工場", "製造", "ライン作業", "パチンコ", "カラオケ",
-    "引越", "施工管理", "看護師", "薬剤師", "介護"
-]
+# フィルタリングと都道府県判定を回すプロセス数と、1回にワーカーへ渡す件数
+MERGE_WORKERS = int(os.environ.get("MERGE_WORKERS", os.cpu_count() or 1))
+MERGE_CHUNK_SIZE = 500
 
-import csv
+# フィルタリング設定（必須/NGキーワード）は job_filter.py（sync_jobs.py と共通）
+from job_filter import format_counts, is_valid_job
+from location_cache import LocationCache, format_stats, location_cache_version
+from station_geo import Resolution, resolve_location
+from station_index import load_station_index
+from station_matcher import StationMatcher
 
 # JIS都道府県コード (1-47)
 PREF_CODE_MAP = {
@@ -55,167 +55,368 @@ PREF_PRIORITY = [
 ]
 
 STATION_PREF_MAP = {}
+STATION_MATCHER = None
+# 駅の座標・最寄りの主要駅（station_geo）。CSV が無い場合は None
+STATION_GEO = None
+LOCATION_CACHE = None
 
-def load_station_data(csv_path="station20251211free.csv"):
+@metrics.timed("station.load")
+def load_station_data(csv_path=STATION_CSV_FILE, verbose=True, use_cache=True):
     """
-    CSVから駅データを読み込み、{駅名: [都道府県リスト]} のマップを作成する
+    駅データを読み込み、{駅名: {都道府県, ...}} のマップと駅名検索用のオートマトンを用意する
+    CSVはコンパイル済みインデックス（.cache/）にしてmmapで読む。CSVが変わったら自動で作り直す
+    use_cache=True なら判定結果のキャッシュ（location_cache）も開く。駅データが変わっていれば中身は捨てられる
     """
-    global STATION_PREF_MAP
+    global STATION_PREF_MAP, STATION_MATCHER, STATION_GEO, LOCATION_CACHE
+    csv_sha = None
     try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            count = 0
-            for row in reader:
-                name = row['station_name']
-                pref_cd = int(row['pref_cd'])
-                pref_name = PREF_CODE_MAP.get(pref_cd)
-                
-                if pref_name:
-                    if name not in STATION_PREF_MAP:
-                        STATION_PREF_MAP[name] = set()
-                    STATION_PREF_MAP[name].add(pref_name)
-                    count += 1
-            print(f"✅ Loaded {count} stations from CSV.")
+        index = load_station_index(csv_path, PREF_CODE_MAP)
+        STATION_PREF_MAP = index.pref_map
+        STATION_MATCHER = index.matcher
+        STATION_GEO = index.geo
+        csv_sha = index.csv_sha
+        if verbose:
+            print(f"✅ Loaded {index.row_count} stations from CSV.")
     except FileNotFoundError:
-        print("⚠️ Station CSV not found. Using fallback detection.")
+        if verbose:
+            print("⚠️ Station CSV not found. Using fallback detection.")
         STATION_PREF_MAP = {}
+        STATION_MATCHER = StationMatcher.build(STATION_PREF_MAP, PREF_CODE_MAP)
+        STATION_GEO = None
+
+    LOCATION_CACHE = LocationCache(location_cache_version(csv_sha, PREF_PRIORITY)) if use_cache else None
+    if verbose and LOCATION_CACHE is not None and LOCATION_CACHE.invalidated:
+        print("♻️ Station data changed. Location cache cleared.")
 
 def detect_prefecture(location):
+    return locate(location).prefecture
+
+def locate(location):
+    """勤務地の文字列 → Resolution(都道府県, 駅番号, 駅名番号)"""
     if not location or location == "N/A":
-        return None
-        
+        return Resolution(None)
+    if LOCATION_CACHE is not None:
+        return Resolution.decode(LOCATION_CACHE.get(location, _encoded_locate))
+    return _locate(location)
+
+def _encoded_locate(location):
+    return _locate(location).encode()
+
+def _locate(location):
     # 1. 直接都道府県名が含まれているかチェック（最優先・最強）
+    direct_pref = None
     for code, pref in PREF_CODE_MAP.items():
         if pref in location:
-            return pref
-            
+            direct_pref = pref
+            break
+
     # 2. 駅名からの逆引き
-    # loc文字列に含まれる駅名を全て探し、候補の都道府県を挙げる
-    candidates = []
-    
-    # 駅名の検索（長い順にマッチさせるのが理想だが、ここでは簡易的に）
-    # 文字列検索は重いので、location内の単語を切り出すか、
-    # 逆にlocationに対して駅名リストを走査する
-    # 今回は精度重視で、STATION_PREF_MAPのキーを走査する（少し遅いかもだが、件数少ないのでOK）
-    
-    # 高速化のため、locationに含まれそうな文字数でフィルターも考えられるが、
-    # シンプルに「3文字以上の駅名」あるいは「〇〇駅」という形式を探すのが良い
-    # しかし「五反田」のように「駅」がつかない場合もある。
-    
-    # 戦略: locationに含まれる文字列と駅名のマッチング
-    possible_prefs = set()
-    
-    # locationが長い場合、全駅ループは厳しいか？
-    # -> 駅データは1万件程度。100件の求人に対してなら 100 x 10000 = 100万回比較。Pythonなら数秒。
-    
-    for station, prefs in STATION_PREF_MAP.items():
-        # 誤爆防止: 2文字以上の駅名に限定、かつ一般的な単語（「大学」「公園」など）を除外する必要があるかも
-        # 今回は一旦そのまま。ただし「駅」がついていないと誤爆しやすい（例: "本町"）
-        if len(station) < 2: 
-            continue
-            
-        # 安全策: "駅" が後ろについているか、あるいは特定の主要駅リストに含まれるか
-        # location = "五反田駅徒歩5分" -> hit "五反田"
-        if station in location:
-            possible_prefs.update(prefs)
-
-    if not possible_prefs:
-        return None
-        
-    # 候補の中から優先順位の高いものを返す
-    for p in PREF_PRIORITY:
-        if p in possible_prefs:
-            return p
-            
-    # 優先リストになければ、候補の最初の一つを返す
-    return list(possible_prefs)[0]
-
-
-def is_valid_job(job):
-    # 特定のソースのみフィルタリング対象
-    if job.get('source') not in FILTER_TARGET_SOURCES:
-        return True
-        
-    title = str(job.get('title', ''))
-    summary = str(job.get('summary', ''))
-    full_text = (title + summary).replace("\n", "").replace(" ", "")
-    
-    # 1. 必須キーワードチェック (ポジティブフィルタ)
-    if not any(req in full_text for req in REQUIRED_KEYWORDS):
-        return False
-        
-    # 2. NGキーワードチェック (ネガティブフィルタ)
-    if any(ng in full_text for ng in NG_KEYWORDS):
-        return False
-        
-    return True
-
-def main():
-    # 駅データの読み込み
-    load_station_data()
+    # Aho-Corasickオートマトンでlocation中の駅名を1パスで全て拾う。
+    # 長い駅名に包含される短い駅名（"堺筋本町"の中の"本町"など）は候補にしない。
+    # 同名の駅は、一緒に書かれた他の駅との距離や市区町村名で絞り、
+    # それでも決まらなければ優先順位の高い都道府県（優先リストになければJISコード順）
+    if STATION_MATCHER is None:
+        return Resolution(direct_pref)
+    return resolve_location(location, STATION_MATCHER, STATION_GEO, PREF_CODE_MAP, PREF_PRIORITY, direct_pref)
 
-    combined_jobs = []
-    
-    print("🚀 Merging Job Data with Filters & Normalization...")
-    
-    for source, pattern in PROJECT_PATHS.items():
-        latest_file = get_latest_file(pattern)
-        if latest_file:
-            print(f"✅ Found {source}: {latest_file}")
+
+def normalize_location(job):
+    # 都道府県補完ロジック
+    loc = job.get('location', '')
+    resolved = locate(loc)
+    detected_pref = resolved.prefecture
+
+    if detected_pref:
+        job['prefecture'] = detected_pref
+        # locationに都道府県が含まれていなければ先頭に付与
+        if detected_pref not in loc:
+            job['location'] = f"{detected_pref} {loc}"
+    # 駅が特定できれば座標と最寄りの主要駅を付ける（station, lat, lon, hub, hub_km）
+    if resolved.station_id >= 0 and STATION_GEO is not None:
+        job.update(STATION_GEO.fields(resolved.station_id, resolved.name_id))
+
+def process_chunk(source, jobs):
+    """
+    ワーカープロセスで実行: フィルタリング + 都道府県補完 + ID付与
+    :return: (残った求人, {"read": 入力件数, "seconds": 処理秒数, "filter": フィルタ判定の集計,
+                           "location": 勤務地キャッシュのヒット数})
+    """
+    t0 = time.perf_counter()
+    valid_jobs = []
+    filter_counts = Counter()
+    for job in jobs:
+        if 'source' not in job:
+            job['source'] = source
+
+        # フィルタリング
+        if is_valid_job(job, counts=filter_counts):
+            normalize_location(job)
+            # ID付与 (リンクのハッシュ値)
+            if job.get('link'):
+                job['id'] = hashlib.md5(job['link'].encode('utf-8')).hexdigest()
+            valid_jobs.append(job)
+    location_counts = Counter()
+    if LOCATION_CACHE is not None:
+        LOCATION_CACHE.flush()
+        location_counts = Counter(LOCATION_CACHE.stats)
+        LOCATION_CACHE.stats.clear()
+    return valid_jobs, {
+        "read": len(jobs), "seconds": time.perf_counter() - t0,
+        "filter": filter_counts, "location": location_counts,
+    }
+
+def _init_worker(use_cache=True):
+    # インデックスは mmap なので各プロセスで開き直しても安い
+    load_station_data(verbose=False, use_cache=use_cache)
+
+class _Done:
+    """プールを使わない場合に Future の代わりに置く"""
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+def new_source_stats():
+    return {"file": None, "read": 0, "kept": 0, "parse_sec": 0.0, "classify_sec": 0.0, "error": None,
+            "filter": Counter()}
+
+def iter_chunks(items, size, stats):
+    """items を size 件ずつまとめる。読み込み（JSONのデコード）にかかった時間を stats に足す"""
+    it = iter(items)
+    while True:
+        t0 = time.perf_counter()
+        chunk = []
+        for job in it:
+            chunk.append(job)
+            if len(chunk) >= size:
+                break
+        stats["parse_sec"] += time.perf_counter() - t0
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < size:
+            return
+
+def run_pipeline(store, sources, workers, chunk_size, stats, timings, use_cache=True):
+    """
+    各ソースの最新の実行分（raw_store のセグメント）を1件ずつ読み、chunk_size 件ごとにワーカーへ投げ、
+    フィルタ済みの求人をソース順・ファイル内の順序のまま返すジェネレーター
+    ワーカーに渡したまま結果待ちのチャンクは workers * 2 個までに抑える（メモリを一定に保つ）
+    """
+    executor = (ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(use_cache,))
+                if workers > 1 else None)
+    max_pending = max(1, workers) * 2
+    pending = deque()
+
+    def drain(limit):
+        while len(pending) > limit:
+            source, future = pending.popleft()
+            st = stats[source]
+            if future is None:
+                # ソースの読み込み完了の印
+                if st["error"] is None:
+                    print(f"   -> {source}: Added {st['kept']} jobs (Filtered out {st['read'] - st['kept']} noise jobs)")
+                    if st['read'] > st['kept']:
+                        print(f"      {format_counts(st['filter'])}")
+                continue
+            t0 = time.perf_counter()
+            valid_jobs, chunk_stats = future.result()
+            # プールを使わない場合は処理そのものが待ち時間
+            timings["wait"] += chunk_stats["seconds"] if isinstance(future, _Done) else time.perf_counter() - t0
+            st["read"] += chunk_stats["read"]
+            st["kept"] += len(valid_jobs)
+            st["classify_sec"] += chunk_stats["seconds"]
+            st["filter"].update(chunk_stats["filter"])
+            timings["location"].update(chunk_stats["location"])
+            yield from valid_jobs
+
+    try:
+        for source, pattern in sources.items():
+            st = stats.setdefault(source, new_source_stats())
+            entry = store.latest(source)
+            if not entry:
+                print(f"⚠️ No data found for {source}")
+                continue
+            latest_file = entry["origin"]
+            print(f"✅ Found {source}: {latest_file} ({entry['rows']} rows, {entry['path']})")
+            st["file"] = latest_file
+            if entry.get("error"):
+                # 取り込みの時点で途中までしか読めなかった
+                st["error"] = entry["error"]
+                print(f"   ❌ Error reading {latest_file}: {entry['error']}")
             try:
-                with open(latest_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    jobs = data.get('jobs', []) if isinstance(data, dict) else data
-                    
-                    count_before = len(jobs)
-                    valid_jobs = []
-                    
-                    for job in jobs:
-                        if 'source' not in job:
-                            job['source'] = source
-                        
-                        # フィルタリング
-                        if is_valid_job(job):
-                            # 都道府県補完ロジック
-                            loc = job.get('location', '')
-                            detected_pref = detect_prefecture(loc)
-                            
-                            if detected_pref:
-                                job['prefecture'] = detected_pref
-                                # locationに都道府県が含まれていなければ先頭に付与
-                                if detected_pref not in loc:
-                                    job['location'] = f"{detected_pref} {loc}"
-                            
-                            valid_jobs.append(job)
-                            
-                    combined_jobs.extend(valid_jobs)
-                    
-                    filtered_count = count_before - len(valid_jobs)
-                    print(f"   -> Added {len(valid_jobs)} jobs (Filtered out {filtered_count} noise jobs)")
-                    
+                for chunk in iter_chunks(store.iter_rows(entry), chunk_size, st):
+                    if executor:
+                        pending.append((source, executor.submit(process_chunk, source, chunk)))
+                    else:
+                        pending.append((source, _Done(process_chunk(source, chunk))))
+                    yield from drain(max_pending)
             except Exception as e:
+                # 途中まで読めた分はそのまま使う
+                st["error"] = str(e)
                 print(f"   ❌ Error reading {latest_file}: {e}")
-        else:
-            print(f"⚠️ No data found for {source}")
-
-    # 重複排除（念のためリンクをキーに）
-    unique_jobs = {job['link']: job for job in combined_jobs if job.get('link')}
-    final_list = list(unique_jobs.values())
-
-    # ID付与 (リンクのハッシュ値)
-    for job in final_list:
-        if 'link' in job:
-            job['id'] = hashlib.md5(job['link'].encode('utf-8')).hexdigest()
-    
-    # 保存ディレクトリ作成
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(final_list, f, indent=2, ensure_ascii=False)
-        
+            pending.append((source, None))
+        yield from drain(0)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+def dedup_jobs(jobs, timings):
+    """リンクをキーに重複排除（最初に出てきたものを残す）。リンクの無い求人は捨てる"""
+    seen = set()
+    for job in jobs:
+        if not job.get('link'):
+            continue
+        if job['id'] in seen:
+            timings["duplicates"] += 1
+            continue
+        seen.add(job['id'])
+        yield job
+
+def print_timings(stats, timings, workers):
+    print("\n⏱️  Merge timings")
+    for source, st in stats.items():
+        if st["file"] is None:
+            continue
+        print(
+            f"   {source:10s} read {st['read']:6d}  kept {st['kept']:6d}  "
+            f"parse {st['parse_sec']:6.2f}s  filter+normalize {st['classify_sec']:6.2f}s (CPU)"
+            + (f"  ❌ {st['error']}" if st["error"] else "")
+        )
+    parse = sum(st["parse_sec"] for st in stats.values())
+    classify = sum(st["classify_sec"] for st in stats.values())
+    print(f"   stage ingest           {timings['ingest']:6.2f}s")
+    print(f"   stage parse            {parse:6.2f}s")
+    print(f"   stage filter+normalize {classify:6.2f}s CPU across {workers} worker(s), main waited {timings['wait']:.2f}s")
+    print(f"   stage dedup+write      {timings['write']:6.2f}s ({timings['duplicates']} duplicates dropped)")
+    if timings["near_dup"]:
+        near = timings["near_dup"]
+        print(f"   stage near-dup         {timings['near_dup_sec']:6.2f}s ({near['dropped']} near-duplicates in "
+              f"{near['clusters']} clusters, {near['compared']} of {near['candidates']} candidates compared)")
+    print(f"   total                  {timings['total']:6.2f}s")
+    if LOCATION_CACHE is not None:
+        print(f"📍 Location cache: {format_stats(timings['location'], LOCATION_CACHE.version)}")
+
+def record_metrics(stats, timings, count):
+    """ステージごとの時間と件数を metrics に渡す（分類はワーカーで測った CPU 時間の合計）"""
+    filter_counts = Counter()
+    for st in stats.values():
+        metrics.incr("merge.jobs_in", st["read"])
+        metrics.incr("merge.filtered", st["read"] - st["kept"])
+        filter_counts.update(st["filter"])
+    metrics.observe("merge.ingest", timings["ingest"])
+    metrics.observe("merge.parse", sum(st["parse_sec"] for st in stats.values()))
+    metrics.observe("merge.classify", sum(st["classify_sec"] for st in stats.values()))
+    metrics.observe("merge.wait", timings["wait"])
+    metrics.observe("merge.write", timings["write"])
+    metrics.incr("merge.duplicates", timings["duplicates"])
+    metrics.record("near_dup", timings["near_dup"])
+    metrics.incr("merge.jobs_out", count)
+    metrics.record("filter", filter_counts)
+    metrics.record("location_cache", timings["location"])
+
+def merge_inputs(raw, args):
+    """
+    前回のマージと比べる入力。どれも stat かマニフェストの参照だけで、中身は読まない
+    出力 (jobs.json) が sync_jobs / update_job_details に書き換えられていたら、作り直す
+    """
+    enrichment = enrichment_store.DEFAULT_PATH
+    return {
+        "raw": {source: (raw.latest(source) or {}).get("sha256") for source in PROJECT_PATHS},
+        "output": file_stamp(OUTPUT_FILE),
+        "enrichment": [file_stamp(enrichment), file_stamp(f"{enrichment}-wal")],
+        "station_csv": file_stamp(STATION_CSV_FILE),
+        "options": [args.no_location_cache, args.no_static_export, args.no_near_dup],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the latest scraper outputs into src/data/jobs.json")
+    parser.add_argument("--workers", type=int, default=MERGE_WORKERS,
+                        help="filter / prefecture detection processes (1 = no process pool)")
+    parser.add_argument("--chunk-size", type=int, default=MERGE_CHUNK_SIZE)
+    parser.add_argument("--no-location-cache", action="store_true",
+                        help="always run prefecture detection instead of using .cache/locations.sqlite")
+    parser.add_argument("--no-static-export", action="store_true",
+                        help="only write jobs.json (skip the listing index / detail shards in public/data/jobs)")
+    parser.add_argument("--no-near-dup", action="store_true",
+                        help="only drop exact link duplicates (skip the cross-source near-duplicate pass)")
+    parser.add_argument("--remove-originals", action="store_true",
+                        help="delete scraper output files once they are ingested into .cache/raw")
+    parser.add_argument("--force", action="store_true",
+                        help="merge even if no input changed since the last merge (e.g. after editing the filters)")
+    args = parser.parse_args(argv)
+    use_cache = not args.no_location_cache
+
+    t0 = time.perf_counter()
+    print("🚀 Merging Job Data with Filters & Normalization...")
+
+    stats = {}
+    timings = {"ingest": 0.0, "wait": 0.0, "write": 0.0, "duplicates": 0, "total": 0.0, "location": Counter(),
+               "near_dup": Counter(), "near_dup_sec": 0.0}
+
+    # 新しい出力だけを圧縮セグメントに取り込み、ソースごとの最新はマニフェストから引く
+    t_ingest = time.perf_counter()
+    raw = RawStore()
+    ingested = raw.ingest_all(PROJECT_PATHS, args.remove_originals)
+    timings["ingest"] = time.perf_counter() - t_ingest
+    for source, entries in ingested.items():
+        for entry in entries:
+            print(f"📥 Ingested {source}: {entry['origin']} ({entry['rows']} rows, "
+                  f"{entry['origin_bytes'] / 1024:,.0f} KB -> {entry['bytes'] / 1024:,.0f} KB)")
+
+    # 新しい出力も無く前回から何も変わっていなければ、駅データを読み込む前に終わる
+    if not args.force and merge_inputs(raw, args) == load_state(MERGE_STATE_FILE).get("inputs"):
+        print(f"🟰 No new scraper output since the last merge. {OUTPUT_FILE} was left untouched (--force to merge anyway).")
+        return
+
+    # 駅データの読み込み
+    load_station_data(use_cache=use_cache)
+
+    # 読み込み → フィルタ/正規化（プロセスプール）→ 重複排除 → 書き出し を1件ずつ流す
+    jobs = dedup_jobs(run_pipeline(raw, PROJECT_PATHS, args.workers, args.chunk_size, stats, timings, use_cache),
+                      timings)
+    t_write = time.perf_counter()
+    # update_job_details.py で取得済みの詳細（エンリッチメントストア）を重ねる
+    store = enrichment_store.open_existing()
+    if store is not None:
+        jobs = store.apply_many(jobs)
+    if not args.no_near_dup:
+        # 別のリンクで載っている同じ求人をまとめる（全件を見る必要があるので、ここで一度全部読み込む）
+        jobs = list(jobs)
+        t_near = time.perf_counter()
+        jobs = collapse_near_duplicates(jobs, timings["near_dup"])
+        timings["near_dup_sec"] = time.perf_counter() - t_near
+    # jobs.json と同時に、一覧インデックス + 詳細シャードも書き出す（中身が前回と同じなら書き換えない）
+    count, changes, report = write_exports(OUTPUT_FILE, jobs, not args.no_static_export)
+    if store is not None:
+        store.close()
+    # 途中までしか読めなかったソースがあれば入力を控えない（次の回も no-op にせず、失敗として終わらせる）
+    failed = any(st["error"] for st in stats.values())
+    if not failed:
+        save_state(MERGE_STATE_FILE, {"inputs": merge_inputs(raw, args), "merged_at": datetime.now().isoformat()})
+    # 書き出しの時間から、上流（読み込み・ワーカー待ち）で過ごした時間を引く
+    timings["write"] = (time.perf_counter() - t_write - timings["near_dup_sec"]
+                        - sum(st["parse_sec"] for st in stats.values()) - timings["wait"])
+    timings["total"] = time.perf_counter() - t0
+
     print("\n" + "="*30)
-    print(f"🎉 Successfully merged {len(final_list)} jobs into {OUTPUT_FILE}")
+    if changes.modified:
+        print(f"🎉 Successfully merged {count} jobs into {OUTPUT_FILE}")
+    else:
+        print(f"🟰 {count} jobs, no content changes. {OUTPUT_FILE} was left untouched.")
+    print(f"   -> {format_changes(changes.counts)}")
     print("="*30)
+    print_timings(stats, timings, args.workers)
+    record_metrics(stats, timings, count)
+    metrics.record("export", changes.counts)
+    print_report(report, OUTPUT_FILE)
+    # 読めた分で書き出した上で失敗として終わる
+    if failed:
+        return 1
 
 if __name__ == "__main__":
-    main()
+    # 失敗は終了コード 1（run_scrapers.py がこれを必要とするステージを実行しないように）
+    with metrics.run("merge_jobs") as m:
+        m.exit_code = main()
+    sys.exit(m.exit_code)
@@ -0,0 +1,303 @@
+"""
+実行ごとの計測（スパン・カウンター）と、機械可読なメトリクスファイルの書き出し
+
+各スクリプトは進捗を print で出すだけなので、DB の取得・駅データの読み込み・フィルタ・
+スクレイピング・OpenAI の呼び出しがそれぞれ何秒かかったのかが分からなかった。
+ここでは処理ごとに回数・合計秒数・最大秒数（スパン）と、件数（カウンター）をプロセス内に集計し、
+実行の終わりにまとめて書き出す。集計は dict の更新だけなので、ホットパスに置いても軽い。
+
+    with metrics.span("db.fetch_page"):          # 区間の時間
+        ...
+    @metrics.timed("ai.recommendation")           # 関数（async も可）の時間
+    async def generate(...): ...
+    metrics.incr("merge.jobs_in", len(chunk))     # 件数
+    metrics.observe("merge.classify", seconds)    # 別プロセスで測った時間を足す
+
+    if __name__ == "__main__":
+        with metrics.run("merge_jobs") as m:      # 実行の終わりにファイルへ書き出す
+            m.exit_code = main()                  # 失敗を戻り値で返すなら、それも失敗として記録する
+        sys.exit(m.exit_code)
+
+コードを変えずに環境変数で切り替える:
+    METRICS_DIR        書き出し先（既定: logs/metrics。"off" で書き出さない）
+    METRICS_FORMAT     jsonl（既定）/ prom / jsonl,prom
+                       jsonl: <スクリプト>-<時刻>.jsonl に1行1メトリクス
+                       prom:  <スクリプト>.prom（node_exporter の textfile collector 用。毎回置き換える）
+    METRICS_PROM_DIR   .prom の置き場（既定: METRICS_DIR）
+    METRICS_PROFILE    cprofile / pyinstrument。実行全体をプロファイルして METRICS_DIR に保存する
+"""
+import functools
+import inspect
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(ROOT, "logs", "metrics")
+PROM_PREFIX = "reboot"
+# 実行の終わりに表示するスパンの数（合計時間の長い順）
+SUMMARY_TOP = 8
+PROFILE_TOP = 25
+
+
+class Metrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # name -> [回数, 合計秒, 最大秒, 例外の回数]
+        self.spans = {}
+        self.counters = Counter()
+        self.gauges = {}
+        # run() の中で main の戻り値を入れる（None / 0 以外なら失敗として書き出す）
+        self.exit_code = None
+
+    def observe(self, name, seconds, count=1, error=False):
+        entry = self.spans.get(name)
+        if entry is None:
+            entry = self.spans[name] = [0, 0.0, 0.0, 0]
+        entry[0] += count
+        entry[1] += seconds
+        if seconds > entry[2]:
+            entry[2] = seconds
+        if error:
+            entry[3] += 1
+
+    @contextmanager
+    def span(self, name):
+        t0 = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - t0, error=error)
+
+    def timed(self, name=None):
+        """関数の実行時間をスパンとして記録するデコレーター（コルーチン関数にも使える）"""
+        def decorate(fn):
+            label = name or fn.__qualname__
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(label):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def incr(self, name, value=1):
+        self.counters[name] += value
+
+    def record(self, prefix, counts):
+        """既存の集計 (dict / Counter) をまとめてカウンターに足す: record("ai", recommender.stats)"""
+        for key, value in counts.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.counters[f"{prefix}.{key}"] += value
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def snapshot(self):
+        return {
+            "spans": {
+                name: {"count": c, "seconds": round(total, 6), "max_seconds": round(peak, 6), "errors": err}
+                for name, (c, total, peak, err) in self.spans.items()
+            },
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+        }
+
+
+# プロセス全体で共有する集計
+METRICS = Metrics()
+span = METRICS.span
+timed = METRICS.timed
+incr = METRICS.incr
+record = METRICS.record
+observe = METRICS.observe
+gauge = METRICS.gauge
+
+
+def _formats():
+    return {f.strip() for f in os.environ.get("METRICS_FORMAT", "jsonl").split(",") if f.strip()}
+
+
+def _metrics_dir():
+    directory = os.environ.get("METRICS_DIR", DEFAULT_DIR)
+    return None if directory.lower() in ("", "off", "0", "none") else directory
+
+
+def write_jsonl(path, script, run_info, snapshot):
+    """1行1メトリクス（run / span / counter / gauge）"""
+    base = {"script": script, "run_id": run_info["run_id"]}
+    lines = [dict(base, type="run", **run_info)]
+    for name, values in sorted(snapshot["spans"].items()):
+        lines.append(dict(base, type="span", name=name, **values))
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(dict(base, type="counter", name=name, value=value))
+    for name, value in sorted(snapshot["gauges"].items()):
+        lines.append(dict(base, type="gauge", name=name, value=value))
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def _prom_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_prom(path, script, run_info, snapshot):
+    """Prometheus のテキスト形式。途中の状態を読まれないように一時ファイルから置き換える"""
+    out = []
+
+    def family(name, kind, help_text, samples):
+        out.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+        out.append(f"# TYPE {PROM_PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{_prom_label(v)}"' for k, v in [("script", script)] + labels)
+            out.append(f"{PROM_PREFIX}_{name}{{{label_text}}} {value}")
+
+    spans = sorted(snapshot["spans"].items())
+    family("run_duration_seconds", "gauge", "Wall time of the last run.", [([], run_info["seconds"])])
+    family("run_success", "gauge", "1 if the last run finished without an exception or a nonzero exit code.",
+           [([], 0 if run_info["error"] else 1)])
+    family("run_exit_code", "gauge", "Exit code of the last run.", [([], run_info["exit_code"])])
+    family("run_timestamp_seconds", "gauge", "Unix time the last run finished.", [([], int(run_info["finished"]))])
+    # 値は実行ごとに0から数え直すので、counter ではなく「前回の実行の値」の gauge にする
+    family("span_seconds", "gauge", "Total seconds spent in each span during the last run.",
+           [([("span", n)], v["seconds"]) for n, v in spans])
+    family("span_count", "gauge", "Times each span was entered during the last run.",
+           [([("span", n)], v["count"]) for n, v in spans])
+    family("span_max_seconds", "gauge", "Longest single span during the last run.",
+           [([("span", n)], v["max_seconds"]) for n, v in spans])
+    family("span_errors", "gauge", "Spans that raised during the last run.",
+           [([("span", n)], v["errors"]) for n, v in spans])
+    family("events", "gauge", "Counters recorded during the last run.",
+           [([("name", n)], v) for n, v in sorted(snapshot["counters"].items())])
+    if snapshot["gauges"]:
+        family("value", "gauge", "Gauges recorded during the last run.",
+               [([("name", n)], v) for n, v in sorted(snapshot["gauges"].items())])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out) + "\n")
+    os.replace(tmp_path, path)
+
+
+def format_summary(snapshot, top=SUMMARY_TOP):
+    spans = sorted(snapshot["spans"].items(), key=lambda item: item[1]["seconds"], reverse=True)[:top]
+    return ", ".join(f"{name} {v['seconds']:.2f}s/{v['count']}" for name, v in spans)
+
+
+class _Profiler:
+    """METRICS_PROFILE=cprofile / pyinstrument（入っていなければ cProfile）"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self._profiler = None
+        if kind == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self._profiler = Profiler(async_mode="enabled")
+            except ImportError:
+                print("⚠️ pyinstrument is not installed. Falling back to cProfile.")
+                self.kind = "cprofile"
+        if self.kind == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self, path_base):
+        """:return: 保存したファイルのパス"""
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            path = path_base + ".pyinstrument.html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._profiler.output_html())
+            print(self._profiler.output_text(unicode=True, color=False), file=sys.stderr)
+            return path
+        import pstats
+        self._profiler.disable()
+        path = path_base + ".pstats"
+        self._profiler.dump_stats(path)
+        pstats.Stats(self._profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        return path
+
+
+@contextmanager
+def run(script):
+    """
+    スクリプトの実行全体を囲む。終わったら（例外でも）メトリクスを書き出し、重いスパンを1行で表示する
+    処理済みの失敗を戻り値で返すスクリプトは、yield された Metrics の exit_code に入れる
+    """
+    METRICS.reset()
+    directory = _metrics_dir()
+    started = time.time()
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+    profile_kind = os.environ.get("METRICS_PROFILE", "").strip().lower()
+    profiler = _Profiler(profile_kind) if profile_kind in ("cprofile", "pyinstrument") else None
+    if profiler:
+        profiler.start()
+    error = None
+    t0 = time.perf_counter()
+    try:
+        yield METRICS
+    except SystemExit as e:
+        METRICS.exit_code = e.code
+        raise
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        seconds = time.perf_counter() - t0
+        # sys.exit と同じく None は成功、int 以外（メッセージ）は失敗
+        exit_code = METRICS.exit_code
+        if not isinstance(exit_code, int):
+            exit_code = 1 if exit_code else 0
+        if error is not None:
+            exit_code = exit_code or 1
+        elif exit_code:
+            error = f"exit code {exit_code}"
+        profile_path = None
+        if profiler:
+            os.makedirs(directory or DEFAULT_DIR, exist_ok=True)
+            profile_path = profiler.stop(os.path.join(directory or DEFAULT_DIR, f"{script}-{run_id}"))
+        snapshot = METRICS.snapshot()
+        run_info = {
+            "run_id": run_id, "started": started, "finished": time.time(), "seconds": round(seconds, 3),
+            "argv": sys.argv[1:], "exit_code": exit_code, "error": error, "profile": profile_path,
+        }
+        written = []
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            formats = _formats()
+            if "jsonl" in formats:
+                path = os.path.join(directory, f"{script}-{run_id}.jsonl")
+                write_jsonl(path, script, run_info, snapshot)
+                written.append(path)
+            if "prom" in formats:
+                prom_dir = os.environ.get("METRICS_PROM_DIR") or directory
+                os.makedirs(prom_dir, exist_ok=True)
+                path = os.path.join(prom_dir, f"{script}.prom")
+                write_prom(path, script, run_info, snapshot)
+                written.append(path)
+        if snapshot["spans"]:
+            print(f"📊 {script} {seconds:.2f}s: {format_summary(snapshot)}")
+        for path in written + ([profile_path] if profile_path else []):
+            print(f"   -> {os.path.relpath(path, ROOT) if path.startswith(ROOT) else path}")
@@ -0,0 +1,368 @@
+"""
+スクレーパーの生出力のストア（圧縮 JSONL のセグメント + マニフェスト）
+
+merge_jobs は各スクレーパーの output/*.json を毎回 glob し、全ファイルの作成日時 (getctime) を見て
+最新を選んでいた。出力ディレクトリは増える一方で、中身は整形済み (indent) の JSON のまま残る。
+ここでは出力を一度だけ取り込み (ingest)、1回の実行分を1つの圧縮セグメントにしてマニフェストで管理する。
+
+    .cache/raw/
+        manifest.json                               セグメントの一覧と、取り込み済みの元ファイル
+        <ソース>/<実行日時>-<sha256先頭8桁>.jsonl.zst   1行1件（zstandard が無ければ .jsonl.gz）
+
+    - マニフェストの各セグメント: ソース・実行日時（元ファイルの作成日時）・件数・サイズ・sha256・元ファイル
+    - 「ソースごとの最新」はマニフェストを引くだけ（出力ディレクトリの全ファイルを stat しない）
+    - 取り込み済みの元ファイルはパスで覚えておき、次回は新しいファイルだけを取り込む
+      （ワイルドカードの無いパスは同じ名前で上書きされるので、大きさと更新日時も比べる）
+    - ソースごとに新しい KEEP_RUNS 回分と、RETENTION_DAYS 日以内のものだけ残す（それより古いものは
+      取り込みもしない）
+    - 読み出しは圧縮セグメントから1行ずつ（展開したファイルは作らない）
+    - 書き込むのは1プロセスだけの前提（merge_jobs か、このファイルの CLI）
+
+    store = RawStore()
+    store.ingest("Infra", "../infra-scraping/output/*.json")
+    entry = store.latest("Infra")
+    for job in store.iter_rows(entry):
+        ...
+
+    python raw_store.py                       # セグメントの一覧とサイズ
+    python raw_store.py ingest [--remove-originals]
+    python raw_store.py verify                # チェックサムと件数の確認
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from json_stream import iter_json_items
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RAW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "raw")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+# ソースごとに必ず残す実行の数と、それ以外も残しておく日数
+KEEP_RUNS = 3
+RETENTION_DAYS = 14
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+# 圧縮器に1回で渡す行数と、読み出しで1回に展開するバイト数
+WRITE_BATCH = 1000
+READ_BLOCK = 1 << 20
+
+CODECS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz"}
+
+
+def default_codec():
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _open_writer(path, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL, write_checksum=True).stream_writer(open(path, "wb"))
+    return gzip.open(path, "wb", compresslevel=GZIP_LEVEL)
+
+
+def _open_reader(path, codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"{path}: zstandard is not installed")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return gzip.open(path, "rb")
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _run_at(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="microseconds")
+
+
+def kept_runs(run_ats, keep=KEEP_RUNS, days=RETENTION_DAYS, now=None):
+    """保持ポリシー: run_ats（1ソース分）のうち残すものの集合"""
+    newest = sorted(run_ats, reverse=True)
+    threshold = ((now or datetime.now()) - timedelta(days=days)).isoformat()
+    return set(newest[:keep]) | {run_at for run_at in newest if run_at >= threshold}
+
+
+class RawStore:
+    def __init__(self, root=RAW_DIR, codec=None, keep=KEEP_RUNS, days=RETENTION_DAYS):
+        self.root = root
+        self.codec = codec or default_codec()
+        self.keep = keep
+        self.days = days
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.segments = []
+        # 取り込み済み（または保持期間外で取り込まなかった）元ファイル: ソース -> {パス: [大きさ, 更新日時 ns]}
+        self.origins = {}
+        self._latest = {}
+        self._dirty = False
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.segments = manifest["segments"]
+                self.origins = manifest["origins"]
+        self._index()
+
+    def _index(self):
+        self._latest = {}
+        for entry in self.segments:
+            current = self._latest.get(entry["source"])
+            if current is None or entry["run_at"] >= current["run_at"]:
+                self._latest[entry["source"]] = entry
+
+    def save(self):
+        """変更があればマニフェストを書き出す（一時ファイルに書いてから置き換える）"""
+        if not self._dirty:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": MANIFEST_VERSION, "segments": self.segments, "origins": self.origins},
+                               ensure_ascii=False))
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+
+    # --- 読み出し ---
+
+    def sources(self):
+        return sorted(self._latest)
+
+    def latest(self, source):
+        """source の最新のセグメント（マニフェストの1項目）。無ければ None"""
+        return self._latest.get(source)
+
+    def path(self, entry):
+        return os.path.join(self.root, entry["path"])
+
+    def iter_rows(self, entry):
+        """
+        セグメントの行を1件ずつ返す
+        READ_BLOCK ずつ展開し、ブロック内の行をまとめて1つの JSON 配列として読む（1行ずつ json.loads するより速い）
+        """
+        with _open_reader(self.path(entry), entry["codec"]) as f:
+            rest = b""
+            while True:
+                block = f.read(READ_BLOCK)
+                if not block:
+                    break
+                block = rest + block
+                cut = block.rfind(b"\n") + 1
+                rest = block[cut:]
+                if cut:
+                    yield from json.loads(b"[" + block[:cut - 1].replace(b"\n", b",") + b"]")
+            if rest.strip():
+                yield json.loads(rest)
+
+    # --- 取り込み ---
+
+    def ingest_file(self, source, origin, run_at=None):
+        """
+        origin（JSON / JSONL）を1つのセグメントとして取り込む
+        途中で読めなくなった場合は、そこまでの行をセグメントにして error に理由を残す
+        （merge_jobs は途中まで読めた分を使う）
+        :return: マニフェストの項目
+        """
+        st = os.stat(origin)
+        run_at = run_at or _run_at(st.st_ctime)
+        directory = os.path.join(self.root, source)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f".{os.getpid()}.tmp")
+        counts = {"rows": 0, "raw_bytes": 0}
+        error = None
+
+        def flush(out, batch):
+            data = ("\n".join(batch) + "\n").encode("utf-8")
+            out.write(data)
+            counts["rows"] += len(batch)
+            counts["raw_bytes"] += len(data)
+            batch.clear()
+
+        try:
+            with _open_writer(tmp_path, self.codec) as out:
+                batch = []
+                try:
+                    for row in iter_json_items(origin):
+                        batch.append(json.dumps(row, ensure_ascii=False))
+                        if len(batch) >= WRITE_BATCH:
+                            flush(out, batch)
+                except Exception as e:
+                    error = str(e)
+                if batch:
+                    flush(out, batch)
+            sha256 = _sha256(tmp_path)
+            name = f"{run_at.replace(':', '').replace('-', '')}-{sha256[:8]}{CODECS[self.codec]}"
+            os.replace(tmp_path, os.path.join(directory, name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        entry = {
+            "source": source,
+            "run_at": run_at,
+            "path": f"{source}/{name}",
+            "codec": self.codec,
+            "rows": counts["rows"],
+            "bytes": os.path.getsize(os.path.join(directory, name)),
+            "raw_bytes": counts["raw_bytes"],
+            "origin_bytes": st.st_size,
+            "sha256": sha256,
+            "origin": origin,
+            "ingested_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        if error:
+            entry["error"] = error
+        self.segments.append(entry)
+        self.origins.setdefault(source, {})[origin] = [st.st_size, st.st_mtime_ns]
+        self._dirty = True
+        self._index()
+        return entry
+
+    def _is_new(self, origins, path, fixed):
+        known = origins.get(path)
+        if known is None:
+            return True
+        if not fixed:
+            return False
+        st = os.stat(path)
+        return known != [st.st_size, st.st_mtime_ns]
+
+    def ingest(self, source, pattern, remove_originals=False):
+        """
+        pattern（glob。merge_jobs.PROJECT_PATHS の値）に一致する元ファイルのうち、まだ取り込んでいないものを取り込む
+        .json と同じ名前の .jsonl も対象（JSONL で出力するスクレーパー用）
+        :param remove_originals: 取り込んだ（または保持期間外だった）元ファイルを消す
+        :return: 取り込んだマニフェストの項目のリスト（古い順）
+        """
+        pattern = os.path.abspath(pattern)
+        patterns = [pattern, os.path.splitext(pattern)[0] + ".jsonl"]
+        fixed = not glob.has_magic(pattern)
+        listed = list(dict.fromkeys(p for pat in patterns for p in glob.glob(pat)))
+        origins = self.origins.setdefault(source, {})
+        new = [p for p in listed if self._is_new(origins, p, fixed)]
+
+        # 消えた元ファイルは覚えておく必要が無い
+        for path in origins.keys() - set(listed):
+            del origins[path]
+            self._dirty = True
+
+        ingested = []
+        if new:
+            runs = {path: _run_at(os.path.getctime(path)) for path in new}
+            existing = [entry["run_at"] for entry in self.segments if entry["source"] == source]
+            keep = kept_runs(existing + list(runs.values()), self.keep, self.days)
+            for path in sorted(new, key=runs.get):
+                if runs[path] in keep:
+                    ingested.append(self.ingest_file(source, path, runs[path]))
+                else:
+                    st = os.stat(path)
+                    origins[path] = [st.st_size, st.st_mtime_ns]
+                    self._dirty = True
+                if remove_originals:
+                    os.remove(path)
+                    del origins[path]
+        self.rotate(source)
+        self.save()
+        return ingested
+
+    def ingest_all(self, sources, remove_originals=False):
+        """:param sources: {ソース名: pattern}  :return: {ソース名: 取り込んだ項目のリスト}"""
+        return {source: self.ingest(source, pattern, remove_originals) for source, pattern in sources.items()}
+
+    # --- 保持 ---
+
+    def rotate(self, source=None):
+        """保持ポリシーから外れたセグメントを消す（source を省略すると全ソース）。:return: 消した項目のリスト"""
+        removed = []
+        for name in ([source] if source else self.sources()):
+            entries = [entry for entry in self.segments if entry["source"] == name]
+            keep = kept_runs([entry["run_at"] for entry in entries], self.keep, self.days)
+            removed += [entry for entry in entries if entry["run_at"] not in keep]
+        if removed:
+            drop = {id(entry) for entry in removed}
+            self.segments = [entry for entry in self.segments if id(entry) not in drop]
+            self._dirty = True
+            for entry in removed:
+                try:
+                    os.remove(self.path(entry))
+                except FileNotFoundError:
+                    pass
+            self._index()
+        return removed
+
+    def verify(self, entry):
+        """チェックサムと件数を確かめる。:return: 問題の説明 or None"""
+        path = self.path(entry)
+        if not os.path.exists(path):
+            return "missing"
+        if _sha256(path) != entry["sha256"]:
+            return "checksum mismatch"
+        rows = sum(1 for _ in self.iter_rows(entry))
+        if rows != entry["rows"]:
+            return f"{rows} rows (manifest: {entry['rows']})"
+        return None
+
+    def usage(self):
+        """:return: (圧縮後の合計バイト数, 元ファイルの合計バイト数)"""
+        return sum(e["bytes"] for e in self.segments), sum(e["origin_bytes"] for e in self.segments)
+
+
+def _fmt_bytes(n):
+    return f"{n / 1024:,.1f} KB" if n < 1 << 20 else f"{n / (1 << 20):,.2f} MB"
+
+
+def main(argv=None):
+    from merge_jobs import PROJECT_PATHS
+
+    parser = argparse.ArgumentParser(description="Ingest scraper outputs into compressed JSONL segments")
+    parser.add_argument("command", nargs="?", default="list", choices=["list", "ingest", "verify", "rotate"])
+    parser.add_argument("--root", default=RAW_DIR)
+    parser.add_argument("--remove-originals", action="store_true",
+                        help="delete scraper output files once they are ingested")
+    args = parser.parse_args(argv)
+
+    store = RawStore(args.root)
+    if args.command == "ingest":
+        for source, entries in store.ingest_all(PROJECT_PATHS, args.remove_originals).items():
+            for entry in entries:
+                print(f"📥 {source}: {entry['origin']} -> {entry['path']} ({entry['rows']} rows, "
+                      f"{_fmt_bytes(entry['origin_bytes'])} -> {_fmt_bytes(entry['bytes'])})")
+    elif args.command == "rotate":
+        removed = store.rotate()
+        store.save()
+        print(f"🧹 Removed {len(removed)} segments")
+    elif args.command == "verify":
+        failed = 0
+        for entry in store.segments:
+            problem = store.verify(entry)
+            if problem:
+                failed += 1
+                print(f"❌ {entry['path']}: {problem}")
+        print(f"✅ {len(store.segments) - failed} of {len(store.segments)} segments ok")
+        if failed:
+            sys.exit(1)
+
+    for source in store.sources():
+        entries = [e for e in store.segments if e["source"] == source]
+        latest = store.latest(source)
+        print(f"🗂️  {source:10s} {len(entries)} runs, latest {latest['run_at']} ({latest['rows']} rows)")
+    compressed, original = store.usage()
+    if original:
+        print(f"   -> {_fmt_bytes(compressed)} on disk (originals {_fmt_bytes(original)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+パイプラインの各ステージをまとめて呼び出す入口
+
+    python -m reboot merge   [merge_jobs.py のオプション]          # スクレーパーの出力 → jobs.json
+    python -m reboot sync    [sync_jobs.py のオプション]           # DB → jobs.json（期限切れの削除も）
+    python -m reboot details [update_job_details.py のオプション]  # 詳細ページ・おすすめ文
+    python -m reboot prune   [--archive file] [--prune-dry-run]    # 期限切れの削除だけ
+    python -m reboot merge -h                                      # ステージごとのオプション
+
+選ばれたサブコマンドのモジュールだけを import する（supabase / openai / playwright / httpx は、
+各ステージの中で実際に使う時点で読み込まれる）。各ステージは最初に安い確認をして、
+やることが無ければ DB クライアント・ブラウザ・駅CSV を用意する前に終わる。
+    merge    新しいスクレーパーの出力が無く、jobs.json・詳細ストア・駅CSV も前回のマージから変わっていない
+    sync     キーが無い / 差分同期で、ウォーターマーク以降に更新された行も反映待ちの削除も無い
+    details  jobs.json が前回の実行から変わっておらず、処理待ちの求人も残っていない
+各スクリプトを直接実行しても同じように動く（python sync_jobs.py）。
+"""
+import argparse
+import asyncio
+import importlib
+import inspect
+import sys
+
+import metrics
+
+# サブコマンド -> (モジュール, main に先頭で渡す引数, メトリクスのスクリプト名, 説明)
+COMMANDS = {
+    "merge": ("merge_jobs", [], "merge_jobs", "merge the latest scraper outputs into src/data/jobs.json"),
+    "sync": ("sync_jobs", [], "sync_jobs", "sync jobs from Supabase into src/data/jobs.json"),
+    "details": ("update_job_details", [], "update_job_details", "fetch job details and AI recommendations"),
+    "prune": ("sync_jobs", ["--prune-only"], "prune_jobs", "only delete expired jobs from Supabase"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m reboot",
+        description="RE:BOOT job pipeline",
+        epilog="\n".join(f"  {name:8s} {help_text}" for name, (_, _, _, help_text) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=list(COMMANDS), metavar="command", help="{" + ",".join(COMMANDS) + "}")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="options passed to the stage (see <command> -h)")
+    return parser
+
+
+def run(command, argv):
+    """ステージのモジュールをここで初めて import し、main(argv) を実行する（async の main も可）"""
+    module_name, prefix, script, _ = COMMANDS[command]
+    module = importlib.import_module(module_name)
+    with metrics.run(script) as m:
+        result = module.main(prefix + argv)
+        if inspect.iscoroutine(result):
+            result = asyncio.run(result)
+        m.exit_code = result
+    return result
+
+
+def main(argv=None):
+    """ステージの main の戻り値（失敗なら 1、成功なら None）をそのまま終了コードにする"""
+    args = build_parser().parse_args(argv)
+    return run(args.command, args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+AIおすすめコメント生成 (非同期・同時実行数制限・再試行・永続キャッシュ付き)
+
+update_job_details.py から使う。OpenAI クライアントは外から渡すので、
+テストやベンチマークでは chat.completions.create を持つモックに差し替えられる。
+
+キャッシュは (PROMPT_VERSION, MODEL, title, summary[:1000]) のハッシュをキーに
+.cache/recommendations.sqlite に保存する。同じ入力には二度と課金しない。
+プロンプトやモデルを変えたら PROMPT_VERSION を上げること。
+"""
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import time
+
+import metrics
+
+MODEL = "gpt-5-nano"
+PROMPT_VERSION = "2025-12-v1"
+SUMMARY_LIMIT = 1000
+MAX_COMPLETION_TOKENS = 8000  # 4000でも足りないケースがあったため倍増
+
+SYSTEM_PROMPT = """あなたは未経験者向け求人サイト「RE:BOOT」の編集部です。
+求人の「一番のウリ（高時給、フルリモート、有名企業、特定のスキル習得など）」を見つけ出し、それを強調したおすすめコメントを100〜150文字程度で作成してください。
+
+# 重要ルール
+- 「成長できる」「やりがいがある」といった**ありきたりな表現は禁止**です。具体的に何が得られるかを書いてください。
+- ターゲットは未経験の大学生です。彼らにとって魅力的なメリット（稼げる、就活に有利など）を具体的に訴求してください。
+- 読み手の目を引くような、少しエッジの効いたキャッチーな書き出しにしてください。
+- 丁寧語（〜です、〜ます）で書きますが、堅苦しくならないようにしてください。
+- 最後に「〜なら今すぐ応募！」「〜したい人におすすめ！」などで行動を促してください。"""
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "recommendations.sqlite")
+
+# 同時に投げるリクエスト数と再試行
+DEFAULT_CONCURRENCY = 4
+MAX_RETRIES = 4
+RETRY_BACKOFF = 1.0
+RETRY_BACKOFF_MAX = 60.0
+# 再試行するHTTPステータス (レート制限とサーバー側の一時的なエラー)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError"}
+
+
+def cache_key(title, summary, model=MODEL, prompt_version=PROMPT_VERSION):
+    raw = "\0".join([prompt_version, model, title or "", (summary or "")[:SUMMARY_LIMIT]])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RecommendationCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS recommendations ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, model TEXT, prompt_version TEXT, created_at REAL)"
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        row = self.conn.execute("SELECT text FROM recommendations WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, text, model=MODEL, prompt_version=PROMPT_VERSION):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO recommendations (key, text, model, prompt_version, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, text, model, prompt_version, time.time()),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def _retry_after(e):
+    """レート制限エラーの Retry-After ヘッダ（秒）を取り出す。無ければ None"""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name in ("retry-after-ms", "retry-after"):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            seconds = float(value)
+        except (TypeError, ValueError):
+            continue
+        return seconds / 1000 if name == "retry-after-ms" else seconds
+    return None
+
+
+def _is_retryable(e):
+    status = getattr(e, "status_code", None)
+    return status in RETRYABLE_STATUS or type(e).__name__ in RETRYABLE_ERRORS
+
+
+class RecommendationGenerator:
+    """
+    recommender = RecommendationGenerator(AsyncOpenAI(api_key=...))
+    text = await recommender.generate(title, summary)
+    """
+
+    def __init__(self, client, cache=None, concurrency=DEFAULT_CONCURRENCY,
+                 max_retries=MAX_RETRIES, backoff=RETRY_BACKOFF, model=MODEL):
+        self.client = client
+        self.cache = cache
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._inflight = {}
+        self.stats = {"cache_hits": 0, "shared": 0, "api_calls": 0, "retries": 0, "failures": 0}
+
+    async def generate(self, title, summary):
+        if not summary:
+            return None
+        key = cache_key(title, summary, self.model)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached:
+                self.stats["cache_hits"] += 1
+                return cached
+        if self.client is None:
+            return None
+
+        # 同じ入力が同時に来た場合は1回のリクエストを共有する
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate_uncached(key, title, summary))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    async def _generate_uncached(self, key, title, summary):
+        async with self._semaphore:
+            text = await self._call_with_retry(title, summary)
+        if text and self.cache is not None:
+            self.cache.put(key, text, self.model)
+        return text
+
+    async def _call_with_retry(self, title, summary):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.stats["api_calls"] += 1
+                # ai.recommendation（待ち時間込み）と分けて、API そのものの応答時間を見る
+                with metrics.span("openai.call"):
+                    return await self._call(title, summary)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    self.stats["failures"] += 1
+                    print(f"⚠️ OpenAI API Error: {e}")
+                    return None
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(RETRY_BACKOFF_MAX, self.backoff * (2 ** attempt))
+                    delay += random.uniform(0, delay / 2)
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+
+    async def _call(self, title, summary):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": f"求人タイトル: {title}\n\n概要:\n{summary[:SUMMARY_LIMIT]}"},
+            ],
+            max_completion_tokens=MAX_COMPLETION_TOKENS,
+        )
+        if response.choices:
+            content = response.choices[0].message.content
+            if content:
+                return content.strip()
+        return None
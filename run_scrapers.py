@@ -0,0 +1,319 @@
+"""
+スクレーパー → DB同期 → 詳細取得 をまとめて実行するオーケストレーター
+
+run_all_scrapers.sh / update_jobs_full.sh は4つのスクレーパーを1つずつ順番に動かしていたが、
+どれも独立した I/O 待ち中心のクロールなので、サブプロセスとして同時に走らせる。
+
+    - 依存関係 (DAG): sync はすべてのスクレーパー（DBへのupsert）が終わってから、
+      details は sync が成功してから
+    - ステージごとのタイムアウト（超えたらプロセスグループごと TERM → KILL）
+    - ステージごとのログファイルと、開始/終了/終了コードを記録する JSONL (logs/<実行ID>/)
+    - 最後に所要時間のまとめを表示し、1つでも失敗があれば終了コード 1
+
+    python run_scrapers.py                  # 毎日の実行: 4スクレーパー並列 → sync_jobs
+    python run_scrapers.py --profile full   # Infra/ZeroOne → sync_jobs → update_job_details
+    python run_scrapers.py --stub           # 実際のスクレーパーの代わりにスタブで動作確認
+    python run_scrapers.py --stub --stub-fail indeed --timeout 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# 各スクレーパーのリポジトリが並んでいるディレクトリ（このリポジトリと同じ階層）
+SCRAPERS_DIR = os.environ.get("SCRAPERS_DIR", os.path.dirname(ROOT))
+LOG_DIR = os.path.join(ROOT, "logs")
+STUB_SCRIPT = os.path.join(ROOT, "benchmarks", "stub_stage.py")
+
+# タイムアウト（秒）
+SCRAPER_TIMEOUT = 2 * 60 * 60
+SYNC_TIMEOUT = 30 * 60
+DETAILS_TIMEOUT = 2 * 60 * 60
+# TERM を送ってから KILL するまでの猶予
+KILL_GRACE = 10
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_TIMEOUT = "timeout"
+STATUS_SKIPPED = "skipped"
+STATUS_ERROR = "error"
+
+
+class Stage:
+    """
+    :param after: これらが終わる（成否を問わない）まで待つ
+    :param requires: これらが成功していなければ実行しない
+    :param needs_venv: cwd/.venv が無ければ実行しない（スクレーパーは各自の仮想環境で動かす）
+    :param args: script に渡す引数
+    """
+
+    def __init__(self, name, cwd, script, timeout, after=(), requires=(), needs_venv=False, args=()):
+        self.name = name
+        self.cwd = cwd
+        self.script = script
+        self.args = list(args)
+        self.timeout = timeout
+        self.after = list(after)
+        self.requires = list(requires)
+        self.needs_venv = needs_venv
+
+    def python(self):
+        venv_python = os.path.join(self.cwd, ".venv", "bin", "python")
+        if os.path.exists(venv_python):
+            return venv_python
+        return None if self.needs_venv else sys.executable
+
+
+SCRAPERS = ["indeed", "kyujin", "infra", "zeroone"]
+
+STAGES = {
+    "indeed": Stage("indeed", os.path.join(SCRAPERS_DIR, "indeed-scraping"), "main.py", SCRAPER_TIMEOUT, needs_venv=True),
+    "kyujin": Stage("kyujin", os.path.join(SCRAPERS_DIR, "kyujin-scraping"), "main.py", SCRAPER_TIMEOUT, needs_venv=True),
+    "infra": Stage("infra", os.path.join(SCRAPERS_DIR, "infra-scraping"), "main.py", SCRAPER_TIMEOUT, needs_venv=True),
+    "zeroone": Stage("zeroone", os.path.join(SCRAPERS_DIR, "zeroone-scraping"), "main.py", SCRAPER_TIMEOUT, needs_venv=True),
+    # 1つのスクレーパーが落ちても、残りの結果は同期する
+    # reboot.py 経由なので、やることが無ければ DB クライアントやブラウザを用意せずにすぐ終わる
+    "sync": Stage("sync", ROOT, "reboot.py", SYNC_TIMEOUT, after=SCRAPERS, args=["sync"]),
+    "details": Stage("details", ROOT, "reboot.py", DETAILS_TIMEOUT, requires=["sync"], args=["details"]),
+}
+
+PROFILES = {
+    # run_all_scrapers.sh 相当
+    "daily": ["indeed", "kyujin", "infra", "zeroone", "sync"],
+    # update_jobs_full.sh 相当
+    "full": ["infra", "zeroone", "sync", "details"],
+}
+
+
+class StageResult:
+    def __init__(self, name, status, exit_code=None, started=None, duration=0.0, log_path=None, reason=None):
+        self.name = name
+        self.status = status
+        self.exit_code = exit_code
+        self.started = started
+        self.duration = duration
+        self.log_path = log_path
+        self.reason = reason
+
+    def to_dict(self):
+        return {
+            "stage": self.name, "status": self.status, "exit_code": self.exit_code,
+            "started": self.started, "duration_sec": round(self.duration, 3),
+            "log": self.log_path, "reason": self.reason,
+        }
+
+
+class EventLog:
+    """ステージの開始・終了を1行1イベントの JSON で記録する"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, event, fields):
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "event": event}
+        record.update(fields)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def check_dag(names):
+    """依存先が存在し、循環していないことを確かめて、実行順（トポロジカル順）を返す"""
+    order = []
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        state[name] = "visiting"
+        stage = STAGES[name]
+        for dep in stage.after + stage.requires:
+            if dep not in STAGES:
+                raise ValueError(f"{name}: unknown dependency {dep}")
+            if dep in names:
+                visit(dep, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in names:
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage: {name}")
+        visit(name, [])
+    return order
+
+
+def _kill_group(proc, sig):
+    try:
+        os.killpg(proc.pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+async def run_stage(stage, command, cwd, log_path, events):
+    started = datetime.now().isoformat(timespec="seconds")
+    t0 = time.perf_counter()
+    events.write("start", {"stage": stage.name, "command": command, "cwd": cwd, "log": log_path})
+    print(f"▶️  [{stage.name}] started: {' '.join(command)}", flush=True)
+
+    with open(log_path, "ab") as log:
+        try:
+            # 新しいセッションで起動し、タイムアウト時はブラウザなどの子プロセスもまとめて止める
+            proc = await asyncio.create_subprocess_exec(
+                *command, cwd=cwd, stdout=log, stderr=asyncio.subprocess.STDOUT,
+                stdin=asyncio.subprocess.DEVNULL, start_new_session=True,
+            )
+        except OSError as e:
+            result = StageResult(stage.name, STATUS_ERROR, started=started, log_path=log_path, reason=str(e))
+            events.write("end", result.to_dict())
+            print(f"❌ [{stage.name}] could not start: {e}", flush=True)
+            return result
+
+        status = None
+        try:
+            exit_code = await asyncio.wait_for(proc.wait(), stage.timeout)
+        except asyncio.TimeoutError:
+            status = STATUS_TIMEOUT
+            _kill_group(proc, signal.SIGTERM)
+            try:
+                exit_code = await asyncio.wait_for(proc.wait(), KILL_GRACE)
+            except asyncio.TimeoutError:
+                _kill_group(proc, signal.SIGKILL)
+                exit_code = await proc.wait()
+        except asyncio.CancelledError:
+            # Ctrl-C などで中断された場合もスクレーパーを置き去りにしない
+            _kill_group(proc, signal.SIGKILL)
+            raise
+
+    duration = time.perf_counter() - t0
+    if status is None:
+        status = STATUS_OK if exit_code == 0 else STATUS_FAILED
+    reason = f"timed out after {stage.timeout}s" if status == STATUS_TIMEOUT else None
+    result = StageResult(stage.name, status, exit_code, started, duration, log_path, reason)
+    events.write("end", result.to_dict())
+    icon = "✅" if status == STATUS_OK else "❌"
+    print(f"{icon} [{stage.name}] {status} in {duration:.1f}s (exit {exit_code})", flush=True)
+    return result
+
+
+async def run_dag(names, build_command, log_dir, events, max_parallel=None):
+    """
+    names のステージを依存関係に従って並列に実行する
+    :param build_command: stage -> (コマンド, 作業ディレクトリ, None)。実行できない場合は (None, None, 理由)
+    """
+    done = {name: asyncio.Event() for name in names}
+    results = {}
+    slots = asyncio.Semaphore(max_parallel or len(names))
+
+    async def run_one(name):
+        stage = STAGES[name]
+        try:
+            for dep in stage.after + stage.requires:
+                if dep in done:
+                    await done[dep].wait()
+
+            failed = [dep for dep in stage.requires
+                      if dep in done and (dep not in results or results[dep].status != STATUS_OK)]
+            command, cwd, reason = build_command(stage)
+            if failed or command is None:
+                reason = f"requires {', '.join(failed)}" if failed else reason
+                results[name] = StageResult(name, STATUS_SKIPPED, reason=reason)
+                events.write("skip", {"stage": name, "reason": reason})
+                print(f"⏭️  [{name}] skipped: {reason}", flush=True)
+                return
+
+            async with slots:
+                results[name] = await run_stage(stage, command, cwd, os.path.join(log_dir, f"{name}.log"), events)
+        except Exception as e:
+            results[name] = StageResult(name, STATUS_ERROR, reason=repr(e))
+            events.write("end", results[name].to_dict())
+            print(f"❌ [{name}] error: {e!r}", flush=True)
+        finally:
+            done[name].set()
+
+    await asyncio.gather(*(run_one(name) for name in names))
+    return [results[name] for name in names]
+
+
+def make_command_builder(args):
+    def build(stage):
+        if args.stub:
+            command = [sys.executable, STUB_SCRIPT, "--name", stage.name, "--sleep", str(args.stub_sleep)]
+            if stage.name in args.stub_fail:
+                command += ["--exit-code", "1"]
+            if stage.name in args.stub_hang:
+                command += ["--hang"]
+            return command, ROOT, None
+
+        python = stage.python()
+        if python is None:
+            return None, None, f"no .venv found in {stage.cwd}"
+        if not os.path.exists(os.path.join(stage.cwd, stage.script)):
+            return None, None, f"{stage.script} not found in {stage.cwd}"
+        return [python, stage.script, *stage.args], stage.cwd, None
+    return build
+
+
+def print_summary(results, wall):
+    print("\n⏱️  Run summary")
+    for r in results:
+        detail = f"exit {r.exit_code}" if r.exit_code is not None else (r.reason or "")
+        if r.reason and r.exit_code is not None:
+            detail += f", {r.reason}"
+        print(f"   {r.name:8s} {r.status:8s} {r.duration:8.1f}s  {detail}")
+    total = sum(r.duration for r in results)
+    print(f"   wall time {wall:.1f}s (sequential would be ~{total:.1f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the scrapers in parallel, then sync (and update details)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="daily")
+    parser.add_argument("--only", nargs="+", metavar="STAGE", help="run just these stages (dependencies still apply)")
+    parser.add_argument("--skip", nargs="+", default=[], metavar="STAGE")
+    parser.add_argument("--max-parallel", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None, help="override every stage timeout (seconds)")
+    parser.add_argument("--log-dir", default=LOG_DIR)
+    parser.add_argument("--stub", action="store_true", help="run benchmarks/stub_stage.py instead of the real commands")
+    parser.add_argument("--stub-sleep", type=float, default=1.0)
+    parser.add_argument("--stub-fail", nargs="+", default=[], metavar="STAGE")
+    parser.add_argument("--stub-hang", nargs="+", default=[], metavar="STAGE")
+    args = parser.parse_args(argv)
+
+    names = [n for n in (args.only or PROFILES[args.profile]) if n not in args.skip]
+    try:
+        names = check_dag(names)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    if args.timeout is not None:
+        for name in names:
+            STAGES[name].timeout = args.timeout
+
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+    log_dir = os.path.join(args.log_dir, run_id)
+    suffix = 1
+    while os.path.exists(log_dir):
+        suffix += 1
+        log_dir = os.path.join(args.log_dir, f"{run_id}-{suffix}")
+    os.makedirs(log_dir)
+    events = EventLog(os.path.join(log_dir, "events.jsonl"))
+
+    print(f"🚀 Run {run_id}: {', '.join(names)} (logs: {log_dir})")
+    t0 = time.perf_counter()
+    results = asyncio.run(run_dag(names, make_command_builder(args), log_dir, events, args.max_parallel))
+    wall = time.perf_counter() - t0
+
+    with open(os.path.join(log_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({"run_id": run_id, "wall_sec": round(wall, 3), "stages": [r.to_dict() for r in results]},
+                  f, indent=2, ensure_ascii=False)
+    print_summary(results, wall)
+    return 0 if all(r.status == STATUS_OK for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
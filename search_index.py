@@ -0,0 +1,374 @@
+"""
+求人の全文検索インデックス（文字2-gram の転置インデックス）
+
+フロントエンドの検索・カテゴリ分け（src/lib/jobUtils.ts の getCategory）は、リクエストのたびに
+全求人のタイトルを走査している。static_export が一覧インデックスと同時にこのファイルを書き出し、
+検索を「ポスティングリストの共通部分」で済ませられるようにする。
+
+    - 語: タイトル・会社名・本文の先頭 SUMMARY_CHARS 文字を正規化（NFKC・小文字）し、
+      記号と空白で区切った各部分の文字2-gram（1文字だけの部分はその1文字）。
+      日本語は単語の区切りが無いので、形態素解析の代わりに2-gram を使う
+    - 絞り込み用の語: "\\0category\\0エンジニア" / "\\0prefecture\\0東京都" / "\\0source\\0Infra"
+      （カテゴリは static_export.job_category で計算済みのもの）
+    - 文書番号: 一覧インデックス (index.json) の並び順と同じ
+    - ポスティングリスト: 文書番号の差分を LEB128 の可変長整数で詰めたもの
+
+ファイル形式（リトルエンディアン。ヘッダの後の各セクションは 8 バイト境界に並べる）:
+    HEADER                        magic, 文書数, 語数, 語ブロブ長, ID ブロブ長, ポスティング長
+    term_offsets  uint32[語数+1]   語ブロブ内の位置（語は UTF-8 でソート済み）
+    post_offsets  uint64[語数+1]   ポスティングの位置
+    doc_freq      uint32[語数]     語を含む文書数（共通部分を小さい順に取るため）
+    id_offsets    uint32[文書数+1] ID ブロブ内の位置
+    語ブロブ / ID ブロブ / ポスティング
+
+    index = SearchIndex.open("public/data/jobs/<build>/search.bin")
+    docs = index.search("データ分析", category="マーケティング", prefecture="東京都")
+    index.ids(docs)
+
+2-gram の AND なので、3文字以上の語では「2-gram は全部含むが続いてはいない」求人も候補に入る
+（取りこぼしは無い）。復号と共通部分の計算は NumPy があればまとめて行う。
+"""
+import mmap
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b"RBSRCH01"
+# magic, n_docs, n_terms, term_blob_len, id_blob_len, postings_len
+HEADER = struct.Struct("<8sqqqqq")
+# 本文はこの文字数まで索引する（長い本文の後半は定型文が多く、索引が大きくなるだけ）
+SUMMARY_CHARS = 200
+TEXT_FIELDS = ("title", "company")
+FACETS = ("category", "prefecture", "source")
+FACET_MARK = "\0"
+
+_SPLIT_RE = re.compile(r"[\s\W_]+")
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _le(values):
+    """array をリトルエンディアンのバイト列に"""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def normalize(text):
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def text_terms(text):
+    """text の語（2-gram と、1文字だけの部分）の集合"""
+    terms = set()
+    for part in _SPLIT_RE.split(normalize(text)):
+        if len(part) == 1:
+            terms.add(part)
+        else:
+            terms.update(part[i:i + 2] for i in range(len(part) - 1))
+    return terms
+
+
+def facet_term(facet, value):
+    return f"{FACET_MARK}{facet}{FACET_MARK}{value}"
+
+
+def job_terms(job, category=None):
+    terms = text_terms(" ".join(job.get(field) or "" for field in TEXT_FIELDS)
+                       + " " + (job.get("summary") or "")[:SUMMARY_CHARS])
+    values = {"category": category, "prefecture": job.get("prefecture"), "source": job.get("source")}
+    terms.update(facet_term(facet, value) for facet, value in values.items() if value)
+    return terms
+
+
+# --- 可変長整数 (LEB128) ---
+
+def encode_varints(values):
+    out = bytearray()
+    for v in values:
+        while v >= 0x80:
+            out.append((v & 0x7F) | 0x80)
+            v >>= 7
+        out.append(v)
+    return bytes(out)
+
+
+def decode_varints(data):
+    values = []
+    v = shift = 0
+    for b in data:
+        v |= (b & 0x7F) << shift
+        if b & 0x80:
+            shift += 7
+        else:
+            values.append(v)
+            v = shift = 0
+    return values
+
+
+def _encode_varints_np(values):
+    """encode_varints() と同じバイト列を NumPy で作る（values: uint32 配列）"""
+    v = values.astype(np.uint64)
+    nbytes = np.ones(len(v), dtype=np.int64)
+    for bits in (7, 14, 21, 28):
+        nbytes += v >= (1 << bits)
+    starts = np.cumsum(nbytes) - nbytes
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(5):
+        has = nbytes > k
+        if not has.any():
+            break
+        byte = (v[has] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (nbytes[has] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[has] + k] = (byte | more).astype(np.uint8)
+    return out, nbytes
+
+
+def _decode_varints_np(data):
+    b = np.frombuffer(data, dtype=np.uint8)
+    if not len(b):
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(b < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # 各バイトの、その値の中での位置（0, 1, 2, ...）
+    group = np.repeat(np.arange(len(starts)), ends - starts + 1)
+    pos = np.arange(len(b)) - starts[group]
+    parts = (b & 0x7F).astype(np.int64) << (7 * pos)
+    return np.add.reduceat(parts, starts)
+
+
+# --- 書き出し ---
+
+class SearchIndexBuilder:
+    """求人を1件ずつ受け取り、語ごとの文書番号を集める（文書番号は add した順）"""
+
+    def __init__(self):
+        self.postings = {}
+        self.ids = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, job, doc_id, category=None):
+        doc = len(self.ids)
+        self.ids.append(doc_id)
+        postings = self.postings
+        for term in job_terms(job, category):
+            docs = postings.get(term)
+            if docs is None:
+                docs = postings[term] = array("I")
+            docs.append(doc)
+
+    def _encode_postings(self, terms):
+        """:return: (ポスティングのバイト列, 各語の開始位置 (語数+1)), 語の並びは terms の順"""
+        offsets = array("Q", [0])
+        if np is not None and terms:
+            lengths = np.fromiter((len(self.postings[t]) for t in terms), dtype=np.int64, count=len(terms))
+            docs = np.frombuffer(b"".join(self.postings[t].tobytes() for t in terms), dtype=np.uint32)
+            gaps = np.diff(docs.astype(np.int64), prepend=0)
+            # 各語の先頭は差分ではなく文書番号そのもの
+            firsts = np.cumsum(lengths) - lengths
+            gaps[firsts] = docs[firsts]
+            data, nbytes = _encode_varints_np(gaps)
+            ends = np.cumsum(np.add.reduceat(nbytes, firsts)) if len(nbytes) else np.zeros(0, dtype=np.int64)
+            offsets.extend(int(x) for x in ends)
+            return data.tobytes(), offsets
+        out = bytearray()
+        for term in terms:
+            prev = 0
+            gaps = []
+            for doc in self.postings[term]:
+                gaps.append(doc - prev)
+                prev = doc
+            out += encode_varints(gaps)
+            offsets.append(len(out))
+        return bytes(out), offsets
+
+    def to_bytes(self):
+        terms = sorted(self.postings, key=lambda t: t.encode("utf-8"))
+        term_blob = bytearray()
+        term_offsets = array("I", [0])
+        for term in terms:
+            term_blob += term.encode("utf-8")
+            term_offsets.append(len(term_blob))
+        id_blob = bytearray()
+        id_offsets = array("I", [0])
+        for doc_id in self.ids:
+            id_blob += str(doc_id).encode("utf-8")
+            id_offsets.append(len(id_blob))
+        postings, post_offsets = self._encode_postings(terms)
+        doc_freq = array("I", (len(self.postings[t]) for t in terms))
+
+        out = bytearray(HEADER.pack(MAGIC, len(self.ids), len(terms), len(term_blob), len(id_blob), len(postings)))
+        for data in (_le(term_offsets), _le(post_offsets), _le(doc_freq), _le(id_offsets), term_blob, id_blob):
+            out += data
+            out += b"\0" * (_align(len(out)) - len(out))
+        out += postings
+        return bytes(out)
+
+
+# --- 検索 ---
+
+class _Table:
+    """UTF-8 ブロブ + オフセット表を文字列のシーケンスとして見せる（bisect 用）"""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+
+def _cast(view, typecode, count):
+    size = count * struct.calcsize(typecode)
+    if sys.byteorder == "big":
+        values = array(typecode, view[:size].tobytes())
+        values.byteswap()
+        return values
+    return view[:size].cast(typecode)
+
+
+class SearchIndex:
+    def __init__(self, data):
+        self._data = data
+        view = memoryview(data)
+        magic, n_docs, n_terms, term_blob_len, id_blob_len, postings_len = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"not a search index (magic {magic!r})")
+        self.n_docs = n_docs
+        offset = _align(HEADER.size)
+        sections = []
+        for typecode, count in (("I", n_terms + 1), ("Q", n_terms + 1), ("I", n_terms), ("I", n_docs + 1)):
+            sections.append(_cast(view[offset:], typecode, count))
+            offset += _align(count * struct.calcsize(typecode))
+        term_offsets, self._post_offsets, self._doc_freq, id_offsets = sections
+        self.terms = _Table(view[offset:offset + term_blob_len], term_offsets)
+        offset += _align(term_blob_len)
+        self._ids = _Table(view[offset:offset + id_blob_len], id_offsets)
+        offset += _align(id_blob_len)
+        self._postings = view[offset:offset + postings_len]
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return self.n_docs
+
+    def _term_id(self, term):
+        i = bisect_left(self.terms, term)
+        return i if i < len(self.terms) and self.terms[i] == term else None
+
+    def doc_freq(self, term):
+        tid = self._term_id(term)
+        return 0 if tid is None else self._doc_freq[tid]
+
+    def _decode(self, tid):
+        data = self._postings[self._post_offsets[tid]:self._post_offsets[tid + 1]]
+        if np is not None:
+            return np.cumsum(_decode_varints_np(data))
+        docs = decode_varints(data)
+        for i in range(1, len(docs)):
+            docs[i] += docs[i - 1]
+        return docs
+
+    def postings(self, term):
+        """term を含む文書番号（昇順）"""
+        tid = self._term_id(term)
+        if tid is None:
+            return np.empty(0, dtype=np.int64) if np is not None else []
+        return self._decode(tid)
+
+    def ids(self, docs):
+        """文書番号 → 求人 ID（static_export.export_id）"""
+        return [self._ids[int(doc)] for doc in docs]
+
+    def _char_docs(self, ch):
+        """1文字の語: その文字を含む語すべての和集合（語の一覧をなめるので遅め）"""
+        tids = [tid for tid in range(len(self.terms)) if ch in self.terms[tid] and self.terms[tid][0] != FACET_MARK]
+        return _union([self._decode(tid) for tid in tids])
+
+    def search(self, query="", category=None, prefecture=None, source=None):
+        """
+        query の語をすべて含み、指定した絞り込みに合う求人の文書番号（昇順）
+        query の空白は AND。何も指定しなければ全件
+        """
+        query_terms = sorted(text_terms(query))
+        terms = [term for term in query_terms if len(term) > 1]
+        chars = [term for term in query_terms if len(term) == 1]
+        facets = {"category": category, "prefecture": prefecture, "source": source}
+        terms += [facet_term(facet, value) for facet, value in facets.items() if value]
+        if not terms and not chars:
+            return list(range(self.n_docs))
+
+        tids = []
+        for term in terms:
+            tid = self._term_id(term)
+            if tid is None:
+                return []
+            tids.append(tid)
+        # 件数の少ない語から共通部分を取り、空になったらそこで止める
+        tids.sort(key=lambda tid: self._doc_freq[tid])
+        result = None
+        for tid in tids:
+            result = self._decode(tid) if result is None else _intersect(result, self._decode(tid))
+            if not len(result):
+                return []
+        for ch in chars:
+            docs = self._char_docs(ch)
+            result = docs if result is None else _intersect(result, docs)
+            if not len(result):
+                return []
+        return result.tolist() if np is not None else list(result)
+
+
+def _intersect(a, b):
+    if np is not None:
+        return np.intersect1d(a, b, assume_unique=True)
+    small, large = (a, b) if len(a) <= len(b) else (b, a)
+    keep = set(small)
+    return [doc for doc in large if doc in keep]
+
+
+def _union(lists):
+    if np is not None:
+        return np.unique(np.concatenate(lists)) if lists else np.empty(0, dtype=np.int64)
+    return sorted(set().union(*lists))
+
+
+def main(argv=None):
+    import time
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python search_index.py <search.bin> [検索語] [category=...] [prefecture=...] [source=...]")
+        return
+    index = SearchIndex.open(argv[0])
+    query = " ".join(arg for arg in argv[1:] if "=" not in arg)
+    filters = dict(arg.split("=", 1) for arg in argv[1:] if "=" in arg)
+    t0 = time.perf_counter()
+    docs = index.search(query, **filters)
+    elapsed = time.perf_counter() - t0
+    print(f"🔎 {len(docs)} of {len(index)} jobs ({elapsed * 1000:.2f} ms)")
+    for doc_id in index.ids(docs[:20]):
+        print(f"   {doc_id}")
+
+
+if __name__ == "__main__":
+    main()
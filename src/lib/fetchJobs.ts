@@ -10,6 +10,15 @@ export type Job = {
     link: string | null;
     url?: string | null;
     prefecture?: string;
+    // sync_jobs.py / merge_jobs.py が駅を特定できた場合のみ（station_geo.py）
+    station?: string;
+    lat?: number;
+    lon?: number;
+    hub?: string;
+    hub_km?: number;
+    // 別サイトにも載っていた同じ求人をまとめた場合のみ（job_dedup.py）
+    cluster_id?: string;
+    cluster_size?: number;
     source?: string;
     site_name?: string;
     image_url?: string | null;
@@ -33,12 +42,26 @@ const PREF_CODE_MAP: Record<number, string> = {
 
 const PREF_NAMES = Object.values(PREF_CODE_MAP);
 
+// 同じ勤務地文字列は何度も出てくるので、判定結果をプロセス内で覚えておく（上限を超えたら古いものから捨てる）
+const PREF_CACHE_LIMIT = 5000;
+const prefCache = new Map<string, string | undefined>();
+
 function detectPrefecture(location: string | null): string | undefined {
     if (!location) return undefined;
+    if (prefCache.has(location)) return prefCache.get(location);
+
+    let found: string | undefined;
     for (const pref of PREF_NAMES) {
-        if (location.includes(pref)) return pref;
+        if (location.includes(pref)) {
+            found = pref;
+            break;
+        }
+    }
+    if (prefCache.size >= PREF_CACHE_LIMIT) {
+        prefCache.delete(prefCache.keys().next().value as string);
     }
-    return undefined;
+    prefCache.set(location, found);
+    return found;
 }
 
 function processJob(job: Job): Job {
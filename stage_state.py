@@ -0,0 +1,44 @@
+"""
+各ステージの「前回の実行」の記録（.cache/<ステージ>_state.json）
+
+merge_jobs / update_job_details は、入力が前回の実行から何も変わっていなければ、
+駅CSV・ブラウザ・OpenAI クライアントを用意する前に終わる（reboot.py から毎回呼ばれても安い）。
+入力はファイルの stat（サイズと更新時刻）で比べるので、中身を読まずに判定できる。
+
+    inputs = {"jobs": file_stamp(DATA_FILE), "options": [...]}
+    if inputs == load_state(STATE_FILE).get("inputs"):
+        return                                       # 何もすることがない
+    ...
+    save_state(STATE_FILE, {"inputs": {...書き出した後の stat...}})
+
+判定に含めていないもの（フィルタのキーワードなどコード側の変更）を反映させたい時は --force で実行する。
+"""
+import json
+import os
+
+
+def file_stamp(path):
+    """[サイズ, 更新時刻 (ns)]。ファイルが無ければ None（JSON に保存して比べるのでリスト）"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(path, state):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,318 @@
+"""
+静的配信用の求人エクスポート（一覧インデックス + 詳細シャード）
+
+src/data/jobs.json は summary や recommendation まで含んだ整形済み (indent=2) の1ファイルなので、
+一覧ページでもタイトルと勤務地のために全件を読み込むことになる。そこで次の形でも書き出す。
+
+    public/data/jobs/
+        current.json                   今のビルドを指すマニフェスト（これだけ置き換える）
+        <ビルドID>/index.json          一覧用: id, title, company, prefecture, source, category
+        <ビルドID>/d/<id先頭2桁>.json   詳細: {id: 求人, ...}（id は merge_jobs と同じリンクの md5）
+        <ビルドID>/search.bin          全文検索インデックス（search_index.py。文書番号は index.json の並び順）
+
+    - JSON はすべて空白なし (separators=(",", ":"))
+    - 各ファイルの隣に .gz（と brotli が入っていれば .br）を事前圧縮して置く
+    - 一時ディレクトリに組み立ててから rename し、最後に current.json を os.replace するので、
+      書きかけのファイルが配信されることはない。古いビルドは KEEP_BUILDS 個だけ残す
+
+    with ShardedExport() as export:
+        count = write_json_array(OUTPUT_FILE, export.tee(jobs))
+    print_report(export.report)
+
+    # 中身が前回と同じなら jobs.json も静的エクスポートも書き換えない
+    count, changes, report = write_exports(OUTPUT_FILE, jobs)
+
+    python static_export.py [jobs.json]   # 既存の jobs.json から作り直す
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+
+from fingerprint import ChangeTracker, load_fingerprints
+from json_stream import iter_json_items, write_json_array
+from search_index import SearchIndexBuilder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public", "data", "jobs")
+MANIFEST_NAME = "current.json"
+SEARCH_NAME = "search.bin"
+# 詳細シャードは id (md5) の先頭何文字でまとめるか（2 → 最大256ファイル）
+SHARD_PREFIX_LEN = 2
+# 残しておく過去のビルド数（配信中に current.json が切り替わっても読み終えられるように）
+KEEP_BUILDS = 2
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+INDEX_FIELDS = ["id", "title", "company", "prefecture", "source"]
+
+# src/lib/jobUtils.ts の getCategory と同じ判定（キーワードの重複も含めてそのまま）
+CATEGORY_DEFINITIONS = [
+    ("エンジニア", ["エンジニア", "engineer", "python", "java", "ruby", "php", "go", "react", "next", "vue", "aws", "開発", "技術", "プログラマ", "技術", "テック", "tech", "ai", "機械学習"]),
+    ("デザイナー", ["デザイン", "デザイナー", "design", "ui", "ux", "figma", "adobe", "photoshop", "illustrator", "クリエイティブ", "アート", "制作"]),
+    ("マーケティング", ["マーケ", "広報", "sns", "seo", "ads", "広告", "リサーチ", "分析", "ブランディング", "pr", "marketing"]),
+    ("編集/ライター", ["編集", "ライター", "writer", "editor", "記事", "執筆", "メディア", "コンテンツ", "書籍"]),
+    ("企画", ["企画", "プランナー", "ディレクター", "pm", "プロダクトマネージャー", "planning", "direction", "ディレクション", "事業開発", "プロデュース"]),
+    ("営業", ["営業", "セールス", "sales", "business", "ビジネス", "商談", "アポ", "インサイドセールス", "コンサルティング", "提案"]),
+]
+
+
+def job_category(title):
+    t = (title or "").lower()
+    best, max_score = "その他", 0
+    for name, keywords in CATEGORY_DEFINITIONS:
+        score = 0
+        for k in keywords:
+            if k in t:
+                score += 1
+                if name == "マーケティング" and k in ("マーケ", "マーケティング"):
+                    score += 2
+        if score > max_score:
+            best, max_score = name, score
+    return best
+
+
+def export_id(job):
+    """merge_jobs と同じリンクの md5。DB の行 (sync_jobs) は uuid を持っているので url から作り直す"""
+    link = job.get("link") or job.get("url")
+    if link:
+        return hashlib.md5(link.encode("utf-8")).hexdigest()
+    return job.get("id")
+
+
+def dumps_min(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _write_compressed(path, data, compress):
+    """path に data を書き、圧縮版を隣に置く。:return: {"raw": バイト数, "gzip": ..., "br": ...}"""
+    with open(path, "wb") as f:
+        f.write(data)
+    sizes = {"raw": len(data)}
+    if "gzip" in compress:
+        packed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+        with open(path + ".gz", "wb") as f:
+            f.write(packed)
+        sizes["gzip"] = len(packed)
+    if "br" in compress and brotli is not None:
+        packed = brotli.compress(data, quality=BROTLI_QUALITY)
+        with open(path + ".br", "wb") as f:
+            f.write(packed)
+        sizes["br"] = len(packed)
+    return sizes
+
+
+def _add_sizes(total, sizes):
+    for key, value in sizes.items():
+        total[key] = total.get(key, 0) + value
+
+
+class ShardedExport:
+    """
+    求人を1件ずつ受け取り、一覧インデックスと詳細シャードを組み立てる
+    詳細は受け取った時点でシャードのファイルへ追記するので、メモリに残るのは一覧用の項目だけ
+    """
+
+    def __init__(self, out_dir=EXPORT_DIR, compress=("gzip", "br"), prefix_len=SHARD_PREFIX_LEN, search=True):
+        self.out_dir = out_dir
+        self.compress = tuple(compress)
+        self.prefix_len = prefix_len
+        self.build_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f") + f"-{os.getpid()}"
+        self.staging = os.path.join(out_dir, f".{self.build_id}.tmp")
+        self.index = []
+        self.seen = set()
+        self.duplicates = 0
+        self.report = None
+        self._shards = {}
+        self.search = SearchIndexBuilder() if search else None
+        os.makedirs(os.path.join(self.staging, "d"))
+
+    def add(self, job):
+        key = export_id(job)
+        if not key:
+            return
+        if key in self.seen:
+            # 同じリンクが2回来た場合は最初の1件（merge_jobs の dedup と同じ）
+            self.duplicates += 1
+            return
+        self.seen.add(key)
+
+        row = {field: job.get(field) for field in INDEX_FIELDS}
+        row["id"] = key
+        row["category"] = job_category(job.get("title"))
+        self.index.append(row)
+        if self.search is not None:
+            self.search.add(job, key, row["category"])
+
+        prefix = key[:self.prefix_len]
+        f = self._shards.get(prefix)
+        if f is None:
+            f = self._shards[prefix] = open(os.path.join(self.staging, "d", f"{prefix}.json"), "w", encoding="utf-8")
+            f.write("{")
+        else:
+            f.write(",")
+        detail = dict(job)
+        detail["id"] = key
+        f.write(dumps_min(key) + ":" + dumps_min(detail))
+
+    def tee(self, rows):
+        """rows をそのまま流しながら、1件ずつ add する（write_json_array と同時に使う）"""
+        for row in rows:
+            self.add(row)
+            yield row
+
+    def _finish_shards(self):
+        shard_sizes = {"files": len(self._shards), "largest": 0, "raw": 0}
+        for prefix, f in self._shards.items():
+            f.write("}")
+            f.close()
+            path = os.path.join(self.staging, "d", f"{prefix}.json")
+            with open(path, "rb") as f:
+                data = f.read()
+            sizes = _write_compressed(path, data, self.compress)
+            _add_sizes(shard_sizes, sizes)
+            shard_sizes["largest"] = max(shard_sizes["largest"], sizes["raw"])
+        self._shards = {}
+        return shard_sizes
+
+    def commit(self):
+        """ビルドを確定して current.json を切り替える。:return: サイズのレポート"""
+        shard_sizes = self._finish_shards()
+        index_sizes = _write_compressed(
+            os.path.join(self.staging, "index.json"), dumps_min(self.index).encode("utf-8"), self.compress
+        )
+        sizes = {"index": index_sizes, "detail": shard_sizes}
+        if self.search is not None:
+            sizes["search"] = _write_compressed(
+                os.path.join(self.staging, SEARCH_NAME), self.search.to_bytes(), self.compress
+            )
+        build_dir = os.path.join(self.out_dir, self.build_id)
+        os.rename(self.staging, build_dir)
+
+        self.report = {
+            "build": self.build_id,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "count": len(self.index),
+            "duplicates": self.duplicates,
+            "index": f"{self.build_id}/index.json",
+            "detail": f"{self.build_id}/d/{{prefix}}.json",
+            "search": f"{self.build_id}/{SEARCH_NAME}" if self.search is not None else None,
+            "shard_prefix_len": self.prefix_len,
+            "compression": [c for c in self.compress if c != "br" or brotli is not None],
+            "sizes": sizes,
+        }
+        manifest = os.path.join(self.out_dir, MANIFEST_NAME)
+        tmp_path = manifest + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest)
+        self._prune()
+        return self.report
+
+    def abort(self):
+        for f in self._shards.values():
+            f.close()
+        self._shards = {}
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def _prune(self):
+        """current.json が指すものを含めて新しい順に KEEP_BUILDS 個だけ残す（組み立て中の "." 始まりは触らない）"""
+        builds = sorted(
+            name for name in os.listdir(self.out_dir)
+            if not name.startswith(".") and os.path.isdir(os.path.join(self.out_dir, name))
+        )
+        for name in builds[:-KEEP_BUILDS]:
+            if name != self.build_id:
+                shutil.rmtree(os.path.join(self.out_dir, name), ignore_errors=True)
+
+    def published(self):
+        return os.path.exists(os.path.join(self.out_dir, MANIFEST_NAME))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+def write_exports(path, rows, static_export=True, out_dir=EXPORT_DIR):
+    """
+    jobs.json（path）と静的エクスポートを書き出す
+    前回の jobs.json と求人ごとのフィンガープリントを比べ、追加・変更・削除・並び替えが1件も無ければ
+    どちらも置き換えない（ファイルの更新日時が変わらないのでフロントエンドのビルドキャッシュが効く）
+    :return: (件数, ChangeTracker, 静的エクスポートのレポート or None)
+    """
+    changes = ChangeTracker(load_fingerprints(path))
+    rows = changes.track(rows)
+    export = ShardedExport(out_dir) if static_export else None
+    if export:
+        rows = export.tee(rows)
+
+    def replace_if():
+        changes.finish()
+        return changes.modified
+
+    try:
+        count = write_json_array(path, rows, replace_if=replace_if)
+    except BaseException:
+        if export:
+            export.abort()
+        raise
+    report = None
+    if export:
+        # 前回のビルドが無い場合（初回・削除された場合）は変更が無くても作る
+        if changes.modified or not export.published():
+            report = export.commit()
+        else:
+            export.abort()
+    return count, changes, report
+
+
+def _fmt_bytes(n):
+    return f"{n / 1024:,.1f} KB" if n < 1 << 20 else f"{n / (1 << 20):,.2f} MB"
+
+
+def print_report(report, full_export=None):
+    """
+    書き出したサイズを表示する（ビルドログでページ重量の推移を追えるように）
+    :param full_export: 比較用に、従来の jobs.json のパス
+    """
+    if report is None:
+        return
+    sizes = report["sizes"]
+    print(f"📦 Static export {report['build']}: {report['count']} jobs")
+    for label, key in (("index", "index"), ("detail", "detail"), ("search", "search")):
+        s = sizes.get(key)
+        if s is None:
+            continue
+        parts = [f"raw {_fmt_bytes(s['raw'])}"]
+        parts += [f"{c} {_fmt_bytes(s[c])}" for c in ("gzip", "br") if c in s]
+        if key == "detail":
+            parts.append(f"{s['files']} shards, largest {_fmt_bytes(s['largest'])}")
+        print(f"   -> {label:6s}: {', '.join(parts)}")
+    if full_export and os.path.exists(full_export):
+        print(f"   -> (jobs.json: {_fmt_bytes(os.path.getsize(full_export))})")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    source = argv[0] if argv else os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "data", "jobs.json")
+    with ShardedExport() as export:
+        for job in iter_json_items(source):
+            export.add(job)
+    print_report(export.report, source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+"""
+駅の位置情報（緯度経度）による勤務地の解決と、半径検索
+
+station20251211free.csv の lon / lat / line_cd / station_g_cd から、駅グループ（乗り換えで
+同じ駅として扱われる station_g_cd の単位）ごとの座標・路線数を持つ。
+配列は station_index のインデックスファイルに一緒に書き出され、起動時は mmap で読むだけになる。
+
+    - 勤務地の解決: "府中駅・調布駅" のように同名の駅が複数の都道府県にある場合、
+      同じ文字列に出てくる他の駅との距離や市区町村名（"府中市"）で候補を絞る。
+      どれも無ければ従来通り PREF_PRIORITY の順
+    - 最寄りの主要駅: 路線数が HUB_MIN_LINES 以上の駅のうち一番近いもの（ビルド時に計算済み）
+    - 半径検索: 格子状のグリッドで候補を絞り、距離は NumPy があればまとめて計算する
+
+    loc = resolve_location("府中駅徒歩5分・調布駅", index.matcher, index.geo, PREF_CODE_MAP, PREF_PRIORITY)
+    loc.prefecture, index.geo.fields(loc.station_id, loc.name_id)   # 東京都, {"station": "府中", "lat": ..., "hub": "新宿", ...}
+
+    jobs = JobGeoIndex(iter_json_items("src/data/jobs.json"))
+    jobs.near_station(index.geo, "渋谷", 3)             # 渋谷から3km以内の求人（近い順）
+
+    python station_geo.py 渋谷 3 [jobs.json]
+"""
+import math
+import os
+import re
+import sys
+import time
+from array import array
+from typing import NamedTuple
+
+from station_matcher import pick_prefecture
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+# この本数以上の路線が乗り入れる駅を「主要駅」とする（新宿・渋谷・大宮・天王寺・博多など全国で約50駅）
+HUB_MIN_LINES = 5
+# 半径検索のグリッドの1マス（度）。緯度0.05度 ≒ 5.6km
+GRID_DEG = 0.05
+# CSV の e_status: 0 = 営業中（1 = 開業前, 2 = 廃止 は位置情報に含めない）
+OPEN_STATUS = "0"
+
+# 住所の先頭の市区町村（"名古屋市熱田区…" → "名古屋市", "山越郡長万部町字…" → "山越郡長万部町"）
+_CITY_RE = re.compile(r"^((?:.+?郡)?.+?[市区町村])")
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _haversine_np(lat, lon, lats, lons):
+    p1, p2 = np.radians(lat), np.radians(lats)
+    dp, dl = p2 - p1, np.radians(lons - lon)
+    a = np.sin(dp / 2) ** 2 + math.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def city_of(address, pref_names=()):
+    """住所から先頭の市区町村名を取り出す（都道府県名が付いていれば外す）"""
+    for pref in pref_names:
+        if address.startswith(pref):
+            address = address[len(pref):]
+            break
+    m = _CITY_RE.match(address)
+    return m.group(1) if m else ""
+
+
+class GeoGrid:
+    """
+    点 (lat, lon) の集合に対する半径検索・最近傍検索
+    点を GRID_DEG 四方のマスに振り分けておき、検索円に掛かるマスの点だけ距離を測る
+    """
+
+    def __init__(self, lats, lons, cell_deg=GRID_DEG):
+        self.cell_deg = cell_deg
+        self.lats = lats
+        self.lons = lons
+        if np is not None:
+            self._lats = np.asarray(lats, dtype=np.float64)
+            self._lons = np.asarray(lons, dtype=np.float64)
+        cells = {}
+        for i in range(len(lats)):
+            cells.setdefault(self._cell(lats[i], lons[i]), []).append(i)
+        if np is not None:
+            cells = {key: np.array(ids, dtype=np.int64) for key, ids in cells.items()}
+        self.cells = cells
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def _candidates(self, lat, lon, km):
+        """検索円を囲む矩形に掛かるマスの点の番号"""
+        dlat = km / 111.32
+        dlon = km / max(1e-6, 111.32 * math.cos(math.radians(lat)))
+        r0, c0 = self._cell(lat - dlat, lon - dlon)
+        r1, c1 = self._cell(lat + dlat, lon + dlon)
+        found = [
+            self.cells[key]
+            for key in ((r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1))
+            if key in self.cells
+        ]
+        if np is not None:
+            return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+        return [i for ids in found for i in ids]
+
+    def within(self, lat, lon, km):
+        """lat, lon から km 以内の点を近い順に [(番号, 距離km)]"""
+        ids = self._candidates(lat, lon, km)
+        if len(ids) == 0:
+            return []
+        if np is not None:
+            dist = _haversine_np(lat, lon, self._lats[ids], self._lons[ids])
+            keep = dist <= km
+            ids, dist = ids[keep], dist[keep]
+            order = np.argsort(dist, kind="stable")
+            return list(zip(ids[order].tolist(), dist[order].tolist()))
+        hits = []
+        for i in ids:
+            d = haversine_km(lat, lon, self.lats[i], self.lons[i])
+            if d <= km:
+                hits.append((i, d))
+        hits.sort(key=lambda hit: hit[1])
+        return hits
+
+    def nearest(self, lat, lon, max_km=50.0):
+        """一番近い点 (番号, 距離km)。max_km 以内に無ければ None"""
+        km = self.cell_deg * 111.32
+        while True:
+            hits = self.within(lat, lon, min(km, max_km))
+            if hits:
+                return hits[0]
+            if km >= max_km:
+                return None
+            km *= 2
+
+
+class StationGeo:
+    """
+    駅グループ（以下「駅」）ごとの配列と、駅名 (StationMatcher.names の番号) → 駅 の対応
+        lat, lon, pref, lines   : 座標・JIS 都道府県コード・乗り入れ路線数
+        hub, name_id            : 最寄りの主要駅の番号・表示名の駅名番号
+        name_start, name_ids    : 駅名 pid の駅は name_ids[name_start[pid]:name_start[pid + 1]]
+        cities                  : 駅の住所の市区町村名（station_index.NameTable など、番号で引けるもの）
+    """
+
+    def __init__(self, names, lat, lon, pref, lines, hub, name_id, name_start, name_ids, cities):
+        self.names = names
+        self.lat = lat
+        self.lon = lon
+        self.pref = pref
+        self.lines = lines
+        self.hub = hub
+        self.name_id = name_id
+        self.name_start = name_start
+        self.name_ids = name_ids
+        self.cities = cities
+        self._grid = None
+
+    def __len__(self):
+        return len(self.lat)
+
+    @classmethod
+    def build(cls, rows, names, pref_code_map):
+        """
+        :param rows: CSV の行 (dict) のイテラブル
+        :param names: StationMatcher.names（昇順の駅名）
+        """
+        pid_of = {name: pid for pid, name in enumerate(names)}
+        pref_names = list(pref_code_map.values())
+        groups = {}
+        for row in rows:
+            if row.get("e_status", OPEN_STATUS) != OPEN_STATUS or int(row["pref_cd"]) not in pref_code_map:
+                continue
+            try:
+                lat, lon = float(row["lat"]), float(row["lon"])
+            except (KeyError, ValueError):
+                continue
+            group = groups.setdefault(row["station_g_cd"], {
+                "rows": 0, "lat": 0.0, "lon": 0.0, "pref": int(row["pref_cd"]), "names": {},
+                "lines": set(), "city": city_of(row.get("address") or "", pref_names),
+            })
+            group["rows"] += 1
+            group["lat"] += lat
+            group["lon"] += lon
+            group["lines"].add(row.get("line_cd"))
+            group["names"][row["station_name"]] = group["names"].get(row["station_name"], 0) + 1
+
+        lat, lon, pref, lines, name_id = array("d"), array("d"), array("i"), array("i"), array("i")
+        cities = []
+        stations_of = [[] for _ in names]
+        for code in sorted(groups):
+            group = groups[code]
+            sid = len(lat)
+            lat.append(group["lat"] / group["rows"])
+            lon.append(group["lon"] / group["rows"])
+            pref.append(group["pref"])
+            lines.append(len(group["lines"]))
+            cities.append(group["city"])
+            # 表示名は一番多くの路線で使われている名前（同数なら短い方: "富山駅" より "富山"）
+            display = max(group["names"], key=lambda name: (group["names"][name], -len(name), name))
+            name_id.append(pid_of.get(display, -1))
+            for name in group["names"]:
+                pid = pid_of.get(name)
+                if pid is not None:
+                    stations_of[pid].append(sid)
+
+        name_start, name_ids = array("I", [0]), array("i")
+        for sids in stations_of:
+            name_ids.extend(sids)
+            name_start.append(len(name_ids))
+
+        hub = cls._nearest_hubs(lat, lon, lines)
+        return cls(names, lat, lon, pref, lines, hub, name_id, name_start, name_ids, cities)
+
+    @staticmethod
+    def _nearest_hubs(lat, lon, lines):
+        hubs = [sid for sid in range(len(lat)) if lines[sid] >= HUB_MIN_LINES]
+        hub = array("i", [-1]) * len(lat)
+        if not hubs:
+            return hub
+        if np is not None:
+            hub_lats = np.array([lat[h] for h in hubs])
+            hub_lons = np.array([lon[h] for h in hubs])
+            for sid in range(len(lat)):
+                hub[sid] = hubs[int(np.argmin(_haversine_np(lat[sid], lon[sid], hub_lats, hub_lons)))]
+            return hub
+        for sid in range(len(lat)):
+            hub[sid] = min(hubs, key=lambda h: haversine_km(lat[sid], lon[sid], lat[h], lon[h]))
+        return hub
+
+    def stations_for(self, pid):
+        return self.name_ids[self.name_start[pid]:self.name_start[pid + 1]]
+
+    def station_name(self, sid):
+        pid = self.name_id[sid]
+        return self.names[pid] if pid >= 0 else None
+
+    def distance_km(self, a, b):
+        return haversine_km(self.lat[a], self.lon[a], self.lat[b], self.lon[b])
+
+    def find_station(self, name, pref=None):
+        """駅名から駅を1つ（同名が複数あれば乗り入れ路線の多い方）。pref は JIS コード"""
+        lo, hi = 0, len(self.names)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.names[mid] < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo >= len(self.names) or self.names[lo] != name:
+            return None
+        sids = [sid for sid in self.stations_for(lo) if pref is None or self.pref[sid] == pref]
+        return max(sids, key=lambda sid: self.lines[sid]) if sids else None
+
+    def fields(self, sid, pid=-1):
+        """エクスポートに載せる位置情報。pid（勤務地に書かれていた駅名）があれば駅名はそれを使う"""
+        hub = self.hub[sid]
+        fields = {
+            "station": self.names[pid] if pid >= 0 else self.station_name(sid),
+            "lat": round(self.lat[sid], 5),
+            "lon": round(self.lon[sid], 5),
+        }
+        if hub >= 0:
+            fields["hub"] = self.station_name(hub)
+            fields["hub_km"] = round(self.distance_km(sid, hub), 1)
+        return fields
+
+    @property
+    def grid(self):
+        if self._grid is None:
+            self._grid = GeoGrid(self.lat, self.lon)
+        return self._grid
+
+    def nearest_station(self, lat, lon, max_km=50.0):
+        """座標から一番近い駅 (番号, 距離km)"""
+        return self.grid.nearest(lat, lon, max_km)
+
+
+class Resolution(NamedTuple):
+    prefecture: object      # 都道府県名 or None
+    station_id: int = -1    # StationGeo の駅番号（位置が決まらなければ -1）
+    name_id: int = -1       # 勤務地に書かれていた駅名の番号（"梅田" → 駅は "大阪" のグループ）
+
+    def encode(self):
+        """LocationCache に文字列で保存する形（"東京都\t123\t45"）。都道府県不明は None"""
+        if self.prefecture is None:
+            return None
+        if self.station_id < 0:
+            return self.prefecture
+        return f"{self.prefecture}\t{self.station_id}\t{self.name_id}"
+
+    @classmethod
+    def decode(cls, value):
+        if value is None:
+            return cls(None)
+        pref, _, rest = value.partition("\t")
+        if not rest:
+            return cls(pref)
+        sid, _, pid = rest.partition("\t")
+        return cls(pref, int(sid), int(pid))
+
+
+def _priority_rank(code, pref_code_map, priority):
+    pref = pref_code_map.get(code)
+    return priority.index(pref) if pref in priority else len(priority) + code
+
+
+def resolve_location(location, matcher, geo, pref_code_map, priority, direct_pref=None):
+    """
+    勤務地の文字列から都道府県と駅を決める
+    :param direct_pref: 文字列に直接含まれていた都道府県名（あれば候補をその都道府県に絞る）
+    候補の駅は次の順で選ぶ
+        1. 文字列に含まれる市区町村名と住所が合う
+        2. 文字列に出てくる他の駅との距離の合計が小さい（"府中駅・調布駅" なら東京の府中）
+        3. PREF_PRIORITY の順（無ければ JIS コード順）→ 先に書かれた駅名 → 乗り入れ路線の多い順
+    """
+    # 都道府県名の中の駅名（"東京都" の "東京"）は拾わない
+    pids = matcher.find(location.replace(direct_pref, "\n") if direct_pref else location)
+    if not pids:
+        return Resolution(direct_pref)
+    direct_code = None
+    if direct_pref:
+        direct_code = next((code for code, name in pref_code_map.items() if name == direct_pref), None)
+
+    # 駅名ごとの候補の駅（出てきた順）
+    candidates = []
+    if geo is not None:
+        for pid in dict.fromkeys(pids):
+            sids = [sid for sid in geo.stations_for(pid) if direct_code is None or geo.pref[sid] == direct_code]
+            if sids:
+                candidates.append((pid, sids))
+    if not candidates:
+        if direct_pref:
+            return Resolution(direct_pref)
+        mask = 0
+        for pid in pids:
+            mask |= matcher.pref_masks[pid]
+        return Resolution(pick_prefecture(mask, pref_code_map, priority))
+
+    if len(candidates) == 1 and len(candidates[0][1]) == 1:
+        # 候補が1駅だけ（大半の勤務地）
+        pid, (sid,) = candidates[0]
+        return Resolution(direct_pref or pref_code_map[geo.pref[sid]], sid, pid)
+
+    best = None
+    for i, (pid, sids) in enumerate(candidates):
+        others = [group for j, (_, group) in enumerate(candidates) if j != i]
+        for sid in sids:
+            city = geo.cities[sid]
+            spread = sum(min(geo.distance_km(sid, other) for other in group) for group in others)
+            key = (
+                0 if city and city in location else 1,
+                round(spread, 1),
+                _priority_rank(geo.pref[sid], pref_code_map, priority),
+                i,
+                -geo.lines[sid],
+            )
+            if best is None or key < best[0]:
+                best = (key, sid, pid)
+    _, sid, pid = best
+    return Resolution(direct_pref or pref_code_map[geo.pref[sid]], sid, pid)
+
+
+class JobGeoIndex:
+    """
+    エクスポート済みの求人（lat / lon を持つもの）に対する半径検索
+        index = JobGeoIndex(iter_json_items("src/data/jobs.json"))
+        index.within(35.658, 139.701, 2)     # [(求人, 距離km), ...] 近い順
+    """
+
+    def __init__(self, jobs):
+        self.jobs = []
+        lats, lons = array("d"), array("d")
+        for job in jobs:
+            lat, lon = job.get("lat"), job.get("lon")
+            if lat is None or lon is None:
+                continue
+            self.jobs.append(job)
+            lats.append(lat)
+            lons.append(lon)
+        self.grid = GeoGrid(lats, lons)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def within(self, lat, lon, km):
+        return [(self.jobs[i], d) for i, d in self.grid.within(lat, lon, km)]
+
+    def near_station(self, geo, name, km):
+        """駅名から km 以内の求人。駅が見つからなければ KeyError"""
+        sid = geo.find_station(name)
+        if sid is None:
+            raise KeyError(name)
+        return self.within(geo.lat[sid], geo.lon[sid], km)
+
+
+def main(argv=None):
+    from json_stream import iter_json_items
+    from merge_jobs import PREF_CODE_MAP
+    from station_index import load_station_index
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("usage: python station_geo.py <駅名> <km> [jobs.json]")
+        return
+    root = os.path.dirname(os.path.abspath(__file__))
+    name, km = argv[0], float(argv[1])
+    path = argv[2] if len(argv) > 2 else os.path.join(root, "src", "data", "jobs.json")
+    geo = load_station_index(os.path.join(root, "station20251211free.csv"), PREF_CODE_MAP).geo
+
+    t0 = time.perf_counter()
+    index = JobGeoIndex(iter_json_items(path))
+    built = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    hits = index.near_station(geo, name, km)
+    print(f"📍 {len(hits)} of {len(index)} located jobs within {km:g} km of {name} "
+          f"(index {built * 1000:.1f} ms, query {(time.perf_counter() - t0) * 1000:.2f} ms)")
+    for job, d in hits[:20]:
+        print(f"   {d:5.2f} km  {job.get('station') or '-'}  {job.get('title')}")
+
+
+if __name__ == "__main__":
+    main()
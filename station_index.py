@@ -0,0 +1,289 @@
+"""
+駅データのコンパイル済みインデックス
+
+station20251211free.csv を毎回 csv.DictReader で読み直す代わりに、
+駅名・都道府県ビットマスク・Aho-Corasick オートマトン (station_matcher.StationMatcher)
+と駅の位置情報 (station_geo.StationGeo) を1つのバイナリファイルに書き出し、起動時は mmap してそのまま使う。
+
+インデックスは CSV の SHA-256 をヘッダに持ち、CSV が差し替えられたら自動で作り直す。
+
+ビルドだけ行う場合:
+    python station_index.py [station.csv]
+"""
+import csv
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+from station_geo import StationGeo
+from station_matcher import StationMatcher
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+MAGIC = b"RBSTIDX2"
+# magic, byteorder, csv_size, csv_mtime_ns, csv_sha256, row_count,
+# n_names, n_nodes, n_edges, name_blob_len, n_stations, n_station_links, city_blob_len
+HEADER = struct.Struct("=8s8sqq32sqqqqqqqq")
+# ヘッダ内の csv_size, csv_mtime_ns (magic と byteorder の直後)
+STAMP = struct.Struct("=qq")
+STAMP_OFFSET = 16
+BYTEORDER = sys.byteorder.encode().ljust(8, b"\0")
+
+# (属性名, typecode, 要素数の取り方) ... ファイル上はこの順で 8 バイト境界に並べる
+SECTIONS = [
+    ("pref_masks", "Q", "n_names"),
+    ("name_offsets", "I", "n_names_1"),
+    ("name_lens", "i", "n_names"),
+    ("edge_start", "i", "n_nodes_1"),
+    ("edge_chars", "I", "n_edges"),
+    ("edge_targets", "i", "n_edges"),
+    ("fail", "i", "n_nodes"),
+    ("out", "i", "n_nodes"),
+    ("dict_link", "i", "n_nodes"),
+    # 位置情報 (station_geo.StationGeo)
+    ("lat", "d", "n_stations"),
+    ("lon", "d", "n_stations"),
+    ("pref", "i", "n_stations"),
+    ("lines", "i", "n_stations"),
+    ("hub", "i", "n_stations"),
+    ("name_id", "i", "n_stations"),
+    ("name_start", "I", "n_names_1"),
+    ("name_ids", "i", "n_station_links"),
+    ("city_offsets", "I", "n_stations_1"),
+]
+GEO_SECTIONS = ("lat", "lon", "pref", "lines", "hub", "name_id", "name_start", "name_ids")
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def csv_sha256(csv_path):
+    h = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def index_path_for(csv_path):
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(INDEX_DIR, f"{base}.idx")
+
+
+class NameTable:
+    """
+    UTF-8 の名前ブロブ + オフセット表を、駅名のシーケンスとして見せる
+    (bisect で引けるように __getitem__ / __len__ だけ持つ)
+    """
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+
+class StationPrefView(Mapping):
+    """
+    {駅名: {都道府県名, ...}} として読める STATION_PREF_MAP 互換のビュー
+    (dict+set を実体化しないのでメモリを食わない)
+    """
+
+    def __init__(self, matcher, pref_code_map):
+        self._matcher = matcher
+        self._pref_code_map = pref_code_map
+
+    def _prefs(self, mask):
+        return {pref for code, pref in self._pref_code_map.items() if mask >> code & 1}
+
+    def __getitem__(self, name):
+        mask = self._matcher.lookup(name)
+        if not mask:
+            raise KeyError(name)
+        return self._prefs(mask)
+
+    def __iter__(self):
+        return iter(self._matcher.names)
+
+    def __len__(self):
+        return len(self._matcher.names)
+
+    def items(self):
+        masks = self._matcher.pref_masks
+        for pid, name in enumerate(self._matcher.names):
+            yield name, self._prefs(masks[pid])
+
+
+class StationIndex:
+    def __init__(self, matcher, pref_code_map, row_count, csv_sha, geo=None):
+        self.matcher = matcher
+        self.geo = geo
+        self.pref_map = StationPrefView(matcher, pref_code_map)
+        self.row_count = row_count
+        self.csv_sha = csv_sha
+
+
+def _read_csv(csv_path, pref_code_map):
+    station_pref_map = {}
+    rows = []
+    with open(csv_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            pref_name = pref_code_map.get(int(row["pref_cd"]))
+            if pref_name:
+                station_pref_map.setdefault(row["station_name"], set()).add(pref_name)
+                rows.append(row)
+    return station_pref_map, rows
+
+
+def build_index(csv_path, pref_code_map, index_path=None):
+    """
+    CSV をパースしてインデックスファイルを書き出す (一時ファイル経由でアトミックに置き換える)
+    """
+    index_path = index_path or index_path_for(csv_path)
+    st = os.stat(csv_path)
+    sha = csv_sha256(csv_path)
+
+    station_pref_map, rows = _read_csv(csv_path, pref_code_map)
+    row_count = len(rows)
+    matcher = StationMatcher.build(station_pref_map, pref_code_map)
+    geo = StationGeo.build(rows, matcher.names, pref_code_map)
+
+    blob = bytearray()
+    name_offsets = array("I", [0])
+    for name in matcher.names:
+        blob += name.encode("utf-8")
+        name_offsets.append(len(blob))
+    city_blob = bytearray()
+    city_offsets = array("I", [0])
+    for city in geo.cities:
+        city_blob += city.encode("utf-8")
+        city_offsets.append(len(city_blob))
+
+    arrays = {
+        "pref_masks": matcher.pref_masks,
+        "name_offsets": name_offsets,
+        "name_lens": matcher.name_lens,
+        "edge_start": matcher.edge_start,
+        "edge_chars": matcher.edge_chars,
+        "edge_targets": matcher.edge_targets,
+        "fail": matcher.fail,
+        "out": matcher.out,
+        "dict_link": matcher.dict_link,
+        "city_offsets": city_offsets,
+    }
+    arrays.update((name, getattr(geo, name)) for name in GEO_SECTIONS)
+    header = HEADER.pack(
+        MAGIC, BYTEORDER, st.st_size, st.st_mtime_ns, sha, row_count,
+        len(matcher.names), len(matcher.fail), len(matcher.edge_chars), len(blob),
+        len(geo), len(geo.name_ids), len(city_blob),
+    )
+
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    tmp_path = f"{index_path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"\0" * (_align(len(header)) - len(header)))
+        for name, typecode, _ in SECTIONS:
+            data = arrays[name].tobytes()
+            f.write(data)
+            f.write(b"\0" * (_align(len(data)) - len(data)))
+        f.write(blob)
+        f.write(b"\0" * (_align(len(blob)) - len(blob)))
+        f.write(city_blob)
+    os.replace(tmp_path, index_path)
+
+    return StationIndex(matcher, pref_code_map, row_count, sha, geo)
+
+
+def _open_index(index_path, pref_code_map, csv_path):
+    """
+    インデックスを mmap して StationIndex を返す。CSV と合わなければ None
+    """
+    with open(index_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mm) < HEADER.size:
+        return None
+    (magic, byteorder, csv_size, csv_mtime_ns, sha, row_count,
+     n_names, n_nodes, n_edges, blob_len, n_stations, n_links, city_blob_len) = HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or byteorder != BYTEORDER:
+        return None
+
+    # サイズと mtime が同じなら中身も同じとみなす。違う場合だけハッシュを取り直す
+    st = os.stat(csv_path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    restamp = stamp != (csv_size, csv_mtime_ns)
+    if restamp and csv_sha256(csv_path) != sha:
+        return None
+
+    counts = {
+        "n_names": n_names, "n_names_1": n_names + 1,
+        "n_nodes": n_nodes, "n_nodes_1": n_nodes + 1, "n_edges": n_edges,
+        "n_stations": n_stations, "n_stations_1": n_stations + 1, "n_station_links": n_links,
+    }
+    # 途中で切れたファイルを cast すると TypeError になるので、先に全体の長さを確かめる
+    sizes = [counts[count_key] * struct.calcsize(typecode) for _, typecode, count_key in SECTIONS]
+    offset = _align(HEADER.size) + sum(_align(size) for size in sizes)
+    city_offset = offset + _align(blob_len)
+    if min(sizes + [blob_len, city_blob_len]) < 0 or city_offset + city_blob_len > len(mm):
+        return None
+    view = memoryview(mm)
+    offset = _align(HEADER.size)
+    sections = {}
+    for (name, typecode, _), size in zip(SECTIONS, sizes):
+        sections[name] = view[offset:offset + size].cast(typecode)
+        offset += _align(size)
+    names = NameTable(view[offset:offset + blob_len], sections.pop("name_offsets"))
+    cities = NameTable(view[city_offset:city_offset + city_blob_len], sections.pop("city_offsets"))
+
+    geo = StationGeo(names=names, cities=cities, **{name: sections.pop(name) for name in GEO_SECTIONS})
+    matcher = StationMatcher(names=names, **sections)
+    if restamp:
+        _write_stamp(index_path, stamp)
+    return StationIndex(matcher, pref_code_map, row_count, sha, geo)
+
+
+def _write_stamp(index_path, stamp):
+    """
+    CSV の中身が同じだったときに、ヘッダのサイズと mtime だけを書き換えて次回のハッシュ計算を省く
+    """
+    try:
+        with open(index_path, "r+b") as f:
+            f.seek(STAMP_OFFSET)
+            f.write(STAMP.pack(*stamp))
+    except OSError as e:
+        print(f"⚠️ Could not update station index stamp: {e}")
+
+
+def load_station_index(csv_path, pref_code_map, index_path=None):
+    """
+    インデックスがあり CSV と一致していれば mmap で読み込み、無ければビルドする
+    """
+    index_path = index_path or index_path_for(csv_path)
+    if os.path.exists(index_path):
+        try:
+            index = _open_index(index_path, pref_code_map, csv_path)
+            if index is not None:
+                return index
+        except (OSError, ValueError, TypeError, struct.error) as e:
+            print(f"⚠️ Station index is broken, rebuilding: {e}")
+    return build_index(csv_path, pref_code_map, index_path)
+
+
+if __name__ == "__main__":
+    from merge_jobs import PREF_CODE_MAP
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "station20251211free.csv"
+    idx = build_index(path, PREF_CODE_MAP)
+    print(f"✅ Built {index_path_for(path)} ({len(idx.matcher)} names, {idx.row_count} rows)")
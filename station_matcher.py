@@ -0,0 +1,201 @@
+"""
+駅名マルチパターンマッチャー (Aho-Corasick)
+
+detect_prefecture で全駅 (約1万件) に対して `station in location` を回していた処理を、
+location 文字列の1回の走査で全ての駅名ヒットを列挙する形に置き換える。
+
+オートマトンは全てフラットな配列で保持する (ノードごとの遷移は文字コード順に並べ、
+bisect で引く)。Python の dict を持たないので、そのままバイト列に書き出して
+読み込むこともできる。
+"""
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+# これより短い駅名はマッチ対象にしない
+MIN_STATION_NAME_LEN = 2
+
+
+class StationMatcher:
+    def __init__(self, names, name_lens, pref_masks, edge_start, edge_chars, edge_targets, fail, out, dict_link):
+        # names[pid] : 駅名 (昇順), pref_masks[pid] : その駅名が存在する都道府県のビットマスク
+        # (JIS コード 1-47 をビット位置とする)
+        # 1文字の駅名も names には入るが、オートマトンには登録しない
+        self.names = names
+        self.name_lens = name_lens
+        self.pref_masks = pref_masks
+        # ノード n の遷移は edge_chars/edge_targets[edge_start[n]:edge_start[n+1]]
+        self.edge_start = edge_start
+        self.edge_chars = edge_chars
+        self.edge_targets = edge_targets
+        self.fail = fail
+        # out[n] : ノード n で終わる駅名の pid (無ければ -1)
+        # dict_link[n] : fail を辿って最初に見つかる終端ノード (無ければ 0)
+        self.out = out
+        self.dict_link = dict_link
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, station_pref_map, pref_code_map):
+        """
+        {駅名: {都道府県名, ...}} からオートマトンを構築する
+        """
+        code_of = {name: code for code, name in pref_code_map.items()}
+
+        names = []
+        name_lens = array("i")
+        pref_masks = array("Q")
+        children = [{}]
+        out_list = [-1]
+
+        for name in sorted(station_pref_map):
+            mask = 0
+            for pref in station_pref_map[name]:
+                code = code_of.get(pref)
+                if code:
+                    mask |= 1 << code
+            if not mask:
+                continue
+            pid = len(names)
+            names.append(name)
+            name_lens.append(len(name))
+            pref_masks.append(mask)
+
+            # 1文字の駅名は誤爆が多いので従来通り対象外
+            if len(name) < MIN_STATION_NAME_LEN:
+                continue
+            node = 0
+            for ch in name:
+                nxt = children[node].get(ch)
+                if nxt is None:
+                    nxt = len(children)
+                    children.append({})
+                    out_list.append(-1)
+                    children[node][ch] = nxt
+                node = nxt
+            out_list[node] = pid
+
+        # BFS で failure link と dictionary link を張る
+        n_nodes = len(children)
+        fail = array("i", [0]) * n_nodes
+        dict_link = array("i", [0]) * n_nodes
+        queue = deque(children[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in children[node].items():
+                f = fail[node]
+                while f and ch not in children[f]:
+                    f = fail[f]
+                target = children[f].get(ch, 0)
+                fail[child] = target if target != child else 0
+                dict_link[child] = fail[child] if out_list[fail[child]] >= 0 else dict_link[fail[child]]
+                queue.append(child)
+
+        # 遷移表をフラットな配列へ
+        edge_start = array("i", [0]) * (n_nodes + 1)
+        edge_chars = array("I")
+        edge_targets = array("i")
+        for node, edges in enumerate(children):
+            edge_start[node] = len(edge_chars)
+            for ch in sorted(edges):
+                edge_chars.append(ord(ch))
+                edge_targets.append(edges[ch])
+        edge_start[n_nodes] = len(edge_chars)
+
+        return cls(
+            names, name_lens, pref_masks, edge_start, edge_chars, edge_targets, fail, array("i", out_list), dict_link
+        )
+
+    def lookup(self, name):
+        """
+        駅名の完全一致で都道府県ビットマスクを引く (無ければ 0)
+        """
+        names = self.names
+        i = bisect_left(names, name)
+        if i < len(names) and names[i] == name:
+            return self.pref_masks[i]
+        return 0
+
+    def iter_matches(self, text):
+        """
+        text 中の全ての駅名ヒットを (start, end, pid) で返す
+        """
+        edge_start = self.edge_start
+        edge_chars = self.edge_chars
+        edge_targets = self.edge_targets
+        fail = self.fail
+        out = self.out
+        dict_link = self.dict_link
+        name_lens = self.name_lens
+
+        state = 0
+        for pos, ch in enumerate(text):
+            code = ord(ch)
+            while True:
+                lo = edge_start[state]
+                hi = edge_start[state + 1]
+                i = bisect_left(edge_chars, code, lo, hi)
+                if i < hi and edge_chars[i] == code:
+                    state = edge_targets[i]
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+
+            node = state if out[state] >= 0 else dict_link[state]
+            while node:
+                pid = out[node]
+                end = pos + 1
+                yield end - name_lens[pid], end, pid
+                node = dict_link[node]
+
+    def find(self, text, longest_only=True):
+        """
+        ヒットした駅名の pid リストを返す
+        longest_only=True の場合、より長いヒットに包含される短い駅名は捨てる
+        (例: "堺筋本町" の中の "本町")
+        """
+        matches = list(self.iter_matches(text))
+        if not longest_only or len(matches) < 2:
+            return [pid for _, _, pid in matches]
+
+        kept = []
+        for s, e, pid in matches:
+            covered = False
+            for s2, e2, _ in matches:
+                if s2 <= s and e <= e2 and (e2 - s2) > (e - s):
+                    covered = True
+                    break
+            if not covered:
+                kept.append(pid)
+        return kept
+
+    def match_mask(self, text, longest_only=True):
+        """
+        ヒットした駅の都道府県ビットマスクの OR を返す
+        """
+        mask = 0
+        pref_masks = self.pref_masks
+        for pid in self.find(text, longest_only):
+            mask |= pref_masks[pid]
+        return mask
+
+
+def pick_prefecture(mask, pref_code_map, priority):
+    """
+    候補の都道府県ビットマスクから1つ選ぶ
+    PREF_PRIORITY の順で判定し、優先リストに無ければ JIS コードの若い順
+    """
+    if not mask:
+        return None
+    code_of = {name: code for code, name in pref_code_map.items()}
+    for pref in priority:
+        code = code_of.get(pref)
+        if code and mask >> code & 1:
+            return pref
+    for code in sorted(pref_code_map):
+        if mask >> code & 1:
+            return pref_code_map[code]
+    return None
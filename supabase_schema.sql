@@ -25,16 +25,31 @@ create table public.jobs (
   -- その他のメタデータ
   tags text[],                   -- 特徴タグ (例: ['未経験可', 'リモート'])
   summary text,                  -- 概要・詳細テキスト
+
+  -- 内容のフィンガープリント (fingerprint.py)。DBClient(skip_unchanged=True) は同じなら書き込みを省く
+  content_hash text,
   
   -- タイムスタンプ
   created_at timestamp with time zone default timezone('utc'::text, now()) not null,
   updated_at timestamp with time zone default timezone('utc'::text, now()) not null
 );
 
+-- 既存のテーブルに追加する場合（追加してから DBClient(skip_unchanged=True) にする）:
+-- alter table public.jobs add column if not exists content_hash text;
+
+-- 期限切れで削除した求人の退避先 (sync_jobs.py --archive table / job_archive.TableArchive)
+create table if not exists public.jobs_archive (
+  like public.jobs,
+  archived_at timestamp with time zone default timezone('utc'::text, now()) not null,
+  primary key (id)
+);
+
 -- 3. 検索を高速化するためのインデックス
 create index jobs_url_index on public.jobs (url);
 create index jobs_site_name_index on public.jobs (site_name);
 create index jobs_created_at_index on public.jobs (created_at);
+-- prune_old_jobs が updated_at で絞って id 順に取り出すため
+create index jobs_updated_at_id_index on public.jobs (updated_at, id);
 
 -- 4. Row Level Security (RLS) の設定
 -- 読み取りは全ユーザー許可、書き込みは要認証
@@ -1,25 +1,47 @@
+import argparse
+import asyncio
+import heapq
 import json
 import os
-import csv
+import sys
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from db_client_template import DBClient
+from db_client_template import AsyncDBClient, DBClient
+import enrichment_store
+import job_filter
+import metrics
+from job_filter import format_counts
+from fingerprint import format_changes
+from job_archive import GzipJsonlArchive, TableArchive
+from job_dedup import collapse_near_duplicates
+from stage_state import load_state, save_state
+from location_cache import LocationCache, format_stats, location_cache_version
+from static_export import print_report, write_exports
+from station_geo import Resolution, resolve_location
+from station_index import load_station_index
+from station_matcher import StationMatcher
 
 # Load environment variables (expecting .env in the same dir)
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
 OUTPUT_FILE = "src/data/jobs.json"
 STATION_CSV_FILE = "station20251211free.csv"
+# Watermark / pending tombstones for incremental sync
+SYNC_STATE_FILE = ".cache/sync_state.json"
+# url -> updated_at of every exported row. jobs.json is not rewritten when only updated_at moved
+# (content fingerprints ignore it), so its updated_at can be older than the DB's
+UPDATED_AT_FILE = ".cache/sync_updated_at.json"
+
+# Same expiry rule as db.delete_old_jobs
+EXPIRE_DAYS = 30
+# Re-read rows slightly older than the watermark so commits that land out of order are not missed
+WATERMARK_OVERLAP = timedelta(minutes=10)
+# Fields filled in by update_job_details.py that the DB does not have (or has empty)
+ENRICHMENT_FIELDS = ["summary", "image_url", "recommendation"]
 
 # --- Configuration & Constants (Ported from merge_jobs.py) ---
-FILTER_TARGET_SOURCES = ["Indeed", "Kyujinbox"]
-REQUIRED_KEYWORDS = ["未経験", "初心者"]
-NG_KEYWORDS = [
-    "軽作業", "倉庫", "仕分け", "ピッキング", "梱包", 
-    "ホール", "キッチン", "調理", "清掃", "警備", 
-    "コンビニ", "レジ", "ドライバー", "配送", "配達", 
-    "工場", "製造", "ライン作業", "パチンコ", "カラオケ",
-    "引越", "施工管理", "看護師", "薬剤師", "介護"
-]
+# Keyword filter rules live in job_filter.py (shared with merge_jobs.py)
 
 PREF_CODE_MAP = {
     1: "北海道", 2: "青森県", 3: "岩手県", 4: "宮城県", 5: "秋田県", 6: "山形県", 7: "福島県",
@@ -36,160 +58,418 @@ PREF_PRIORITY = [
 ]
 
 STATION_PREF_MAP = {}
+STATION_MATCHER = None
+# Station coordinates / nearest hub (station_geo). None when the CSV is missing
+STATION_GEO = None
+# location -> prefecture results, persisted in .cache/locations.sqlite (shared with merge_jobs.py)
+LOCATION_CACHE = None
 
 # --- Geographic Helpers ---
 
+@metrics.timed("station.load")
 def load_station_data(csv_path):
-    global STATION_PREF_MAP
+    global STATION_PREF_MAP, STATION_MATCHER, STATION_GEO, LOCATION_CACHE
+    csv_sha = None
     try:
         if not os.path.exists(csv_path):
              # Try absolute path if relative fails (assuming script is in R-website root)
              csv_path = os.path.join(os.path.dirname(__file__), csv_path)
 
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            count = 0
-            for row in reader:
-                name = row['station_name']
-                pref_cd = int(row['pref_cd'])
-                pref_name = PREF_CODE_MAP.get(pref_cd)
-                if pref_name:
-                    if name not in STATION_PREF_MAP:
-                        STATION_PREF_MAP[name] = set()
-                    STATION_PREF_MAP[name].add(pref_name)
-                    count += 1
-            print(f"✅ Loaded {count} stations from CSV.")
+        # Compiled index (mmap, rebuilt automatically when the CSV changes)
+        index = load_station_index(csv_path, PREF_CODE_MAP)
+        STATION_PREF_MAP = index.pref_map
+        STATION_MATCHER = index.matcher
+        STATION_GEO = index.geo
+        csv_sha = index.csv_sha
+        print(f"✅ Loaded {index.row_count} stations from CSV.")
     except Exception as e:
         print(f"⚠️ Station CSV loading error: {e}")
         STATION_PREF_MAP = {}
+        STATION_MATCHER = StationMatcher.build(STATION_PREF_MAP, PREF_CODE_MAP)
+        STATION_GEO = None
+
+    # Cached results are dropped automatically when the station CSV (or PREF_PRIORITY) changes
+    LOCATION_CACHE = LocationCache(location_cache_version(csv_sha, PREF_PRIORITY))
+    if LOCATION_CACHE.invalidated:
+        print("♻️ Station data changed. Location cache cleared.")
 
 def detect_prefecture(location):
+    return locate(location).prefecture
+
+def locate(location):
+    """location string -> Resolution(prefecture, station id, station name id)"""
     if not location or location == "N/A":
-        return None
-    
+        return Resolution(None)
+    if LOCATION_CACHE is not None:
+        return Resolution.decode(LOCATION_CACHE.get(location, _encoded_locate))
+    return _locate(location)
+
+def _encoded_locate(location):
+    return _locate(location).encode()
+
+def _locate(location):
     # 1. Direct Match
+    direct_pref = None
     for code, pref in PREF_CODE_MAP.items():
         if pref in location:
-            return pref
-            
-    # 2. Key/Station Match
-    possible_prefs = set()
-    for station, prefs in STATION_PREF_MAP.items():
-        if len(station) < 2: 
-            continue
-        if station in location:
-            possible_prefs.update(prefs)
+            direct_pref = pref
+            break
 
-    if not possible_prefs:
-        return None
-        
-    for p in PREF_PRIORITY:
-        if p in possible_prefs:
-            return p
-            
-    return list(possible_prefs)[0]
+    # 2. Key/Station Match (single pass, longest station name wins).
+    # Same-name stations are disambiguated by distance to the other stations / city names in the string
+    if STATION_MATCHER is None:
+        return Resolution(direct_pref)
+    return resolve_location(location, STATION_MATCHER, STATION_GEO, PREF_CODE_MAP, PREF_PRIORITY, direct_pref)
 
 # --- Filtering Logic ---
 
-def is_valid_job(job):
-    # Only filter specific sources if needed (Currently filtering Indeed/Kyujinbox based on keyword rules)
-    # The requirement is to generally apply these valid filters to ensure quality.
-    
-    source = job.get('site_name') or job.get('source')
-    # If the job explicitly comes from a source we want to be strict about:
-    if source in FILTER_TARGET_SOURCES:
-        pass # proceed to check
-    else:
-        # For Infra/ZeroOne, assume they are generally valid or apply same rules?
-        # Let's apply the 'NG Keyword' rule to ALL, but 'Required Keyword' only to generic search engines.
-        # But for now, sticking to merge_jobs.py logic:
-        # "if job.get('source') not in FILTER_TARGET_SOURCES: return True"
-        pass
-
-    if source not in FILTER_TARGET_SOURCES:
-        return True
-
-    title = str(job.get('title', ''))
-    summary = str(job.get('summary', ''))
-    full_text = (title + summary).replace("\n", "").replace(" ", "")
-    
-    # 1. Required Keywords
-    if not any(req in full_text for req in REQUIRED_KEYWORDS):
-        return False
-        
-    # 2. NG Keywords
-    if any(ng in full_text for ng in NG_KEYWORDS):
-        return False
-        
-    return True
+def is_valid_job(job, filter_counts=None):
+    """Keyword filter shared with merge_jobs.py (job_filter). DB rows carry the source as site_name."""
+    return job_filter.is_valid_job(job, job.get('site_name') or job.get('source'), filter_counts)
 
 # --- Main Sync Logic ---
 
-def main():
+# Only export jobs from these sources to the JSON file
+EXPORT_SOURCES = ["Infra", "ZeroOne"]
+
+# Columns fetched from the DB for the export (supabase_schema.sql)
+EXPORT_COLUMNS = [
+    "id", "site_name", "title", "company", "location", "salary", "url",
+    "image_url", "tags", "summary", "created_at", "updated_at",
+]
+
+def normalize_job(job, filter_counts=None):
+    """
+    Apply source filtering, keyword filtering and location normalization to one DB row.
+    Returns the export record, or None if the job should not be exported.
+    filter_counts (Counter), if given, collects the keyword filter decisions.
+    """
+    # Standardize 'source' key
+    job['source'] = job.get('site_name')
+
+    # Source Filtering (already applied server-side, kept as a safety net)
+    if job.get('source') not in EXPORT_SOURCES:
+        return None
+
+    # Filter
+    if not is_valid_job(job, filter_counts):
+        return None
+
+    # Normalize Location
+    loc = job.get('location', '')
+    resolved = locate(loc)
+    detect_pref = resolved.prefecture
+
+    if detect_pref:
+        job['prefecture'] = detect_pref
+        if detect_pref not in loc:
+            job['location'] = f"{detect_pref} {loc}"
+    # Coordinates and nearest hub station (station, lat, lon, hub, hub_km) when a station was found
+    if resolved.station_id >= 0 and STATION_GEO is not None:
+        job.update(STATION_GEO.fields(resolved.station_id, resolved.name_id))
+
+    # Map 'link' to 'url' because frontend might use 'link' (Job type says 'link: string | null')
+    if not job.get('link') and job.get('url'):
+        job['link'] = job['url']
+
+    return job
+
+def track_watermark(stats, job):
+    """
+    Advance the watermark, and keep the updated_at of fetched rows that fall inside the next run's
+    overlap window (stats["window"], a heap). Its size is what the next run's precheck compares against.
+    """
+    updated_at = job.get('updated_at')
+    if not updated_at:
+        return
+    ts = parse_ts(updated_at)
+    if stats.get('watermark') is None or ts > stats.setdefault('watermark_ts', parse_ts(stats['watermark'])):
+        stats['watermark'] = updated_at
+        stats['watermark_ts'] = ts
+    window = stats.setdefault('window', [])
+    low = stats['watermark_ts'] - WATERMARK_OVERLAP
+    if ts >= low:
+        heapq.heappush(window, ts)
+    while window and window[0] < low:
+        heapq.heappop(window)
+
+def overlap_since(watermark):
+    """Incremental fetches re-read rows slightly older than the watermark"""
+    return (parse_ts(watermark) - WATERMARK_OVERLAP).isoformat()
+
+async def precheck(db, state, incremental, prune_only=False):
+    """
+    Cheap checks before the supabase client, the station data and the export are loaded:
+    count requests only, over AsyncDBClient (httpx). Returns a message when there is nothing to do, else None.
+    Nothing to do = no expired rows to delete, and (incremental) no tombstones to apply, nothing updated after
+    the watermark, and the overlap window still holds exactly the rows the last sync fetched (no late commits).
+    """
+    async with db:
+        # Same threshold as db.prune_old_jobs
+        threshold = (datetime.now(timezone.utc) - timedelta(days=EXPIRE_DAYS)).isoformat()
+        if await db.count_jobs(before=threshold):
+            return None
+        if prune_only:
+            return "🧹 No expired jobs to delete."
+        if not incremental or state.get('tombstones') or state.get('window_count') is None:
+            return None
+        if await db.count_jobs(after=state['watermark'], sources=EXPORT_SOURCES):
+            return None
+        if await db.count_jobs(since=overlap_since(state['watermark']), sources=EXPORT_SOURCES) != state['window_count']:
+            return None
+    return f"🟰 No expired jobs and none updated since {state['watermark']}. {OUTPUT_FILE} was left untouched."
+
+def parse_ts(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def process_jobs(raw_jobs, stats):
+    for job in raw_jobs:
+        stats["fetched"] += 1
+        track_watermark(stats, job)
+        job = normalize_job(job, stats.get("filter"))
+        if job is not None:
+            yield job
+
+# --- Sync State (incremental mode) ---
+
+def load_sync_state():
+    try:
+        with open(SYNC_STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_sync_state(state):
+    os.makedirs(os.path.dirname(SYNC_STATE_FILE), exist_ok=True)
+    tmp_path = f"{SYNC_STATE_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, SYNC_STATE_FILE)
+
+def load_export():
+    try:
+        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def merge_record(old, new):
+    """Changed DB row wins, but keep enrichment that only lives in the export."""
+    merged = dict(old)
+    merged.update(new)
+    for field in ENRICHMENT_FIELDS:
+        if not new.get(field) and old.get(field):
+            merged[field] = old[field]
+    return merged
+
+def write_export(rows, stats, static_export=True, near_dup=True, keep_clusters=False):
+    """
+    Write jobs.json and, alongside it, the compact listing index + detail shards (static_export.py).
+    Nothing is replaced when every job's content fingerprint matches the previous export.
+    Returns (count, report); per-job new/changed/unchanged/removed counts go to stats["changes"].
+    Details fetched by update_job_details.py (enrichment store) are layered on top of the DB rows.
+    With near_dup, the same posting stored under different urls is collapsed to its richest row
+    (job_dedup.py); this needs every row, so the stream is materialized first.
+    keep_clusters keeps cluster_id / cluster_size on rows whose duplicates were dropped earlier.
+    The updated_at of every row written goes to UPDATED_AT_FILE, even when jobs.json is left as is.
+    """
+    updated_at = {}
+
+    def remember_updated_at(rows):
+        for job in rows:
+            if job.get('url') and job.get('updated_at'):
+                updated_at[job['url']] = job['updated_at']
+            yield job
+
+    store = enrichment_store.open_existing()
+    try:
+        if store is not None:
+            rows = store.apply_many(rows)
+        if near_dup:
+            rows = collapse_near_duplicates(rows, stats.setdefault("near_dup", Counter()),
+                                            keep_previous=keep_clusters)
+        count, changes, report = write_exports(OUTPUT_FILE, remember_updated_at(rows), static_export)
+    finally:
+        if store is not None:
+            store.close()
+    save_state(UPDATED_AT_FILE, updated_at)
+    stats["changes"] = changes.counts
+    stats["rewritten"] = changes.modified
+    return count, report
+
+def sync_full(db, stats, static_export=True, near_dup=True):
+    return write_export(process_jobs(db.iter_jobs(
+        columns=EXPORT_COLUMNS, sources=EXPORT_SOURCES), stats), stats, static_export, near_dup)
+
+def sync_incremental(db, state, existing, stats, static_export=True, near_dup=True):
+    """
+    Fetch only rows whose updated_at >= watermark and merge them into the existing export by url.
+    Tombstones (urls deleted by expire_old_jobs) and locally expired rows are dropped.
+    Expiry uses the updated_at last seen from the DB (UPDATED_AT_FILE), not the one in jobs.json.
+    Rows collapsed as near-duplicates are not in the export, so kept rows carry their cluster
+    fields over; a --full sync brings the others back if the row that was kept has since been deleted.
+    """
+    by_url = {job.get('url') or job.get('link'): job for job in existing}
+    for url, updated_at in load_state(UPDATED_AT_FILE).items():
+        if url in by_url:
+            by_url[url]['updated_at'] = updated_at
+
+    for raw in db.iter_jobs(columns=EXPORT_COLUMNS, sources=EXPORT_SOURCES, since=overlap_since(state['watermark'])):
+        stats["fetched"] += 1
+        track_watermark(stats, raw)
+        url = raw.get('url')
+        job = normalize_job(raw, stats.get("filter"))
+        if job is None:
+            # No longer passes the filters -> drop it from the export
+            if by_url.pop(url, None) is not None:
+                stats["removed"] += 1
+            continue
+        if url in by_url:
+            by_url[url] = merge_record(by_url[url], job)
+            stats["changed"] += 1
+        else:
+            by_url[url] = job
+            stats["added"] += 1
+
+    for url in state.get('tombstones', []):
+        if by_url.pop(url, None) is not None:
+            stats["removed"] += 1
+
+    # Safety net: anything the DB would have expired by now
+    threshold = datetime.now(parse_ts(state['watermark']).tzinfo) - timedelta(days=EXPIRE_DAYS)
+    for url, job in list(by_url.items()):
+        if job.get('updated_at') and parse_ts(job['updated_at']) < threshold:
+            del by_url[url]
+            stats["removed"] += 1
+
+    jobs = sorted(by_url.values(), key=lambda j: (j.get('created_at') or '', j.get('id') or ''), reverse=True)
+    return write_export(jobs, stats, static_export, near_dup, keep_clusters=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync jobs from Supabase into src/data/jobs.json")
+    parser.add_argument("--full", action="store_true",
+                        help="refetch every job and rewrite the export instead of merging changes")
+    parser.add_argument("--no-static-export", action="store_true",
+                        help="only write jobs.json (skip the listing index / detail shards in public/data/jobs)")
+    parser.add_argument("--no-near-dup", action="store_true",
+                        help="skip collapsing the same posting stored under different urls")
+    parser.add_argument("--archive", choices=["none", "file", "table"], default="none",
+                        help="copy each batch of expired rows before deleting it: .cache/archive/*.jsonl.gz or the jobs_archive table")
+    parser.add_argument("--prune-dry-run", action="store_true",
+                        help="only count the expired rows instead of deleting them")
+    parser.add_argument("--prune-only", action="store_true",
+                        help="only delete expired rows (record tombstones) without fetching or exporting")
+    args = parser.parse_args(argv)
+
     print("🚀 Starting Sync Jobs from Supabase...")
     
+    state = load_sync_state()
+    # The previous export is only read once the precheck has found something to merge
+    incremental = not args.full and bool(state.get('watermark')) and os.path.exists(OUTPUT_FILE)
+
+    # Precheck (counts only): exit before the supabase client, station data and export are loaded
+    try:
+        light_db = AsyncDBClient()
+    except Exception as e:
+        print(f"❌ Failed to init DB: {e}")
+        return 1
+    try:
+        done = asyncio.run(precheck(light_db, state, incremental, args.prune_only))
+    except Exception as e:
+        print(f"⚠️ Precheck failed, syncing anyway: {e}")
+        done = None
+    if done:
+        print(done)
+        return
+
     # Initialize DB
     try:
         db = DBClient()
     except Exception as e:
         print(f"❌ Failed to init DB: {e}")
-        return
+        return 1
 
     # 1. Cleanup Old Jobs (Older than 30 days)
+    # Deleted urls are kept as tombstones until they have been applied to the export
+    # Deleted in bounded batches by id; each batch can be archived before it is deleted
     print("🧹 Cleaning up old jobs...")
-    deleted_count = db.delete_old_jobs(days=30)
-    print(f"   -> Deleted {deleted_count} old jobs.")
+    archive = {"file": lambda: GzipJsonlArchive(), "table": lambda: TableArchive(db)}.get(args.archive, lambda: None)()
+    pruned = db.prune_old_jobs(days=EXPIRE_DAYS, archive=archive, dry_run=args.prune_dry_run)
+    if args.prune_dry_run:
+        print(f"   -> Dry run: {pruned.matched} old jobs would be deleted.")
+    else:
+        print(f"   -> Deleted {pruned.deleted} old jobs in {pruned.batches} batches"
+              + (f" (archived {pruned.archived} to {getattr(archive, 'path', args.archive)})." if archive else "."))
+    if pruned.urls and not args.prune_dry_run:
+        state['tombstones'] = list(dict.fromkeys(state.get('tombstones', []) + pruned.urls))
+        save_sync_state(state)
+    if args.prune_only:
+        return
+
+    existing = load_export() if incremental else None
+    if existing is None:
+        incremental = False
 
     # 2. Load Station Data for normalization
     load_station_data(STATION_CSV_FILE)
 
-    # 3. Fetch All Jobs (Sorted by Created At DESC)
-    print("📥 Fetching latest jobs from DB...")
-    raw_jobs = db.fetch_all_jobs()
-    print(f"   -> Fetched {len(raw_jobs)} jobs.")
-
-    # 4. Process & Format
-    valid_jobs_list = []
-    
-    # --- Filtering Logic for Export ---
-    # Only export jobs from these sources to the JSON file
-    EXPORT_SOURCES = ["Infra", "ZeroOne"]
-
-    for job in raw_jobs:
-        # Standardize 'source' key
-        job['source'] = job.get('site_name')
-        
-        # 1. Source Filtering (Infra & ZeroOne ONLY)
-        if job.get('source') not in EXPORT_SOURCES:
-            continue
+    # 3. Stream Jobs (Sorted by Created At DESC) -> 4. Process & Format -> 5. Write to JSON
+    # Source filtering (Infra & ZeroOne ONLY) is pushed down to the DB as site_name=in.(...),
+    # and rows are fetched one keyset page at a time. Only a full sync with --no-near-dup writes
+    # them out as they arrive (per-job fingerprints and updated_at are all that grow with the table).
+    # The near-dup collapse (on by default) needs every row, so peak memory holds the whole export;
+    # an incremental sync holds it too, since it merges into the previous jobs.json by url.
+    stats = {"fetched": 0, "added": 0, "changed": 0, "removed": 0, "watermark": state.get('watermark'),
+             "filter": Counter()}
+    try:
+        # Fetch, normalize and write are streamed together; db.fetch_page shows the DB share
+        with metrics.span("sync.incremental" if incremental else "sync.full"):
+            if incremental:
+                print(f"📥 Fetching jobs updated since {state['watermark']} (incremental)...")
+                valid_count, report = sync_incremental(db, state, existing, stats, not args.no_static_export,
+                                                       not args.no_near_dup)
+            else:
+                print("📥 Fetching latest jobs from DB (full)...")
+                valid_count, report = sync_full(db, stats, not args.no_static_export, not args.no_near_dup)
+    except Exception as e:
+        print(f"⚠️ DB Fetch Error: {e}")
+        print(f"❌ Export aborted. {OUTPUT_FILE} was left untouched.")
+        return 1
+    print(f"   -> Fetched {stats['fetched']} jobs.")
+    if stats["filter"]:
+        print(f"   -> Keyword filter: {format_counts(stats['filter'])}")
+    if incremental:
+        print(f"   -> Added {stats['added']}, changed {stats['changed']}, removed {stats['removed']}.")
+    if stats.get("near_dup"):
+        near = stats["near_dup"]
+        print(f"   -> Near-duplicates: dropped {near['dropped']} in {near['clusters']} clusters "
+              f"({near['compared']} of {near['candidates']} candidates compared).")
+    print(f"✅ Processing complete. {valid_count} jobs valid after filtering.")
+    print(f"   -> Export vs previous: {format_changes(stats['changes'])}")
+    metrics.record("sync", {k: stats[k] for k in ("fetched", "added", "changed", "removed")})
+    metrics.incr("sync.jobs_out", valid_count)
+    metrics.record("filter", stats["filter"])
+    metrics.record("near_dup", stats.get("near_dup", {}))
+    metrics.record("export", stats["changes"])
 
-        # Filter
-        if is_valid_job(job):
-            # Normalize Location
-            loc = job.get('location', '')
-            detect_pref = detect_prefecture(loc)
-            
-            if detect_pref:
-                job['prefecture'] = detect_pref
-                if detect_pref not in loc:
-                    job['location'] = f"{detect_pref} {loc}"
-            
-            # Map 'link' to 'url' because frontend might use 'link' (Job type says 'link: string | null')
-            if not job.get('link') and job.get('url'):
-                job['link'] = job['url']
-
-            valid_jobs_list.append(job)
-
-    print(f"✅ Processing complete. {len(valid_jobs_list)} jobs valid after filtering.")
-
-    # 5. Write to JSON
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(valid_jobs_list, f, indent=2, ensure_ascii=False)
-        
-    print(f"🎉 Saved to {OUTPUT_FILE}")
+    # Export is written -> tombstones are applied, advance the watermark
+    state['watermark'] = stats['watermark']
+    state['window_count'] = len(stats.get('window', []))
+    state['tombstones'] = []
+    state['last_sync'] = {"mode": "incremental" if incremental else "full", "at": datetime.now().isoformat()}
+    save_sync_state(state)
+    if stats["rewritten"]:
+        print(f"🎉 Saved to {OUTPUT_FILE}")
+    else:
+        print(f"🟰 No content changes. {OUTPUT_FILE} was left untouched.")
+    print_report(report, OUTPUT_FILE)
+    if LOCATION_CACHE is not None:
+        LOCATION_CACHE.close()
+        print(f"📍 Location cache: {format_stats(LOCATION_CACHE.stats, LOCATION_CACHE.version)}")
+        metrics.record("location_cache", LOCATION_CACHE.stats)
 
 if __name__ == "__main__":
-    main()
+    # Handled failures return 1 so run_scrapers.py does not start stages that require this one
+    with metrics.run("sync_jobs") as m:
+        m.exit_code = main()
+    sys.exit(m.exit_code)
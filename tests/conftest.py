@@ -0,0 +1,58 @@
+"""
+ルートに並んだモジュール（merge_jobs.py など）を import できるようにし、テスト用の合成の求人を用意する
+FakePostgREST は benchmarks.fake_postgrest として import する
+"""
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# prune_old_jobs の既定（updated_at がこれより古い行が期限切れ）
+EXPIRE_DAYS = 30
+EXPIRED_RATIO = 0.1
+
+
+def make_rows(n, seed=3):
+    """
+    jobs テーブルの行（id, created_at, updated_at 付き）。約1割は期限切れ
+    created_at は秒単位で重複させる（キーセットの id での並べ替えも確かめるため）
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    rows = []
+    for i in range(n):
+        created = now - timedelta(seconds=rng.randrange(n // 4 + 1))
+        expired = rng.random() < EXPIRED_RATIO
+        updated = now - timedelta(days=EXPIRE_DAYS + 1 if expired else rng.randrange(EXPIRE_DAYS - 1))
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "site_name": ["Infra", "ZeroOne", "Indeed", "Kyujinbox"][i % 4],
+            "title": f"未経験OK インターン #{i}",
+            "company": f"株式会社サンプル{i % 97}",
+            "location": "五反田駅徒歩5分",
+            "url": f"https://example.com/jobs/{i}?a=1,2",
+            "summary": "未経験から始められるインターンです。" * 5,
+            "created_at": created.isoformat(),
+            "updated_at": updated.isoformat(),
+        })
+    return rows
+
+
+def make_jobs(n, offset):
+    """スクレーパーが upsert する形の求人。url は make_rows と同じ並びなので、offset < 行数 の分は既存の行の更新になる"""
+    return [
+        {
+            "site_name": "Infra",
+            "title": f"データ分析インターン #{i}",
+            "company": f"株式会社サンプル{i % 97}",
+            "location": "渋谷駅徒歩3分",
+            "url": f"https://example.com/jobs/{i}?a=1,2",
+            "summary": "分析基盤の運用を担当します。" * 5,
+        }
+        for i in range(offset, offset + n)
+    ]
@@ -0,0 +1,144 @@
+"""AsyncDBClient と DBClient を同じ内容の FakePostgREST に向け、結果が一致することを確かめる"""
+import asyncio
+import copy
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import db_client_template
+from benchmarks.fake_postgrest import FakePostgREST
+from conftest import EXPIRE_DAYS, make_jobs, make_rows
+from db_client_template import AsyncDBClient, DBClient
+
+N = 300
+SINCE = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+
+
+@pytest.fixture(scope="module")
+def rows():
+    return make_rows(N)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(db_client_template, "RETRY_BACKOFF", 0)
+
+
+def compare(rows, op, async_op=None, fail_every=0, concurrency=4):
+    """
+    同じ行を入れた2つのサーバーに op(db) を実行し、(同期の結果, 非同期の結果, 同期後の表, 非同期後の表, stats, 注入した失敗の数) を返す
+    async_op を省くと op をそのまま await する（async for の結果はリストにする）
+    """
+    async_op = async_op or op
+
+    def table(server):
+        # created_at / updated_at はサーバーが書いた時刻なので比べない
+        return sorted((row["url"], row["site_name"], row["title"], row.get("company"), row.get("summary"))
+                      for row in server.tables["jobs"].rows)
+
+    with FakePostgREST() as server:
+        server.seed("jobs", copy.deepcopy(rows))
+        expected = op(DBClient(url=server.url, key=server.key))
+        if not isinstance(expected, (list, set, int, tuple)):
+            expected = list(expected)
+        expected_table = table(server)
+
+    async def run():
+        with FakePostgREST(fail_every=fail_every) as server:
+            server.seed("jobs", copy.deepcopy(rows))
+            async with AsyncDBClient(url=server.url, key=server.key, concurrency=concurrency) as db:
+                result = async_op(db)
+                if hasattr(result, "__aiter__"):
+                    result = [item async for item in result]
+                else:
+                    result = await result
+                return result, table(server), dict(db.stats), server.failures
+
+    got, got_table, stats, failures = asyncio.run(run())
+    return expected, got, expected_table, got_table, stats, failures
+
+
+def ids(jobs):
+    return [job["id"] for job in jobs]
+
+
+@pytest.mark.parametrize("partitions", [1, 4])
+def test_iter_jobs_order(rows, partitions):
+    expected, got, *_ = compare(
+        rows,
+        lambda db: db.iter_jobs(page_size=37),
+        lambda db: db.iter_jobs(page_size=37, partitions=partitions),
+    )
+    assert len(expected) == N
+    assert ids(got) == ids(expected)
+    assert got == expected
+
+
+def test_iter_jobs_filters(rows):
+    def op(db):
+        return db.iter_jobs(columns=["url"], page_size=25, since=SINCE, sources=["Infra", "Indeed"])
+
+    expected, got, *_ = compare(rows, op)
+    assert 0 < len(expected) < N
+    assert got == expected
+
+
+def upsert_batch():
+    # 既存の行の更新・新規・同じURLの2回目・not null 違反を混ぜる
+    jobs = make_jobs(N // 5, N - N // 10)
+    jobs.append(dict(jobs[0], title="データ分析インターン（再掲）"))
+    jobs.insert(3, dict(jobs[5], url="https://example.com/broken", title=None))
+    return jobs
+
+
+def test_upsert_jobs(rows):
+    jobs = upsert_batch()
+    expected, got, expected_table, got_table, *_ = compare(rows, lambda db: db.upsert_jobs(jobs, batch_size=16))
+    statuses = [result.status for result in expected]
+    assert {"new", "updated", "failed"} <= set(statuses)
+    assert [result.status for result in got] == statuses
+    assert got_table == expected_table
+
+
+def lookup_urls():
+    return [row["url"] for row in make_rows(N)] + [f"https://example.com/missing/{i}" for i in range(N)]
+
+
+def test_existing_urls(rows):
+    expected, got, *_ = compare(rows, lambda db: db.existing_urls(lookup_urls()))
+    assert expected == {row["url"] for row in rows}
+    assert got == expected
+
+
+def test_prune_old_jobs(rows):
+    expected, got, expected_table, got_table, *_ = compare(rows, lambda db: db.prune_old_jobs(EXPIRE_DAYS, batch_size=20))
+    assert expected.deleted > 0
+    assert (got.matched, got.deleted, got.batches) == (expected.matched, expected.deleted, expected.batches)
+    assert sorted(got.urls) == sorted(expected.urls)
+    assert got_table == expected_table
+
+
+async def _statuses(results):
+    return [result.status for result in await results]
+
+
+async def _sorted_urls(result):
+    return sorted((await result).urls)
+
+
+@pytest.mark.parametrize("name, op, async_op", [
+    ("iter_jobs", lambda db: db.iter_jobs(page_size=37), lambda db: db.iter_jobs(page_size=37, partitions=4)),
+    ("existing_urls", lambda db: db.existing_urls(lookup_urls()), None),
+    ("upsert_jobs", lambda db: [r.status for r in db.upsert_jobs(upsert_batch(), batch_size=16)],
+     lambda db: _statuses(db.upsert_jobs(upsert_batch(), batch_size=16))),
+    ("prune_old_jobs", lambda db: sorted(db.prune_old_jobs(EXPIRE_DAYS, batch_size=20).urls),
+     lambda db: _sorted_urls(db.prune_old_jobs(EXPIRE_DAYS, batch_size=20))),
+])
+def test_retries_under_injected_failures(rows, name, op, async_op):
+    """3リクエストに1回 503 を返すサーバーでも、再試行して同じ結果になる"""
+    expected, got, expected_table, got_table, stats, failures = compare(rows, op, async_op, fail_every=3)
+    assert failures > 0
+    # 503 はすべて再試行され、失敗として表に出るのは not null 違反の行だけ
+    assert stats["retries"] == failures
+    assert got == expected
+    assert got_table == expected_table
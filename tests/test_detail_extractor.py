@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from detail_extractor import FALLBACK_LIMIT, extract_job_detail
+
+JSON_LD = '<script type="application/ld+json">{}</script>'.format(
+    json.dumps({"@type": "JobPosting", "description": "<p>仕事内容<br>Python</p><ul><li>時給1,500円</li></ul>"},
+               ensure_ascii=False)
+)
+OG_IMAGE = '<meta property="og:image" content="https://img.example.com/1.png">'
+
+PAGES = {
+    "json_ld": f"<html><head>{OG_IMAGE}{JSON_LD}</head><body><div class='job-description'>本文</div></body></html>",
+    "job_description": "<div class='post-content'>記事</div><div class='job-description'>説明 <b>太字</b></div>",
+    "post_content_only": "<div class='main post-content'><p>記事 1</p><br><p>記事 2</p></div>",
+    # .post-content の中にある .job-description が優先される
+    "nested": "<div class='post-content'><p>前置き</p><div class='job-description'><div>説明</div>です</div>"
+              "<p>後書き</p></div>",
+    "nested_same_tag": "<div class='job-description'><div><div>内側</div></div>外側</div><div>外</div>",
+    "empty_job_description": "<div class='job-description'> </div><div class='post-content'>記事</div>",
+    "long": "<div class='job-description'>" + "あ" * (FALLBACK_LIMIT + 50) + "</div>",
+    "none": "<html><body><p>何も無い</p></body></html>",
+}
+
+EXPECTED = {
+    "json_ld": {"summary": "仕事内容\nPython\n時給1,500円", "image_url": "https://img.example.com/1.png"},
+    "job_description": {"summary": "説明太字"},
+    "post_content_only": {"summary": "記事 1記事 2"},
+    "nested": {"summary": "説明です"},
+    "nested_same_tag": {"summary": "内側外側"},
+    "empty_job_description": {},
+    "long": {"summary": "あ" * FALLBACK_LIMIT},
+    "none": {},
+}
+
+
+def parse_with_bs4(html):
+    """BeautifulSoup を使っていた頃の parse_job_detail と同じ規則"""
+    bs4 = pytest.importorskip("bs4")
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    details = {}
+    json_ld = soup.find("script", type="application/ld+json")
+    if json_ld:
+        data = json.loads(json_ld.string)
+        if data.get("description"):
+            clean_desc = data["description"].replace("<br>", "\n").replace("<br />", "\n").replace("<br/>", "\n")
+            details["summary"] = bs4.BeautifulSoup(clean_desc, "html.parser").get_text(separator="\n", strip=True)
+    og_image = soup.find("meta", property="og:image")
+    if og_image and og_image.get("content"):
+        details["image_url"] = og_image["content"]
+    if not details.get("summary"):
+        summary_elem = soup.select_one(".job-description") or soup.select_one(".post-content")
+        if summary_elem and summary_elem.get_text(strip=True):
+            details["summary"] = summary_elem.get_text(strip=True)[:600]
+    return details
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_extracts_details(name):
+    assert extract_job_detail(PAGES[name]) == EXPECTED[name]
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_matches_beautifulsoup(name):
+    assert extract_job_detail(PAGES[name]) == parse_with_bs4(PAGES[name])
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_chunked_feed_gives_the_same_result(name):
+    html = PAGES[name]
+    chunks = [html[i:i + 7] for i in range(0, len(html), 7)]
+    assert extract_job_detail(chunks) == EXPECTED[name]
@@ -0,0 +1,37 @@
+from enrichment_store import EnrichmentStore
+
+
+def test_export_values_are_not_frozen_into_the_store():
+    store = EnrichmentStore(":memory:")
+    store.register([{"url": "a", "summary": "db v1", "image_url": "img v1"}])
+    assert store.get_many(["a"]) == {}
+
+    jobs = list(store.apply_many([{"url": "a", "summary": "db v2", "image_url": "img v2"}]))
+    assert jobs == [{"url": "a", "summary": "db v2", "image_url": "img v2"}]
+
+
+def test_saved_values_fill_only_empty_fields():
+    store = EnrichmentStore(":memory:")
+    store.register([{"url": "a"}, {"url": "b", "summary": "db"}])
+    store.save({"url": "a", "summary": "fetched", "image_url": "img"})
+    store.save({"url": "b", "recommendation": "generated"})
+
+    jobs = list(store.apply_many([{"url": "a", "summary": ""}, {"url": "b", "summary": "db v2"}]))
+    assert jobs == [
+        {"url": "a", "summary": "fetched", "image_url": "img"},
+        {"url": "b", "summary": "db v2", "recommendation": "generated"},
+    ]
+
+
+def test_pending_uses_listed_values():
+    store = EnrichmentStore(":memory:")
+    store.register([
+        {"url": "a"},
+        {"url": "b", "summary": "listed"},
+        {"url": "c", "summary": "listed", "recommendation": "listed"},
+    ])
+    pending = {job["url"]: job for job in store.pending()}
+    assert sorted(pending) == ["a", "b"]
+    assert pending["b"]["summary"] == "listed"
+    assert [job["url"] for job in store.pending(need_recommendation=False)] == ["a"]
+
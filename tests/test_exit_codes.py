@@ -0,0 +1,92 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import static_export
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(args, cwd, **overrides):
+    env = {k: v for k, v in os.environ.items() if k not in ("SUPABASE_URL", "SUPABASE_KEY", "OPENAI_API_KEY")}
+    env.update(PYTHONPATH=ROOT, METRICS_DIR="off")
+    env.update(overrides)
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True)
+
+
+@pytest.mark.parametrize("args", [
+    ["-m", "reboot", "sync"],
+    ["-m", "reboot", "prune"],
+    [os.path.join(ROOT, "sync_jobs.py")],
+])
+def test_sync_without_credentials_fails(tmp_path, args):
+    proc = run(args, tmp_path)
+    assert "Failed to init DB" in proc.stdout
+    assert proc.returncode == 1
+
+
+@pytest.mark.parametrize("args", [
+    ["-m", "reboot", "sync"],
+    [os.path.join(ROOT, "sync_jobs.py")],
+])
+def test_handled_failure_is_recorded_in_metrics(tmp_path, args):
+    metrics_dir = tmp_path / "metrics"
+    proc = run(args, tmp_path, METRICS_DIR=str(metrics_dir), METRICS_FORMAT="jsonl,prom")
+    assert proc.returncode == 1
+    [jsonl] = metrics_dir.glob("sync_jobs-*.jsonl")
+    run_line = json.loads(jsonl.read_text(encoding="utf-8").splitlines()[0])
+    assert run_line["type"] == "run"
+    assert run_line["exit_code"] == 1 and run_line["error"] == "exit code 1"
+    prom = (metrics_dir / "sync_jobs.prom").read_text(encoding="utf-8")
+    assert 'reboot_run_success{script="sync_jobs"} 0' in prom
+    assert 'reboot_run_exit_code{script="sync_jobs"} 1' in prom
+
+
+def test_successful_run_is_recorded_in_metrics(tmp_path):
+    (tmp_path / "src" / "data").mkdir(parents=True)
+    metrics_dir = tmp_path / "metrics"
+    proc = run(["-m", "reboot", "merge", "--no-static-export"], tmp_path,
+               METRICS_DIR=str(metrics_dir), METRICS_FORMAT="prom")
+    assert proc.returncode == 0
+    prom = (metrics_dir / "merge_jobs.prom").read_text(encoding="utf-8")
+    assert 'reboot_run_success{script="merge_jobs"} 1' in prom
+    assert 'reboot_run_exit_code{script="merge_jobs"} 0' in prom
+
+
+@pytest.mark.parametrize("args", [
+    ["-m", "reboot", "details"],
+    [os.path.join(ROOT, "update_job_details.py")],
+])
+def test_details_without_jobs_file_fails(tmp_path, args):
+    proc = run(args, tmp_path)
+    assert "Jobs data file not found" in proc.stdout
+    assert proc.returncode == 1
+
+
+def test_merge_without_outputs_succeeds(tmp_path):
+    (tmp_path / "src" / "data").mkdir(parents=True)
+    # public/data/jobs（配信中のエクスポート）は書き換えない
+    proc = run([os.path.join(ROOT, "merge_jobs.py"), "--no-static-export"], tmp_path)
+    assert proc.returncode == 0
+    assert json.loads((tmp_path / "src" / "data" / "jobs.json").read_text(encoding="utf-8")) == []
+
+
+def test_merge_without_changes_succeeds(tmp_path):
+    (tmp_path / "src" / "data").mkdir(parents=True)
+    assert run(["-m", "reboot", "merge", "--no-static-export"], tmp_path).returncode == 0
+    proc = run(["-m", "reboot", "merge", "--no-static-export"], tmp_path)
+    assert "No new scraper output" in proc.stdout
+    assert proc.returncode == 0
+
+
+def test_empty_export_reports_sizes(tmp_path, capsys):
+    # 求人が0件だと詳細シャードが1つも無く、サイズの報告で KeyError になっていた
+    export = static_export.ShardedExport(out_dir=str(tmp_path), compress=("gzip",))
+    report = export.commit()
+    static_export.print_report(report)
+    assert report["count"] == 0
+    assert report["sizes"]["detail"] == {"files": 0, "largest": 0, "raw": 0}
+    assert "0 shards" in capsys.readouterr().out
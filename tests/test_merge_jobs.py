@@ -0,0 +1,36 @@
+import functools
+import json
+
+import enrichment_store
+import merge_jobs
+from raw_store import RawStore
+
+ARGS = ["--workers", "1", "--no-location-cache", "--no-static-export", "--no-near-dup"]
+
+
+def write_output(directory, name, text):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_text(text, encoding="utf-8")
+
+
+def test_failed_source_is_retried_on_the_next_run(tmp_path, monkeypatch, capsys):
+    site = tmp_path / "site"
+    (site / "src" / "data").mkdir(parents=True)
+    monkeypatch.chdir(site)
+    monkeypatch.setattr(merge_jobs, "RawStore", functools.partial(RawStore, root=str(tmp_path / "raw")))
+    monkeypatch.setattr(enrichment_store, "DEFAULT_PATH", str(tmp_path / "enrichment.sqlite"))
+    monkeypatch.setattr(enrichment_store, "open_existing", lambda: None)
+    job = {"title": "データ分析インターン", "company": "アルファ", "link": "https://example.com/1"}
+    # 2件目の途中で切れた出力（1件目だけ読める）
+    text = json.dumps([job, job], ensure_ascii=False)
+    write_output(tmp_path / "infra-scraping" / "output", "jobs_1.json", text[:-20])
+
+    assert merge_jobs.main(ARGS) == 1
+    # 失敗した回の入力は控えないので、次の回も no-op にせずにもう一度失敗として終わる
+    assert merge_jobs.main(ARGS) == 1
+    assert "No new scraper output" not in capsys.readouterr().out
+
+    write_output(tmp_path / "infra-scraping" / "output", "jobs_2.json", json.dumps([job], ensure_ascii=False))
+    assert merge_jobs.main(ARGS) is None
+    assert merge_jobs.main(ARGS) is None
+    assert "No new scraper output" in capsys.readouterr().out
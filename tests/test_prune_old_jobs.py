@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.fake_postgrest import FakePostgREST, now_iso
+from db_client_template import AsyncDBClient, DBClient
+
+
+class RefreshingPostgREST(FakePostgREST):
+    """prune_old_jobs が最初のバッチを取り出した直後に、その1行目の updated_at を更新する（スクレーパーの touch_urls 相当）"""
+
+    refreshed = None
+
+    def _execute(self, method, table, tests, options, prefer, body, out_headers):
+        result = super()._execute(method, table, tests, options, prefer, body, out_headers)
+        if method == "GET" and self.refreshed is None:
+            row = table.by_id[result[1][0]["id"]]
+            row["updated_at"] = now_iso()
+            self.refreshed = row["url"]
+        return result
+
+
+class ListArchive:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+
+def seed_expired(server, n=5):
+    old = (datetime.now(timezone.utc) - timedelta(days=40)).isoformat()
+    server.seed("jobs", [
+        {"site_name": "Infra", "title": f"job {i}", "url": f"https://example.com/{i}", "updated_at": old}
+        for i in range(n)
+    ])
+
+
+def prune(client_class, server, archive):
+    if client_class is DBClient:
+        return DBClient(url=server.url, key=server.key).prune_old_jobs(batch_size=2, archive=archive)
+
+    async def run():
+        async with AsyncDBClient(url=server.url, key=server.key) as db:
+            return await db.prune_old_jobs(batch_size=2, archive=archive)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("client_class", [DBClient, AsyncDBClient])
+def test_rows_refreshed_after_select_are_not_reported(client_class):
+    with RefreshingPostgREST() as server:
+        seed_expired(server)
+        archive = ListArchive()
+        result = prune(client_class, server, archive)
+
+        assert [row["url"] for row in server.tables["jobs"].rows] == [server.refreshed]
+    assert result.matched == result.archived == 5
+    assert result.deleted == 4
+    assert sorted(result.urls) == sorted({f"https://example.com/{i}" for i in range(5)} - {server.refreshed})
+    # 消す前に退避するので、取り出した後に更新されて残った行も退避先には入る
+    assert sorted(row["url"] for row in archive.rows) == [f"https://example.com/{i}" for i in range(5)]
+    assert all(row["title"] for row in archive.rows)
+
+
+class FailingArchive(ListArchive):
+    """fail_at 回目の write で失敗する"""
+
+    def __init__(self, fail_at):
+        super().__init__()
+        self.calls = 0
+        self.fail_at = fail_at
+
+    def write(self, rows):
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise OSError("disk full")
+        super().write(rows)
+
+
+@pytest.mark.parametrize("client_class", [DBClient, AsyncDBClient])
+@pytest.mark.parametrize("fail_at", [1, 2])
+def test_rows_survive_a_failed_archive_write(client_class, fail_at):
+    with FakePostgREST() as server:
+        seed_expired(server)
+        archive = FailingArchive(fail_at)
+        result = prune(client_class, server, archive)
+        remaining = sorted(row["url"] for row in server.tables["jobs"].rows)
+
+    # 退避できたバッチだけが消え、失敗したバッチから先は残る
+    archived = sorted(row["url"] for row in archive.rows)
+    assert archive.calls == fail_at
+    assert result.archived == result.deleted == len(archived) == 2 * (fail_at - 1)
+    assert sorted(result.urls) == archived
+    assert remaining == sorted(set(f"https://example.com/{i}" for i in range(5)) - set(archived))
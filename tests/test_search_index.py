@@ -0,0 +1,140 @@
+import pytest
+
+import search_index
+from search_index import (SUMMARY_CHARS, TEXT_FIELDS, SearchIndex, SearchIndexBuilder, decode_varints,
+                          encode_varints, normalize)
+from static_export import export_id, job_category
+
+JOBS = [
+    {"title": "データ分析インターン", "company": "株式会社アルファ", "prefecture": "東京都", "source": "Infra"},
+    {"title": "Python エンジニア", "company": "ベータ", "prefecture": "大阪府", "source": "ZeroOne"},
+    {"title": "営業アシスタント", "company": "ガンマ分析", "prefecture": "東京都", "source": "Infra"},
+    {"title": "Web マーケティング", "company": "イプシロン", "summary": "データを使った分析の補助",
+     "prefecture": "福岡県", "source": "ZeroOne"},
+    {"title": "C言語 組込みエンジニア", "company": "デルタ", "prefecture": "東京都", "source": "Infra"},
+    {"title": "ＰＹＴＨＯＮ データ基盤", "company": "ゼータ", "summary": "x" * SUMMARY_CHARS + "分析",
+     "source": "Infra"},
+]
+for i, job in enumerate(JOBS):
+    job["link"] = f"https://example.com/jobs/{i}"
+VARINTS = [0, 1, 127, 128, 300, 16383, 16384, 2 ** 21 - 1, 2 ** 21, 2 ** 28, 2 ** 32 - 1]
+
+
+def build():
+    builder = SearchIndexBuilder()
+    for job in JOBS:
+        builder.add(job, export_id(job), job_category(job.get("title")))
+    return builder.to_bytes()
+
+
+@pytest.fixture(params=["numpy", "python"])
+def use_numpy(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(search_index, "np", None)
+    return request.param
+
+
+@pytest.fixture
+def index(use_numpy):
+    return SearchIndex(build())
+
+
+def scan(query="", category=None, prefecture=None, source=None):
+    """全件をなめる検索（空白区切りの語をすべて部分文字列として含み、絞り込みに合うもの）"""
+    words = normalize(query).split()
+    docs = []
+    for doc, job in enumerate(JOBS):
+        text = normalize(" ".join(job.get(field) or "" for field in TEXT_FIELDS)
+                         + " " + (job.get("summary") or "")[:SUMMARY_CHARS])
+        if ((not category or job_category(job.get("title")) == category)
+                and (not prefecture or job.get("prefecture") == prefecture)
+                and (not source or job.get("source") == source)
+                and all(word in text for word in words)):
+            docs.append(doc)
+    return docs
+
+
+@pytest.mark.parametrize("query", ["分析", "分析 デー", "データ 分析", "python", "エンジニア 東京", "py ン"])
+def test_terms_are_anded(index, query):
+    expected = scan(query)
+    got = index.search(query)
+    assert set(expected) <= set(got)
+    # 2文字以下の語だけなら 2-gram の AND は部分文字列検索と一致する
+    if all(len(word) <= 2 for word in normalize(query).split()):
+        assert got == expected
+
+
+def test_and_of_long_terms(index):
+    # 本文の SUMMARY_CHARS 文字より後ろは索引しない（5 の "分析"）
+    assert index.search("データ 分析") == scan("データ 分析") == [0, 3]
+
+
+@pytest.mark.parametrize("query", ["析", "c", "ン", "ｃ"])
+def test_single_characters(index, query):
+    assert index.search(query) == scan(query)
+
+
+@pytest.mark.parametrize("facets", [
+    {"prefecture": "東京都"},
+    {"source": "ZeroOne"},
+    {"category": "エンジニア"},
+    {"category": "エンジニア", "prefecture": "東京都", "source": "Infra"},
+])
+def test_facets_only(index, facets):
+    assert index.search(**facets) == scan(**facets)
+    assert index.search("", **facets)
+
+
+def test_facets_with_query(index):
+    assert index.search("分析", prefecture="東京都") == scan("分析", prefecture="東京都") == [0, 2]
+
+
+@pytest.mark.parametrize("query, facets", [
+    ("存在しない", {}),
+    ("龍", {}),
+    ("分析", {"prefecture": "北海道"}),
+    ("", {"source": "Indeed"}),
+    ("python", {"prefecture": "東京都"}),
+])
+def test_no_match_returns_empty_list(index, query, facets):
+    assert index.search(query, **facets) == []
+
+
+def test_empty_query_returns_every_job(index):
+    assert index.search() == list(range(len(JOBS)))
+
+
+def test_ids_follow_insertion_order(index):
+    assert index.ids(index.search("データ 分析")) == [export_id(JOBS[0]), export_id(JOBS[3])]
+
+
+def test_open_maps_the_file(tmp_path, use_numpy):
+    path = tmp_path / "search.bin"
+    path.write_bytes(build())
+    index = SearchIndex.open(str(path))
+    assert len(index) == len(JOBS)
+    assert index.search("分析", source="Infra") == scan("分析", source="Infra")
+
+
+def test_builder_bytes_do_not_depend_on_numpy(monkeypatch):
+    pytest.importorskip("numpy")
+    with_numpy = build()
+    monkeypatch.setattr(search_index, "np", None)
+    assert build() == with_numpy
+
+
+def test_varint_round_trip():
+    data = encode_varints(VARINTS)
+    assert len(encode_varints([127])) == 1 and len(encode_varints([128])) == 2
+    assert decode_varints(data) == VARINTS
+
+
+def test_varint_round_trip_numpy():
+    np = pytest.importorskip("numpy")
+    packed, nbytes = search_index._encode_varints_np(np.array(VARINTS, dtype=np.uint32))
+    assert packed.tobytes() == encode_varints(VARINTS)
+    assert nbytes.tolist() == [len(encode_varints([v])) for v in VARINTS]
+    assert search_index._decode_varints_np(packed.tobytes()).tolist() == VARINTS
+    assert search_index._decode_varints_np(b"").tolist() == []
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+import station_index
+from conftest import ROOT
+from merge_jobs import PREF_CODE_MAP
+from station_index import build_index, load_station_index
+
+CSV_PATH = os.path.join(ROOT, "station20251211free.csv")
+
+
+@pytest.fixture
+def small_csv(tmp_path):
+    path = tmp_path / "stations.csv"
+    with open(CSV_PATH, encoding="utf-8") as f:
+        path.write_text("".join(next(f) for _ in range(301)), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def hash_calls(monkeypatch):
+    calls = []
+
+    def csv_sha256(path):
+        calls.append(path)
+        return original(path)
+    original = station_index.csv_sha256
+    monkeypatch.setattr(station_index, "csv_sha256", csv_sha256)
+    return calls
+
+
+@pytest.mark.parametrize("keep", [0.2, 0.5, 0.9, 0.999])
+def test_truncated_index_is_rebuilt(small_csv, tmp_path, keep):
+    index_path = str(tmp_path / "stations.idx")
+    expected = list(build_index(small_csv, PREF_CODE_MAP, index_path).matcher.names)
+    size = os.path.getsize(index_path)
+    # 要素の大きさで割り切れない位置でも切る
+    with open(index_path, "r+b") as f:
+        f.truncate(int(size * keep) | 1)
+
+    assert list(load_station_index(small_csv, PREF_CODE_MAP, index_path).matcher.names) == expected
+    assert os.path.getsize(index_path) == size
+
+
+def test_stamp_is_refreshed_when_content_is_unchanged(small_csv, tmp_path, hash_calls):
+    index_path = str(tmp_path / "stations.idx")
+    build_index(small_csv, PREF_CODE_MAP, index_path)
+    hash_calls.clear()
+    st = os.stat(small_csv)
+    os.utime(small_csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    assert load_station_index(small_csv, PREF_CODE_MAP, index_path).row_count == 300
+    assert hash_calls == [small_csv]
+    # 書き換えたスタンプが合うので、2回目はハッシュを取らない
+    assert load_station_index(small_csv, PREF_CODE_MAP, index_path).row_count == 300
+    assert hash_calls == [small_csv]
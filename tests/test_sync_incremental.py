@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import enrichment_store
+import sync_jobs
+from conftest import make_rows
+
+
+class MemoryDB:
+    """sync_full / sync_incremental が使う iter_jobs だけを持つ jobs テーブル"""
+
+    def __init__(self, rows):
+        self.rows = {row["url"]: row for row in rows}
+
+    def iter_jobs(self, columns=None, since=None, sources=None, **kwargs):
+        rows = [row for row in self.rows.values()
+                if row["site_name"] in sources and (not since or row["updated_at"] >= since)]
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        for row in rows:
+            yield dict(row)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_jobs, "OUTPUT_FILE", str(tmp_path / "jobs.json"))
+    monkeypatch.setattr(sync_jobs, "UPDATED_AT_FILE", str(tmp_path / "sync_updated_at.json"))
+    monkeypatch.setattr(enrichment_store, "open_existing", lambda: None)
+    return tmp_path
+
+
+def exported_rows(n):
+    rows = [row for row in make_rows(n) if sync_jobs.normalize_job(dict(row)) is not None]
+    assert len(rows) >= 3
+    return rows[:3]
+
+
+def sync(db, state, incremental):
+    stats = {"fetched": 0, "added": 0, "changed": 0, "removed": 0, "watermark": state.get("watermark")}
+    if incremental:
+        sync_jobs.sync_incremental(db, state, sync_jobs.load_export(), stats, static_export=False, near_dup=False)
+    else:
+        sync_jobs.sync_full(db, stats, static_export=False, near_dup=False)
+    state["watermark"] = stats["watermark"]
+    return stats
+
+
+def test_touched_row_is_not_expired_from_the_stale_export(workdir):
+    now = datetime.now(timezone.utc)
+    touched, other, newest = exported_rows(40)
+    touched["updated_at"] = (now - timedelta(days=31)).isoformat()
+    other["updated_at"] = (now - timedelta(hours=1)).isoformat()
+    newest["updated_at"] = (now - timedelta(hours=2)).isoformat()
+    db = MemoryDB([touched, other, newest])
+    state = {}
+    sync(db, state, incremental=False)
+
+    # touch_urls: only updated_at moves, so jobs.json is not rewritten
+    db.rows[touched["url"]]["updated_at"] = (now - timedelta(minutes=30)).isoformat()
+    db.rows[newest["url"]]["updated_at"] = now.isoformat()
+    stats = sync(db, state, incremental=True)
+    assert not stats["rewritten"]
+
+    # The next run only re-reads the overlap window, which no longer includes the touched row
+    stats = sync(db, state, incremental=True)
+    assert stats["fetched"] == 1
+    assert stats["removed"] == 0
+    assert touched["url"] in {job["url"] for job in sync_jobs.load_export()}
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_postgrest import FakePostgREST
+from db_client_template import AsyncDBClient, DBClient
+
+
+def job(url, title, **extra):
+    return dict({"site_name": "Infra", "title": title, "url": url}, **extra)
+
+
+def upsert(client_class, server, jobs, batch_size):
+    if client_class is DBClient:
+        return DBClient(url=server.url, key=server.key).upsert_jobs(jobs, batch_size=batch_size)
+
+    async def run():
+        async with AsyncDBClient(url=server.url, key=server.key) as db:
+            return await db.upsert_jobs(jobs, batch_size=batch_size)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("client_class", [DBClient, AsyncDBClient])
+@pytest.mark.parametrize("jobs, batch_size", [
+    # 最後にまとめて送るとき、キーの組み合わせ (company) のバッチが先に送られる
+    ([job("b", "B", company="x"), job("a", "old", summary="s"), job("a", "new", company="x")], 100),
+    # (summary) のバッチが batch_size に達して先に送られる
+    ([job("a", "old", company="x"), job("b", "B", summary="s"), job("a", "new", summary="s")], 2),
+])
+def test_repeated_url_with_other_keys_keeps_the_later_row(client_class, jobs, batch_size):
+    with FakePostgREST() as server:
+        results = upsert(client_class, server, jobs, batch_size)
+        titles = {row["url"]: row["title"] for row in server.tables["jobs"].rows}
+
+    assert titles == {"a": "new", "b": "B"}
+    statuses = {(j["url"], j["title"]): r.status for j, r in zip(jobs, results)}
+    assert statuses == {("a", "old"): "new", ("a", "new"): "updated", ("b", "B"): "new"}
@@ -1,197 +1,486 @@
+import argparse
 import json
 import asyncio
 import random
 import os
-from openai import OpenAI
+import sqlite3
+import sys
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
+import enrichment_store
+import metrics
+from detail_extractor import DetailExtractor, extract_job_detail
+from enrichment_store import EnrichmentStore
+from fingerprint import format_changes
+from json_stream import iter_json_items
+from recommendation import RecommendationCache, RecommendationGenerator
+from stage_state import file_stamp, load_state, save_state
+from static_export import print_report, write_exports
 
 # Load environment variables
 load_dotenv()
 
 DATA_FILE = "src/data/jobs.json"
-TARGET_SOURCE = "Infra"
+# 前回の実行の終わりの jobs.json の stat と、処理待ちが残ったかどうか（残っていなければ次回は何もしない）
+STATE_FILE = ".cache/details_state.json"
+
+# 詳細ページを並列に開くページ数
+CONCURRENCY = int(os.environ.get("DETAIL_CONCURRENCY", "4"))
+# 同一ホストへのリクエスト開始間隔（秒）と、それに足すランダム幅、同時接続数
+HOST_MIN_INTERVAL = float(os.environ.get("DETAIL_HOST_INTERVAL", "1.0"))
+HOST_JITTER = 1.0
+HOST_MAX_CONCURRENCY = 2
+# 失敗時の再試行回数とバックオフの基準秒数 (base * 2^attempt)
+MAX_RETRIES = 2
+RETRY_BACKOFF = 2.0
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+# HTTPで取れなかったページだけ Playwright で開く。HTTPクライアントのコネクションプール上限
+HTTP_MAX_CONNECTIONS = 8
+HTTP_TIMEOUT = 30.0
+# ETag / Last-Modified と抽出結果を覚えておく（条件付きリクエスト用）
+HTTP_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "detail_http.sqlite")
 
 # OpenAI Client Setup
+# openai / playwright / httpx は import だけで1秒ほどかかるので、処理する求人があると分かってから読み込む
 api_key = os.environ.get("OPENAI_API_KEY")
 
-client = OpenAI(api_key=api_key) if api_key else None
-
-if not api_key:
-    print("⚠️  OPENAI_API_KEY is not set in .env. AI recommendations will be skipped.")
-
-def generate_ai_recommendation(title, summary):
-    if not client or not summary:
-        return None
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-5-nano",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """あなたは未経験者向け求人サイト「RE:BOOT」の編集部です。
-求人の「一番のウリ（高時給、フルリモート、有名企業、特定のスキル習得など）」を見つけ出し、それを強調したおすすめコメントを100〜150文字程度で作成してください。
-
-# 重要ルール
-- 「成長できる」「やりがいがある」といった**ありきたりな表現は禁止**です。具体的に何が得られるかを書いてください。
-- ターゲットは未経験の大学生です。彼らにとって魅力的なメリット（稼げる、就活に有利など）を具体的に訴求してください。
-- 読み手の目を引くような、少しエッジの効いたキャッチーな書き出しにしてください。
-- 丁寧語（〜です、〜ます）で書きますが、堅苦しくならないようにしてください。
-- 最後に「〜なら今すぐ応募！」「〜したい人におすすめ！」などで行動を促してください。"""
-                },
-                {"role": "user", "content": f"求人タイトル: {title}\n\n概要:\n{summary[:1000]}"}
-            ],
-            max_completion_tokens=8000  # 4000でも足りないケースがあったため倍増
+# おすすめ文の同時生成数（OpenAIのレート制限に合わせて調整）
+AI_CONCURRENCY = int(os.environ.get("AI_CONCURRENCY", "4"))
+
+# init_recommender() で作る。キーが無ければ client は None のまま
+client = None
+recommender = None
+
+
+def init_recommender():
+    """OpenAI クライアントと、生成済みのおすすめ文を (タイトル, 概要, プロンプト版) 単位でキャッシュする生成器を用意する"""
+    global client, recommender
+    if api_key and client is None:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=api_key)
+    if recommender is None:
+        recommender = RecommendationGenerator(client, RecommendationCache(), concurrency=AI_CONCURRENCY)
+    return recommender
+
+
+@metrics.timed("ai.recommendation")
+async def generate_ai_recommendation(title, summary):
+    return await recommender.generate(title, summary)
+
+
+class HostRateLimiter:
+    """
+    ホストごとのリクエスト間隔と同時接続数を制限する（一律の sleep の代わり）
+    リクエスト開始時刻をホストごとに予約していくので、複数ページから同時に呼ばれても間隔が守られる
+    """
+
+    def __init__(self, min_interval=HOST_MIN_INTERVAL, jitter=HOST_JITTER, max_concurrency=HOST_MAX_CONCURRENCY):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self._next_slot = {}
+        self._semaphores = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlsplit(url).netloc
+        sem = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrency))
+        async with sem:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = start + self.min_interval + random.uniform(0, self.jitter)
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+def parse_job_detail(content):
+    """
+    詳細ページのHTMLから summary と image_url を取り出す（detail_extractor のストリーミング抽出）
+    """
+    return extract_job_detail(content)
+
+
+class DetailHttpCache:
+    """URLごとの ETag / Last-Modified と、その時の抽出結果"""
+
+    def __init__(self, path=HTTP_CACHE_FILE):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, details TEXT)"
         )
+        self.conn.commit()
 
-        if response.choices and len(response.choices) > 0:
-            content = response.choices[0].message.content
-            if content:
-                return content.strip()
+    def get(self, url):
+        row = self.conn.execute("SELECT etag, last_modified, details FROM pages WHERE url = ?", (url,)).fetchone()
+        if not row:
             return None
-        return None
-    except Exception as e:
-        print(f"⚠️ OpenAI API Error: {e}")
-        # 詳細なエラー情報を出力
-        if hasattr(e, 'response'): 
-            pass # Removed debug print
-        return None
-
-async def scrape_job_detail(page, url):
-    # Removed debug print: print(f"🔍 Visiting: {url}")
-    try:
-        await page.goto(url, timeout=60000, wait_until="domcontentloaded")
-        await asyncio.sleep(random.uniform(2, 4)) # ランダムな待機時間
-
-        # HTML解析
-        content = await page.content()
-        soup = BeautifulSoup(content, "html.parser")
-
-        details = {}
-
-        # JSON-LDの解析ロジック（共通）
-        json_ld_elem = soup.find("script", type="application/ld+json")
-        if json_ld_elem:
+        return {"etag": row[0], "last_modified": row[1], "details": json.loads(row[2] or "{}")}
+
+    def put(self, url, etag, last_modified, details):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, details) VALUES (?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(details, ensure_ascii=False)),
+            )
+
+
+@metrics.timed("detail.http")
+async def fetch_job_detail_http(client, url, limiter=None, http_cache=None, retries=MAX_RETRIES):
+    """
+    ブラウザを使わずに生のHTMLから summary / image_url を取る（高速パス）
+    条件付きリクエストで変わっていなければ前回の抽出結果を使う
+    :return: (details, not_modified)。summary が取れなければ details は None（→ Playwright へ）
+    """
+    import httpx
+
+    headers = {}
+    cached = http_cache.get(url) if http_cache else None
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    for attempt in range(retries + 1):
+        try:
+            async with (limiter.slot(url) if limiter else _nullslot()):
+                async with client.stream("GET", url, headers=headers) as response:
+                    if response.status_code >= 500 or response.status_code == 429:
+                        raise RuntimeError(f"HTTP {response.status_code}")
+                    if response.status_code == 304 and cached:
+                        details = cached["details"]
+                        return (details if details.get("summary") else None), True
+                    if response.status_code != 200:
+                        return None, False
+                    # 必要なものが揃ったらパースは止めるが、接続を使い回すためにボディは読み切る
+                    parser = DetailExtractor()
+                    async for chunk in response.aiter_text():
+                        if not parser.has_primary:
+                            parser.feed(chunk)
+                    if not parser.has_primary:
+                        parser.close()
+                    details = parser.details()
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+            break
+        except (httpx.HTTPError, RuntimeError) as e:
+            if attempt >= retries:
+                print(f"  ⚠️ HTTP fetch failed for {url}: {e}")
+                return None, False
+            delay = RETRY_BACKOFF * (2 ** attempt) + random.uniform(0, RETRY_BACKOFF)
+            metrics.incr("detail.http_retries")
+            await asyncio.sleep(delay)
+
+    if http_cache and (etag or last_modified):
+        http_cache.put(url, etag, last_modified, details)
+    return (details if details.get("summary") else None), False
+
+
+@asynccontextmanager
+async def _nullslot():
+    yield
+
+
+class LazyBrowser:
+    """
+    Playwright は HTTP で取れないページが出て初めて起動する。ページは使い回す
+    """
+
+    def __init__(self, max_pages=CONCURRENCY):
+        self.max_pages = max_pages
+        self._lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._idle = []
+        self._page_slots = asyncio.Semaphore(max_pages)
+
+    @property
+    def started(self):
+        return self._browser is not None
+
+    async def _start(self):
+        async with self._lock:
+            if self._context is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._context = await self._browser.new_context(user_agent=USER_AGENT)
+
+    @asynccontextmanager
+    async def page(self):
+        async with self._page_slots:
+            await self._start()
+            page = self._idle.pop() if self._idle else await self._context.new_page()
             try:
-                data = json.loads(json_ld_elem.string)
-                if isinstance(data, list):
-                    data = data[0] if data else {}
-                
-                if data.get("description"):
-                    raw_desc = data["description"]
-                    # 改行コードの統一
-                    clean_desc = raw_desc.replace("<br>", "\n").replace("<br />", "\n").replace("<br/>", "\n")
-                    # HTMLタグ除去 & テキスト化
-                    soup_desc = BeautifulSoup(clean_desc, "html.parser")
-                    details["summary"] = soup_desc.get_text(separator="\n", strip=True)
-
-            except json.JSONDecodeError:
-                print("⚠️ Failed to parse JSON-LD")
-
-        # 2. 画像 (Metaタグから取得)
-        og_image = soup.find("meta", property="og:image")
-        if og_image and og_image.get("content"):
-            details["image_url"] = og_image["content"]
-
-        # JSON-LDで取得できなかった場合のフォールバック
-        if not details.get("summary"):
-             summary_elem = soup.select_one(".job-description") or soup.select_one(".post-content")
-             if summary_elem:
-                details["summary"] = summary_elem.get_text(strip=True)[:600]
-        
+                yield page
+            finally:
+                self._idle.append(page)
+
+    async def close(self):
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+
+
+class DetailFetcher:
+    """
+    詳細ページの取得: まず HTTP + ストリーミング抽出、ダメなら Playwright で描画して抽出
+    """
+
+    def __init__(self, limiter, http_client, browser, http_cache=None):
+        self.limiter = limiter
+        self.http_client = http_client
+        self.browser = browser
+        self.http_cache = http_cache
+        self.stats = {"http": 0, "not_modified": 0, "browser": 0, "failed": 0}
+
+    async def fetch(self, url):
+        if self.http_client is not None:
+            details, not_modified = await fetch_job_detail_http(self.http_client, url, self.limiter, self.http_cache)
+            if details:
+                self.stats["not_modified" if not_modified else "http"] += 1
+                return details
+
+        if self.browser is None:
+            self.stats["failed"] += 1
+            return None
+        async with self.browser.page() as page:
+            details = await scrape_job_detail(page, url, self.limiter)
+        self.stats["browser" if details else "failed"] += 1
         return details
 
-    except Exception as e:
-        print(f"⚠️ Error scraping {url}: {e}")
-        return None
 
-async def main():
+def new_http_client():
+    import httpx
+    return httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT},
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+@metrics.timed("detail.browser")
+async def scrape_job_detail(page, url, limiter=None, retries=MAX_RETRIES):
+    """
+    詳細ページを開いて summary / image_url を取得する
+    失敗時は指数バックオフで retries 回まで再試行し、それでもダメなら None
+    """
+    for attempt in range(retries + 1):
+        try:
+            if limiter:
+                async with limiter.slot(url):
+                    response = await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+            else:
+                response = await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+            if response is not None and (response.status >= 500 or response.status == 429):
+                raise RuntimeError(f"HTTP {response.status}")
+
+            # HTML解析
+            content = await page.content()
+            return parse_job_detail(content)
+
+        except Exception as e:
+            if attempt >= retries:
+                print(f"⚠️ Error scraping {url}: {e}")
+                return None
+            delay = RETRY_BACKOFF * (2 ** attempt) + random.uniform(0, RETRY_BACKOFF)
+            print(f"  ↻ Retry {attempt + 1}/{retries} for {url} in {delay:.1f}s ({e})")
+            metrics.incr("detail.browser_retries")
+            await asyncio.sleep(delay)
+
+
+async def scrape_job(job, fetcher):
+    """詳細ページ取得（summaryが無い求人のみ）。更新があれば True"""
+    job_updated = False
+    details = await fetcher.fetch(job["link"])
+    if details:
+        for field in ("summary", "image_url"):
+            # 取れた値が今と同じなら更新扱いにしない（無駄な書き戻しを避ける）
+            if details.get(field) and details[field] != job.get(field):
+                job[field] = details[field]
+                job_updated = True
+    return job_updated
+
+
+async def recommend_job(job):
+    """AIおすすめ文生成（summaryがありrecommendationが無い求人のみ）。更新があれば True"""
+    print(f"  🤖 Generating AI recommendation: {job['title']}")
+    rec_text = await generate_ai_recommendation(job["title"], job["summary"])
+    if rec_text:
+        job["recommendation"] = rec_text
+        print("  ✨ Recommendation generated.")
+        return True
+    print("  ⚠️ AI Generation failed.")
+    return False
+
+
+def needs_recommendation(job):
+    return bool(job.get("summary")) and not job.get("recommendation") and client is not None and recommender is not None
+
+
+async def run_detail_pool(jobs, fetcher, concurrency=CONCURRENCY, on_updated=None, on_failed=None):
+    """
+    スクレイピングとおすすめ文生成をパイプラインで回す
+    - summary が無い求人は concurrency 個のワーカーがキューから取り出して詳細ページを取得する
+    - summary が揃った求人から順におすすめ文生成タスクを投げる（同時数は recommender 側で制限）
+    :param fetcher: DetailFetcher（スクレイピング不要なら None）
+    :param on_updated: 更新があるたびに完了順で呼ばれるコールバック
+    :param on_failed: 詳細やおすすめ文が取れなかったときに (job, 理由) で呼ばれるコールバック
+    :return: 更新された求人の件数
+    """
+    queue = asyncio.Queue()
+    for job in jobs:
+        if not job.get("summary") and fetcher is not None:
+            queue.put_nowait(job)
+    updated = set()
+    rec_tasks = []
+    progress = {"done": 0}
+
+    def mark_updated(job):
+        updated.add(id(job))
+        if on_updated:
+            on_updated(job)
+
+    def mark_failed(job, reason):
+        if on_failed:
+            on_failed(job, reason)
+
+    async def recommend(job):
+        if await recommend_job(job):
+            mark_updated(job)
+        else:
+            mark_failed(job, "recommendation failed")
+
+    def schedule_recommendation(job):
+        if needs_recommendation(job):
+            rec_tasks.append(asyncio.create_task(recommend(job)))
+
+    async def worker():
+        while True:
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if await scrape_job(job, fetcher):
+                mark_updated(job)
+            elif not job.get("summary"):
+                mark_failed(job, "no details")
+            progress["done"] += 1
+            print(f"[{progress['done']}/{queue_size}] Scraped: {job['title']}")
+            schedule_recommendation(job)
+
+    # summary が既にある求人はスクレイピングを待たずに生成を始める
+    for job in jobs:
+        if job.get("summary"):
+            schedule_recommendation(job)
+
+    queue_size = queue.qsize()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, queue_size))))
+    await asyncio.gather(*rec_tasks)
+    return len(updated)
+
+
+def details_inputs(args):
+    """前回の実行の終わりと比べる入力（jobs.json とストアの stat、処理対象を変えるオプション）"""
+    return {
+        "jobs": file_stamp(DATA_FILE),
+        "store": file_stamp(enrichment_store.DEFAULT_PATH),
+        "options": [sorted(args.source or []), args.limit, bool(api_key), args.no_static_export],
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch job details and AI recommendations into the enrichment store")
+    parser.add_argument("--source", action="append", help="only process jobs from this source (repeatable)")
+    parser.add_argument("--limit", type=int, help="process at most this many jobs (default: all pending)")
+    parser.add_argument("--no-static-export", action="store_true",
+                        help="only write jobs.json (skip the listing index / detail shards in public/data/jobs)")
+    args = parser.parse_args(argv)
+
     print("🚀 Starting detailed scraping & AI generation...")
-    
-    # 1. データ読み込み
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            jobs = json.load(f)
-    except FileNotFoundError:
+
+    # 1. エクスポートに載っている求人をストアに登録（jobs.json にある詳細は処理待ちの判定用に控える）
+    if not os.path.exists(DATA_FILE):
         print("❌ Jobs data file not found.")
+        return 1
+    if not api_key:
+        print("⚠️  OPENAI_API_KEY is not set in .env. AI recommendations will be skipped.")
+    # 前回の実行の後に jobs.json もストアも変わっておらず、処理待ちも残らなかったなら、読み込む前に終わる
+    state = load_state(STATE_FILE)
+    if state.get("left_pending") == 0 and state.get("inputs") == details_inputs(args):
+        print(f"✅ No jobs need updating. {DATA_FILE} is unchanged since the last run.")
         return
+    store = EnrichmentStore()
+    added = store.register(iter_json_items(DATA_FILE))
+    print(f"🗃️  Enrichment store: {added} new jobs registered, {store.stats()}")
 
-    # Reverted force-update logic: only process jobs from TARGET_SOURCE
-    target_jobs = [
-        j for j in jobs 
-        if j.get("source") == TARGET_SOURCE and (not j.get("summary") or not j.get("recommendation"))
-    ]
-    
-    print(f"📋 Found {len(target_jobs)} jobs to process.")
-    if len(target_jobs) == 0:
+    # 詳細が揃っていない求人を、ソースをまたいで古い順に
+    pending = store.pending(need_recommendation=bool(api_key), sources=args.source, limit=args.limit)
+    print(f"📋 Found {len(pending)} jobs to process.")
+
+    if pending:
+        init_recommender()
+        # 2. 処理実行
+        # HTTPクライアントは summary が無い求人がある場合のみ用意する
+        # Playwright は HTTP で取れないページが出た時点で初めて起動する
+        needs_scraping = any(not j.get("summary") for j in pending)
+        fetcher = None
+        http_client = None
+        browser = None
+        if needs_scraping:
+            http_client = new_http_client()
+            browser = LazyBrowser(CONCURRENCY)
+            fetcher = DetailFetcher(HostRateLimiter(), http_client, browser, DetailHttpCache())
+
+        # 1件終わるごとにストアへコミットする（途中で落ちても次回は続きから）
+        try:
+            updated_count = await run_detail_pool(
+                pending, fetcher, CONCURRENCY, on_updated=store.save, on_failed=store.record_failure
+            )
+        finally:
+            if http_client:
+                await http_client.aclose()
+            if browser:
+                await browser.close()
+        if fetcher:
+            print(f"🌐 Detail pages: {fetcher.stats} (browser started: {browser.started})")
+            metrics.record("detail", fetcher.stats)
+        metrics.record("ai", recommender.stats)
+        metrics.incr("jobs.pending", len(pending))
+        metrics.incr("jobs.updated", updated_count)
+        print(f"✨ Updated {updated_count} jobs. Store: {store.stats()}")
+    else:
         print("✅ No jobs need updating.")
-        return
 
-    # 2. 処理実行
-    updated_count = 0
-    BATCH_SIZE = 100
-    
-    # Playwright起動（必要な場合のみ）
-    # summaryがないジョブが1つでもある場合のみブラウザを起動
-    needs_scraping = any(not j.get("summary") for j in target_jobs[:BATCH_SIZE])
-    
-    browser = None
-    page = None
-    playwright = None
-
-    if needs_scraping:
-        playwright = await async_playwright().start()
-        browser = await playwright.chromium.launch(headless=True)
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    # 3. ストアの内容を重ねて jobs.json を作り直す（中身が変わっていなければ書き換えない）
+    with metrics.span("export.write"):
+        count, changes, report = write_exports(
+            DATA_FILE, store.apply_many(iter_json_items(DATA_FILE)), not args.no_static_export
         )
-        page = await context.new_page()
-
-    try:
-        for i, job in enumerate(target_jobs[:BATCH_SIZE]):
-            print(f"[{i+1}/{min(len(target_jobs), BATCH_SIZE)}] Processing: {job['title']}...")
-            job_updated = False
-            
-            # 1. Scraping (if summary missing)
-            if not job.get("summary") and page:
-                details = await scrape_job_detail(page, job["link"])
-                if details:
-                    if details.get("summary"):
-                        job["summary"] = details["summary"]
-                        job_updated = True
-                    if details.get("image_url"):
-                        job["image_url"] = details["image_url"]
-                        job_updated = True
-            
-            # 2. AI Recommendation (if summary exists but recommendation missing)
-            if job.get("summary") and not job.get("recommendation") and api_key:
-                print("  🤖 Generating AI recommendation...")
-                rec_text = generate_ai_recommendation(job["title"], job["summary"])
-                if rec_text:
-                    job["recommendation"] = rec_text
-                    print("  ✨ Recommendation generated.")
-                    job_updated = True
-                else:
-                    print("  ⚠️ AI Generation failed.")
-            
-            if job_updated:
-                updated_count += 1
-
-    finally:
-        if browser:
-            await browser.close()
-        if playwright:
-            await playwright.stop()
-
-    # 3. 保存
-    if updated_count > 0:
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(jobs, f, indent=2, ensure_ascii=False)
-        print(f"💾 Saved {updated_count} jobs with new details to {DATA_FILE}")
+    metrics.record("store", store.stats())
+    metrics.record("export", changes.counts)
+    # 失敗して再試行が残っている求人や --limit で残した求人があれば、次回は先へ進む
+    left_pending = len(store.pending(need_recommendation=bool(api_key), sources=args.source))
+    store.close()
+    save_state(STATE_FILE, {"inputs": details_inputs(args), "left_pending": left_pending})
+    print(f"🧮 Export: {format_changes(changes.counts)}")
+    if changes.modified:
+        print(f"💾 Saved {count} jobs to {DATA_FILE}")
     else:
         print("No changes saved.")
+    print_report(report, DATA_FILE)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # 失敗は終了コード 1（run_scrapers.py がこれを必要とするステージを実行しないように）
+    with metrics.run("update_job_details") as m:
+        m.exit_code = asyncio.run(main())
+    sys.exit(m.exit_code)